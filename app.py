@@ -1,105 +1,563 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, g, render_template, request, jsonify, stream_with_context
 import requests
 import json
 import os
 from datetime import datetime
 import re
-from demo_data import get_demo_weather_data
-import google.generativeai as genai
+import time
+import queue
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait, FIRST_COMPLETED
+from demo_data import demo_payload
+from city_index import DATA_PATH as CITY_INDEX_DATA, load_index
+from weather_cache import WeatherCache, SingleFlight, city_key
+from weather_store import create_store
+import json_codec
+from weather_client import WeatherClient, CircuitBreaker, CircuitOpenError
+from http_cache import (ResponseBodyCache, cache_headers, choose_encoding, file_fingerprint,
+                        is_not_modified, snapshot_validators)
+from prewarm import Prewarmer
+from forecast_model import build_forecast_model
+from weather_views import parse_fields, project_current, project_forecast
+from chat_intents import IntentMatcher, ResponderRegistry
+from llm import GeminiProvider, LLMResponseCache, LatencyTracker, LLMRunner, build_prompt
+from metrics import REGISTRY, REQUEST_SECONDS, REQUESTS, STAGE_SECONDS, UPSTREAM_FETCHES
+from logging_config import configure_logging
+import logging
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Leveled logging (LOG_LEVEL, LOG_FORMAT=text|json); per-request detail is DEBUG only
+configure_logging()
+logger = logging.getLogger('weather_dashboard')
+
 app = Flask(__name__)
 
+def is_truthy(value):
+    """Interpret a query string flag"""
+    return (value or '').lower() in ('1', 'true', 'yes')
+
 # API Configuration
 OPENWEATHER_API_KEY = os.getenv('OPENWEATHER_API_KEY', 'YOUR_OPENWEATHER_API_KEY')
-OPENWEATHER_BASE_URL = 'https://api.openweathermap.org/data/2.5'
+OPENWEATHER_BASE_URL = os.getenv('OPENWEATHER_BASE_URL', 'https://api.openweathermap.org/data/2.5')
+# Total time budget for the upstream calls made by a single request (seconds)
+UPSTREAM_DEADLINE = float(os.getenv('UPSTREAM_DEADLINE', 10))
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
-# Configure Gemini
-if GEMINI_API_KEY:
-    print(f"Configuring Gemini with API key: {GEMINI_API_KEY[:10]}...")
-    genai.configure(api_key=GEMINI_API_KEY)
-    gemini_model = genai.GenerativeModel('gemini-1.5-pro')
-    print("Gemini model configured successfully")
+# Gemini client; the SDK is imported and configured on the first chat, not at startup
+gemini = GeminiProvider(GEMINI_API_KEY, os.getenv('GEMINI_MODEL', 'gemini-1.5-pro'))
+if gemini.configured:
+    logger.info("Gemini API key found; %s will be loaded on first use", gemini.model_name)
 else:
-    print("No Gemini API key found")
-    gemini_model = None
+    logger.info("No Gemini API key found")
 
-# Weather data storage
-weather_data = {}
+# Gemini answers are reused for repeated questions against the same weather snapshot
+llm_cache = LLMResponseCache(
+    max_entries=int(os.getenv('LLM_CACHE_MAX_ENTRIES', 512)),
+    near_duplicates=is_truthy(os.getenv('LLM_CACHE_NEAR_DUPLICATES', 'true'))
+)
+# Lifetime of cached answers built from a client-supplied summary (seconds)
+LLM_CACHE_DEFAULT_TTL = int(os.getenv('LLM_CACHE_DEFAULT_TTL', 10 * 60))
+# Time to first LLM token on /chat/stream, the chatbot's headline latency
+llm_ttft = LatencyTracker()
+# Gemini calls run on a bounded pool; past LLM_TIMEOUT the rule-based answer is returned instead
+llm_runner = LLMRunner(
+    max_concurrent=int(os.getenv('LLM_MAX_CONCURRENT', 4)),
+    timeout=float(os.getenv('LLM_TIMEOUT', 8))
+)
+# Cache answers that arrive after the caller stopped waiting, for the next identical question
+LLM_CACHE_LATE_RESULTS = is_truthy(os.getenv('LLM_CACHE_LATE_RESULTS', 'true'))
+
+# Weather data storage (bounded TTL + LRU cache shared by the API and chatbot).
+# WEATHER_STORE picks the backend: per-process memory, or a SQLite/Redis store
+# shared by every worker (see weather_store.create_store).
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 256))
+CACHE_MAX_BYTES = int(os.getenv('CACHE_MAX_BYTES', 16 * 1024 * 1024))
+weather_cache = WeatherCache(
+    ttls={
+        'current': int(os.getenv('CACHE_TTL_CURRENT', 10 * 60)),
+        'forecast': int(os.getenv('CACHE_TTL_FORECAST', 60 * 60)),
+    },
+    max_entries=CACHE_MAX_ENTRIES,
+    max_bytes=CACHE_MAX_BYTES,
+    store=create_store(
+        os.getenv('WEATHER_STORE'), CACHE_MAX_ENTRIES, CACHE_MAX_BYTES,
+        max_stored=int(os.getenv('WEATHER_STORE_MAX_ENTRIES', 10000))
+    ),
+    # Forecast models are rebuilt (once) by workers that read another worker's fetch
+    models={'forecast': build_forecast_model},
+    compress=is_truthy(os.getenv('WEATHER_STORE_COMPRESS', 'true'))
+)
 DEMO_MODE = OPENWEATHER_API_KEY == 'YOUR_OPENWEATHER_API_KEY'
 
+# Bundled city index: every spelling of a known city resolves to its canonical
+# ID, which keys the caches, and OpenWeather is queried by its coordinates
+city_index = load_index(os.getenv('CITY_INDEX_PATH') or CITY_INDEX_DATA)
+CITY_SUGGESTIONS_MAX = 20
+
+def canonical_location(city):
+    """The form a requested location is cached under: an indexed city's canonical ID, else as given"""
+    match = city_index.resolve(city)
+    return match.id if match else city
+
+def upstream_location(location):
+    """The location OpenWeather is asked for: an indexed city's coordinates, else as given"""
+    match = city_index.get(location)
+    return match.coordinates if match else location
+
+# Cities offered as suggestions; also the seed of the pre-warmed hot set
+POPULAR_CITIES = [
+    'London', 'New York', 'Tokyo', 'Paris', 'Sydney', 'Mumbai', 'Beijing',
+    'Berlin', 'Rome', 'Madrid', 'Amsterdam', 'Vienna', 'Prague', 'Budapest',
+    'Warsaw', 'Stockholm', 'Oslo', 'Copenhagen', 'Helsinki', 'Reykjavik'
+]
+
+# Worker pool used to issue the current and forecast calls concurrently
+upstream_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('UPSTREAM_WORKERS', 16)),
+    thread_name_prefix='upstream'
+)
+WEATHER_ENDPOINTS = ('current', 'forecast')
+
+# Concurrent cache misses for the same city share one upstream fetch
+weather_flight = SingleFlight()
+
+# Batch lookups fan out over their own bounded pool so they can't starve single lookups
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', 8))
+BATCH_MAX_CITIES = int(os.getenv('BATCH_MAX_CITIES', 500))
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_CONCURRENCY, thread_name_prefix='batch')
+
+def refresh_endpoint(endpoint, city):
+    """Refetch one endpoint for a city into the cache (used by the pre-warmer)"""
+    future = weather_flight.submit(
+        (endpoint, city_key(city)), upstream_executor, load_endpoint, endpoint, city,
+        time.monotonic() + UPSTREAM_DEADLINE
+    )
+    try:
+        future.result()
+    except requests.exceptions.RequestException as e:
+        raise RuntimeError(describe_upstream_error(e)) from None
+
+# Worker processes serving the app (set by run.py). Each has its own caches and
+# pre-warmer, so per-process budgets are divided by this.
+SERVING_PROCESSES = max(1, int(os.getenv('WEB_CONCURRENCY', 1)))
+
+# Keeps popular cities fresh ahead of TTL expiry within a daily OpenWeather call budget
+PREWARM_ENABLED = is_truthy(os.getenv('PREWARM_ENABLED', 'false' if DEMO_MODE else 'true'))
+prewarmer = Prewarmer(
+    refresh_endpoint,
+    weather_cache.ttl_remaining,
+    seed_cities=[canonical_location(city) for city in POPULAR_CITIES],
+    ttls=weather_cache.ttls,
+    daily_budget=int(os.getenv('PREWARM_DAILY_BUDGET', 500)) // SERVING_PROCESSES,
+    hot_set_size=int(os.getenv('PREWARM_HOT_SET_SIZE', 30))
+)
+
+# Upstream failures trip one circuit breaker shared by the sync and async (ASGI) clients
+upstream_breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv('UPSTREAM_BREAKER_THRESHOLD', 5)),
+    reset_timeout=float(os.getenv('UPSTREAM_BREAKER_RESET', 30))
+)
+UPSTREAM_CLIENT_OPTIONS = {
+    'connect_timeout': float(os.getenv('UPSTREAM_CONNECT_TIMEOUT', 3.05)),
+    'read_timeout': float(os.getenv('UPSTREAM_READ_TIMEOUT', 10)),
+    'max_retries': int(os.getenv('UPSTREAM_MAX_RETRIES', 2)),
+    'breaker': upstream_breaker,
+}
+
+# Keep-alive connection pool to OpenWeather with timeouts, retries and a circuit breaker
+weather_client = WeatherClient(
+    OPENWEATHER_BASE_URL,
+    OPENWEATHER_API_KEY,
+    pool_size=int(os.getenv('UPSTREAM_POOL_SIZE', 16)),
+    **UPSTREAM_CLIENT_OPTIONS
+)
+
+# Encoded (and compressed) weather responses, kept per snapshot so each is built once
+response_bodies = ResponseBodyCache(
+    max_entries=int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 1024)),
+    max_bytes=int(os.getenv('RESPONSE_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+)
+
+# url_for('static', ...) adds a content hash (?v=...); such URLs never change
+# content, so browsers may keep them for a year
+STATIC_MAX_AGE = 365 * 24 * 60 * 60
+
+@app.url_defaults
+def fingerprint_static_urls(endpoint, values):
+    """Add a content fingerprint to static asset URLs"""
+    if endpoint == 'static' and 'filename' in values and 'v' not in values:
+        fingerprint = file_fingerprint(os.path.join(app.static_folder, values['filename']))
+        if fingerprint:
+            values['v'] = fingerprint
+
+@app.after_request
+def cache_fingerprinted_static(response):
+    """Mark static responses requested with the current fingerprint as immutable"""
+    if request.endpoint == 'static' and response.status_code in (200, 304):
+        path = os.path.join(app.static_folder, request.view_args['filename'])
+        if request.args.get('v') and request.args.get('v') == file_fingerprint(path):
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = STATIC_MAX_AGE
+            response.cache_control.immutable = True
+    return response
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    """Count the response and time it by route (the URL rule's endpoint name)"""
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.endpoint or 'unmatched'
+        REQUEST_SECONDS.observe(time.perf_counter() - started, route, request.method)
+        REQUESTS.inc(route, request.method, str(response.status_code))
+    return response
+
 @app.route('/')
 def index():
     """Serve the main weather dashboard page"""
     return render_template('index.html')
 
+def load_endpoint(endpoint, city, deadline=None):
+    """Fetch an endpoint (or demo data) for a city and store it in the cache"""
+    # The raw bytes are kept so responses and stores reuse them without re-encoding
+    if DEMO_MODE:
+        # Use synthetic data when no API key is configured
+        payload, raw = demo_payload(endpoint, city)
+    else:
+        try:
+            with STAGE_SECONDS.time(f'upstream_{endpoint}'):
+                payload, raw = weather_client.fetch(endpoint, upstream_location(city), deadline)
+        except Exception:
+            UPSTREAM_FETCHES.inc(endpoint, 'error')
+            raise
+        UPSTREAM_FETCHES.inc(endpoint, 'ok')
+    
+    # Forecasts are condensed once at ingest so the chatbot never re-walks the raw list
+    if endpoint == 'forecast':
+        with STAGE_SECONDS.time('forecast_model'):
+            model = build_forecast_model(payload)
+    else:
+        model = None
+    return weather_cache.set(endpoint, city, payload, model, raw)
+
+def fetch_weather(city, refresh=False):
+    """Load current and forecast data concurrently under a shared deadline
+    
+    Returns (entries, errors, cache_hit) where entries (cache entries holding the
+    payload and any derived model) and errors are keyed by endpoint, so one
+    endpoint failing does not discard the other's result.
+    """
+    entries = {}
+    errors = {}
+    
+    if not refresh:
+        with STAGE_SECONDS.time('cache_lookup'):
+            for endpoint in WEATHER_ENDPOINTS:
+                entry = weather_cache.get(endpoint, city)
+                if entry is not None:
+                    entries[endpoint] = entry
+    
+    missing = [endpoint for endpoint in WEATHER_ENDPOINTS if endpoint not in entries]
+    if not missing:
+        return entries, errors, True
+    
+    deadline = time.monotonic() + UPSTREAM_DEADLINE
+    futures = {
+        endpoint: weather_flight.submit(
+            (endpoint, city_key(city)), upstream_executor, load_endpoint, endpoint, city, deadline
+        )
+        for endpoint in missing
+    }
+    for endpoint, future in futures.items():
+        try:
+            entries[endpoint] = future.result(timeout=max(0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            errors[endpoint] = 'Timed out waiting for OpenWeather'
+        except requests.exceptions.RequestException as e:
+            errors[endpoint] = describe_upstream_error(e)
+    
+    return entries, errors, False
+
+def describe_upstream_error(error):
+    """Summarize an upstream failure without echoing the request URL (it holds the API key)"""
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        return f'OpenWeather returned HTTP {error.response.status_code}'
+    if isinstance(error, requests.exceptions.Timeout):
+        return 'Timed out waiting for OpenWeather'
+    if isinstance(error, CircuitOpenError):
+        return 'OpenWeather is unavailable, please try again shortly'
+    return 'Could not reach OpenWeather'
+
+def weather_not_found(city):
+    """Build the (body, status) returned when a city's current conditions are unavailable"""
+    return {
+        'success': False,
+        'error': f'Could not fetch weather data for {city}. Please check the city name and try again.'
+    }, 400
+
+def build_weather_response(city, entries, errors, cache_hit, fields=None):
+    """Build the (body, status) returned for one city's weather lookup
+    
+    With fields (see weather_views) the payloads are projected onto them.
+    """
+    # Current conditions are required; a missing forecast is reported as partial
+    if 'current' not in entries:
+        return weather_not_found(city)
+    
+    forecast = entries.get('forecast')
+    response = {
+        'success': True,
+        'current': entries['current']['data'],
+        'forecast': forecast['data'] if forecast else None,
+        'cached': cache_hit,
+        'demo_mode': DEMO_MODE
+    }
+    if fields:
+        response['fields'] = list(fields)
+        response['current'] = project_current(response['current'], fields)
+        response['forecast'] = project_forecast(forecast['model'], fields) if forecast else None
+    if errors:
+        response['partial'] = True
+        response['errors'] = errors
+    return response, 200
+
 @app.route('/api/weather/<city>')
 def get_weather_data(city):
-    """Get weather data for a specific city"""
+    """Get weather data for a specific city (?view=slim or ?fields=... for a projection)"""
     try:
-        if DEMO_MODE:
-            # Use demo data when no API key is configured
-            demo_data = get_demo_weather_data(city)
-            weather_data[city] = {
-                'current': demo_data['current'],
-                'forecast': demo_data['forecast'],
-                'timestamp': datetime.now().isoformat()
-            }
-            
-            return jsonify({
-                'success': True,
-                'current': demo_data['current'],
-                'forecast': demo_data['forecast'],
-                'demo_mode': True
-            })
-        
-        # Fetch current weather
-        current_url = f"{OPENWEATHER_BASE_URL}/weather"
-        current_params = {
-            'q': city,
-            'appid': OPENWEATHER_API_KEY,
-            'units': 'metric'
-        }
-        
-        current_response = requests.get(current_url, params=current_params)
-        current_response.raise_for_status()
-        current_data = current_response.json()
-        
-        # Fetch 5-day forecast
-        forecast_url = f"{OPENWEATHER_BASE_URL}/forecast"
-        forecast_params = {
-            'q': city,
-            'appid': OPENWEATHER_API_KEY,
-            'units': 'metric'
-        }
-        
-        forecast_response = requests.get(forecast_url, params=forecast_params)
-        forecast_response.raise_for_status()
-        forecast_data = forecast_response.json()
-        
-        # Store data for chatbot
-        weather_data[city] = {
-            'current': current_data,
-            'forecast': forecast_data,
-            'timestamp': datetime.now().isoformat()
-        }
-        
-        return jsonify({
-            'success': True,
-            'current': current_data,
-            'forecast': forecast_data,
-            'demo_mode': False
-        })
-        
-    except requests.exceptions.RequestException as e:
+        fields = parse_fields(request.args.get('view'), request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    location = canonical_location(city)
+    refresh = is_truthy(request.args.get('refresh'))
+    entries, errors, cache_hit = fetch_weather(location, refresh)
+    if entries and not errors:
+        # Only cities that resolve count as demand, so misspellings never join the hot set
+        prewarmer.record_request(location)
+    return Response(*weather_http_response(
+        'weather', location, entries, errors, cache_hit, request.headers, fields, name=city
+    ))
+
+def build_daily_response(city, entries, errors, cache_hit):
+    """Build the (body, status) returned by the daily aggregates endpoint"""
+    if 'current' not in entries:
+        return weather_not_found(city)
+    
+    forecast = entries.get('forecast')
+    response = {
+        'success': True,
+        'current': entries['current']['data'],
+        'cached': cache_hit,
+        'demo_mode': DEMO_MODE
+    }
+    # Aggregates were computed when the forecast was cached
+    response.update(forecast['model'].to_daily_dict() if forecast else {'days': [], 'stats': None})
+    if errors:
+        response['partial'] = True
+        response['errors'] = errors
+    return response, 200
+
+@app.route('/api/weather/<city>/daily')
+def get_daily_weather(city):
+    """Get current conditions plus per-day forecast aggregates in the city's local time"""
+    location = canonical_location(city)
+    refresh = is_truthy(request.args.get('refresh'))
+    entries, errors, cache_hit = fetch_weather(location, refresh)
+    if entries and not errors:
+        prewarmer.record_request(location)
+    return Response(*weather_http_response(
+        'daily', location, entries, errors, cache_hit, request.headers, name=city
+    ))
+
+def encode_json(body):
+    """Encode a response body the way jsonify does"""
+    return (app.json.dumps(body) + '\n').encode('utf-8')
+
+def encode_snapshot_response(kind, entries, cache_hit, fields=None):
+    """Encode a complete weather or daily response, embedding the upstream JSON bytes as they are"""
+    members = [
+        ('cached', json_codec.dumps(cache_hit)),
+        ('demo_mode', json_codec.dumps(DEMO_MODE)),
+        ('success', b'true'),
+    ]
+    if kind == 'daily':
+        # Aggregates were computed when the forecast was cached
+        members.append(('current', entries['current']['raw']))
+        members.extend((name, json_codec.dumps(value))
+                       for name, value in entries['forecast']['model'].to_daily_dict().items())
+    elif fields:
+        members.append(('fields', json_codec.dumps(list(fields))))
+        members.append(('current', json_codec.dumps(project_current(entries['current']['data'], fields))))
+        members.append(('forecast', json_codec.dumps(project_forecast(entries['forecast']['model'], fields))))
+    else:
+        members.append(('current', entries['current']['raw']))
+        members.append(('forecast', entries['forecast']['raw']))
+    return json_codec.encode_object(sorted(members)) + b'\n'
+
+def weather_http_response(kind, location, entries, errors, cache_hit, headers, fields=None, name=None):
+    """Build (body bytes, status, headers) for a weather or daily lookup with HTTP caching
+    
+    Complete responses carry validators and a max-age derived from the cached
+    snapshots and answer matching conditional requests with 304. Their bodies
+    are encoded and compressed once per snapshot and then served as stored
+    bytes. Errors and partial results are not cached. fields selects a
+    projected view of a weather lookup. location is the canonical form the
+    bodies are cached under; name, the location as requested, is what error
+    messages show.
+    """
+    if errors or len(entries) < len(WEATHER_ENDPOINTS):
+        name = name or location
+        if kind == 'daily':
+            body, status = build_daily_response(name, entries, errors, cache_hit)
+        else:
+            body, status = build_weather_response(name, entries, errors, cache_hit, fields)
+        return encode_json(body), status, [('Content-Type', 'application/json'), ('Cache-Control', 'no-store')]
+    
+    etag, modified, max_age = snapshot_validators(entries, weather_cache.ttls, (kind, fields, city_key(location)))
+    response_headers = cache_headers(etag, modified, max_age)
+    if is_not_modified(headers, etag, modified):
+        return b'', 304, response_headers
+    
+    response_headers.append(('Content-Type', 'application/json'))
+    encoding = choose_encoding(headers.get('Accept-Encoding'))
+    # Fresh fetches are served once as "cached": false, so only cache hits are kept
+    body = response_bodies.get(
+        (kind, fields, city_key(location), etag, cache_hit), encoding,
+        lambda: encode_snapshot_response(kind, entries, cache_hit, fields), max_age if cache_hit else 0
+    )
+    if encoding is not None:
+        response_headers.append(('Content-Encoding', encoding))
+    return body, 200, response_headers
+
+def parse_batch_locations(data):
+    """Turn a batch request body into a de-duplicated list of city names / "lat,lon" strings
+    
+    Raises ValueError when the body is not an object or "cities" / "locations"
+    are not lists (a string would otherwise be looked up letter by letter).
+    """
+    if not isinstance(data, dict):
+        raise ValueError('The request body must be a JSON object.')
+    cities = data.get('cities') or []
+    coordinates = data.get('locations') or []
+    if not isinstance(cities, list) or not all(isinstance(city, str) for city in cities):
+        raise ValueError('"cities" must be a list of city names.')
+    if not isinstance(coordinates, list):
+        raise ValueError('"locations" must be a list of {"lat": .., "lon": ..} objects.')
+    
+    locations = []
+    for city in cities:
+        if city.strip():
+            locations.append(city.strip())
+    for coords in coordinates:
+        try:
+            locations.append(f"{float(coords['lat']):.4f},{float(coords['lon']):.4f}")
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f'Invalid location: {coords!r}')
+    
+    seen = set()
+    unique = []
+    for location in locations:
+        key = city_key(canonical_location(location))
+        if key not in seen:
+            seen.add(key)
+            unique.append(location)
+    return unique
+
+def iter_batch_results(locations, refresh=False):
+    """Yield (location, body) as lookups finish, keeping at most BATCH_CONCURRENCY in flight"""
+    pending = {}
+    remaining = iter(locations)
+    
+    def submit_next():
+        for location in remaining:
+            pending[batch_executor.submit(fetch_weather, canonical_location(location), refresh)] = location
+            return
+    
+    for _ in range(BATCH_CONCURRENCY):
+        submit_next()
+    
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            location = pending.pop(future)
+            try:
+                body, _ = build_weather_response(location, *future.result())
+            except Exception:
+                body = {
+                    'success': False,
+                    'error': f'Could not fetch weather data for {location}.'
+                }
+            yield location, body
+            submit_next()
+
+@app.route('/api/weather/batch', methods=['POST'])
+def get_weather_batch():
+    """Get weather data for many cities (or lat/lon pairs) in one call
+    
+    Body: {"cities": [...], "locations": [{"lat": .., "lon": ..}], "stream": false}
+    With "stream": true results are sent as newline-delimited JSON as they finish,
+    so memory stays flat regardless of batch size.
+    """
+    data = request.get_json(silent=True)
+    if data is None:
+        data = {}
+    try:
+        locations = parse_batch_locations(data)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    if not locations:
+        return jsonify({'success': False, 'error': 'Provide a list of "cities" or "locations".'}), 400
+    if len(locations) > BATCH_MAX_CITIES:
         return jsonify({
             'success': False,
-            'error': f'Could not fetch weather data for {city}. Please check the city name and try again.'
+            'error': f'A batch can contain at most {BATCH_MAX_CITIES} cities.'
         }), 400
+    
+    refresh = is_truthy(str(data.get('refresh', '')))
+    
+    if data.get('stream'):
+        def generate():
+            for location, body in iter_batch_results(locations, refresh):
+                body['city'] = location
+                yield json.dumps(body) + '\n'
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    
+    results = dict(iter_batch_results(locations, refresh))
+    return jsonify({
+        'success': True,
+        'results': {location: results[location] for location in locations},
+        'demo_mode': DEMO_MODE
+    })
+
+@app.route('/api/weather/<city>', methods=['DELETE'])
+def invalidate_weather_data(city):
+    """Drop cached weather data for a city so the next request refetches it"""
+    return jsonify({
+        'success': True,
+        'invalidated': weather_cache.invalidate(canonical_location(city))
+    })
+
+@app.route('/api/cache/stats')
+def get_cache_stats():
+    """Report weather cache hit/miss/eviction counters"""
+    stats = weather_cache.stats()
+    stats['responses'] = response_bodies.stats()
+    stats['json_backend'] = json_codec.BACKEND
+    return jsonify(stats)
+
+@app.route('/api/upstream/stats')
+def get_upstream_stats():
+    """Report OpenWeather request, retry, connection reuse and circuit breaker counters"""
+    stats = weather_client.stats()
+    stats['single_flight'] = weather_flight.stats()
+    return jsonify(stats)
 
 @app.route('/api/chatbot', methods=['POST'])
 def chatbot():
@@ -110,7 +568,7 @@ def chatbot():
         city = data.get('city', 'London')
         
         # Get weather data for the city
-        city_data = weather_data.get(city)
+        city_data = weather_cache.get_city(canonical_location(city))
         if not city_data:
             return jsonify({
                 'success': False,
@@ -118,10 +576,10 @@ def chatbot():
             })
         
         current_data = city_data['current']
-        forecast_data = city_data['forecast']
+        forecast = city_data['model']
         
         # Process the message and generate response
-        response = process_chat_message(message, current_data, forecast_data)
+        response = process_chat_message(message, current_data, forecast)
         
         return jsonify({
             'success': True,
@@ -134,170 +592,273 @@ def chatbot():
             'response': f"Sorry, I encountered an error: {str(e)}"
         }), 500
 
-def process_chat_message(message, current_data, forecast_data):
-    """Process chat messages and generate intelligent responses"""
-    
-    # Temperature queries
-    if any(word in message for word in ['temperature', 'temp']):
-        if any(word in message for word in ['current', 'now']):
-            temp = round(current_data['main']['temp'])
-            return f"The current temperature is {temp}°C."
-        elif any(word in message for word in ['highest', 'max']):
-            temps = [item['main']['temp'] for item in forecast_data['list']]
-            max_temp = round(max(temps))
-            return f"The highest temperature in the forecast is {max_temp}°C."
-        elif any(word in message for word in ['lowest', 'min']):
-            temps = [item['main']['temp'] for item in forecast_data['list']]
-            min_temp = round(min(temps))
-            return f"The lowest temperature in the forecast is {min_temp}°C."
-        elif any(word in message for word in ['average', 'avg']):
-            temps = [item['main']['temp'] for item in forecast_data['list']]
-            avg_temp = round(sum(temps) / len(temps))
-            return f"The average temperature is {avg_temp}°C."
-        else:
-            current_temp = round(current_data['main']['temp'])
-            temps = [item['main']['temp'] for item in forecast_data['list']]
-            max_temp = round(max(temps))
-            min_temp = round(min(temps))
-            return f"The current temperature is {current_temp}°C. The forecast shows temperatures ranging from {min_temp}°C to {max_temp}°C."
-    
-    # Humidity queries
-    if 'humidity' in message:
-        if any(word in message for word in ['current', 'now']):
-            humidity = current_data['main']['humidity']
-            return f"The current humidity is {humidity}%."
-        elif any(word in message for word in ['average', 'avg']):
-            humidities = [item['main']['humidity'] for item in forecast_data['list']]
-            avg_humidity = round(sum(humidities) / len(humidities))
-            return f"The average humidity is {avg_humidity}%."
-        else:
-            current_humidity = current_data['main']['humidity']
-            humidities = [item['main']['humidity'] for item in forecast_data['list']]
-            avg_humidity = round(sum(humidities) / len(humidities))
-            return f"The current humidity is {current_humidity}% and the average humidity is {avg_humidity}%."
-    
-    # Wind queries
-    if 'wind' in message:
-        wind_speed = round(current_data['wind']['speed'] * 3.6)  # Convert m/s to km/h
-        return f"The current wind speed is {wind_speed} km/h."
-    
-    # Weather condition queries
-    if any(word in message for word in ['weather', 'condition']):
-        weather_desc = current_data['weather'][0]['description']
-        return f"The current weather is {weather_desc}."
-    
-    # Visibility queries
-    if 'visibility' in message:
-        visibility_km = round(current_data['visibility'] / 1000, 1)
-        return f"The current visibility is {visibility_km} km."
-    
-    # Rain queries
-    if any(word in message for word in ['rain', 'precipitation']):
-        weather_desc = current_data['weather'][0]['description'].lower()
-        if 'rain' in weather_desc:
-            return f"Yes, there is rain in the forecast. The current conditions show {current_data['weather'][0]['description']}."
-        else:
-            return f"No rain is currently forecasted. The weather is {current_data['weather'][0]['description']}."
-    
-    # General weather summary
-    if any(word in message for word in ['summary', 'overview']):
-        city_name = current_data['name']
-        country = current_data['sys']['country']
+# Basic chatbot intents, highest priority first. Specific topics outrank the
+# generic "weather"/"condition" intent so "will the weather bring rain?" is a rain question.
+# Keywords match the start of a word, so "temp" also covers "temperatures".
+CHAT_INTENTS = (
+    IntentMatcher()
+    .add_intent('temperature', ['temp'])
+    .add_intent('humidity', ['humid'])
+    .add_intent('wind', ['wind'])
+    .add_intent('visibility', ['visibility'])
+    .add_intent('rain', ['rain', 'precipitation'])
+    .add_intent('summary', ['summary', 'overview'])
+    .add_intent('condition', ['weather', 'condition'])
+    .add_intent('help', ['help', 'what can you do'])
+    .add_modifier('current', ['current', 'now'])
+    .add_modifier('highest', ['highest', 'max'])
+    .add_modifier('lowest', ['lowest', 'min'])
+    .add_modifier('average', ['average', 'avg', 'mean'])
+)
+
+def default_chat_response(current_data, forecast, modifiers):
+    """Reply used when no intent matches"""
+    return "I'm here to help with weather information! You can ask me about temperature, humidity, wind, weather conditions, or request a summary. What would you like to know?"
+
+chat_responders = ResponderRegistry(default_chat_response)
+
+@chat_responders.register('temperature')
+def respond_temperature(current_data, forecast, modifiers):
+    if 'current' in modifiers:
         temp = round(current_data['main']['temp'])
-        weather_desc = current_data['weather'][0]['description']
+        return f"The current temperature is {temp}°C."
+    elif 'highest' in modifiers:
+        return f"The highest temperature in the forecast is {round(forecast.temp_max)}°C."
+    elif 'lowest' in modifiers:
+        return f"The lowest temperature in the forecast is {round(forecast.temp_min)}°C."
+    elif 'average' in modifiers:
+        return f"The average temperature is {round(forecast.temp_mean)}°C."
+    else:
+        current_temp = round(current_data['main']['temp'])
+        return f"The current temperature is {current_temp}°C. The forecast shows temperatures ranging from {round(forecast.temp_min)}°C to {round(forecast.temp_max)}°C."
+
+@chat_responders.register('humidity')
+def respond_humidity(current_data, forecast, modifiers):
+    if 'current' in modifiers:
         humidity = current_data['main']['humidity']
-        wind_speed = round(current_data['wind']['speed'] * 3.6)
-        
-        return f"Here's a weather summary for {city_name}, {country}: Current temperature is {temp}°C with {weather_desc}. Humidity is {humidity}% and wind speed is {wind_speed} km/h."
-    
-    # Help
-    if any(word in message for word in ['help', 'what can you do']):
-        return "I can help you with weather information! Ask me about temperature (current, highest, lowest, average), humidity, wind speed, weather conditions, visibility, rain, or request a weather summary."
+        return f"The current humidity is {humidity}%."
+    elif 'average' in modifiers:
+        return f"The average humidity is {round(forecast.humidity_mean)}%."
+    else:
+        current_humidity = current_data['main']['humidity']
+        return f"The current humidity is {current_humidity}% and the average humidity is {round(forecast.humidity_mean)}%."
+
+@chat_responders.register('wind')
+def respond_wind(current_data, forecast, modifiers):
+    wind_speed = round(current_data['wind']['speed'] * 3.6)  # Convert m/s to km/h
+    return f"The current wind speed is {wind_speed} km/h."
+
+@chat_responders.register('condition')
+def respond_condition(current_data, forecast, modifiers):
+    weather_desc = current_data['weather'][0]['description']
+    return f"The current weather is {weather_desc}."
+
+@chat_responders.register('visibility')
+def respond_visibility(current_data, forecast, modifiers):
+    visibility_km = round(current_data['visibility'] / 1000, 1)
+    return f"The current visibility is {visibility_km} km."
+
+@chat_responders.register('rain')
+def respond_rain(current_data, forecast, modifiers):
+    weather_desc = current_data['weather'][0]['description']
+    if 'rain' in weather_desc.lower():
+        return f"Yes, there is rain in the forecast. The current conditions show {weather_desc}."
+    else:
+        return f"No rain is currently forecasted. The weather is {weather_desc}."
+
+@chat_responders.register('summary')
+def respond_summary(current_data, forecast, modifiers):
+    city_name = current_data['name']
+    country = current_data['sys']['country']
+    temp = round(current_data['main']['temp'])
+    weather_desc = current_data['weather'][0]['description']
+    humidity = current_data['main']['humidity']
+    wind_speed = round(current_data['wind']['speed'] * 3.6)
     
-    # Default response
-    return "I'm here to help with weather information! You can ask me about temperature, humidity, wind, weather conditions, or request a summary. What would you like to know?"
+    return f"Here's a weather summary for {city_name}, {country}: Current temperature is {temp}°C with {weather_desc}. Humidity is {humidity}% and wind speed is {wind_speed} km/h."
 
-def process_advanced_chat_message(query, weather_data):
-    """Enhanced rule-based processing for complex weather queries"""
-    query_lower = query.lower()
+@chat_responders.register('help')
+def respond_help(current_data, forecast, modifiers):
+    return "I can help you with weather information! Ask me about temperature (current, highest, lowest, average), humidity, wind speed, weather conditions, visibility, rain, or request a weather summary."
+
+@STAGE_SECONDS.time('rule_based')
+def process_chat_message(message, current_data, forecast):
+    """Process chat messages and generate intelligent responses
     
-    # Extract weather information from the data
-    if not weather_data:
-        return "I don't have weather data available. Please search for a city first."
+    forecast is the precomputed ForecastSeries for the city.
+    """
+    intent, modifiers = CHAT_INTENTS.match(message)
+    return chat_responders.respond(intent, current_data, forecast, modifiers)
+
+# Precompiled patterns for the legacy text summary produced by the dashboard
+SUMMARY_LINE_RE = re.compile(
+    r'^Current Weather in (?P<city>[^:]+):'
+    r'|^- Temperature: (?P<temp>-?\d+)°C'
+    r'|^- Weather: (?P<weather>.+)'
+    r'|^- Humidity: (?P<humidity>\d+)%'
+    r'|^(?P<forecast_header>5-Day Forecast:)'
+    r'|^(?P<day>[^:]+): (?P<day_temp>-?\d+)°C, (?P<day_weather>.+?), (?P<day_humidity>\d+)% humidity'
+    r'|^- (?P<stat>Highest|Lowest|Average): (?P<stat_temp>-?\d+)°C',
+    re.MULTILINE
+)
+RAIN_WORDS_RE = re.compile(r'rain|drizzle|shower|thunderstorm', re.IGNORECASE)
+MORE_THAN_RE = re.compile(r'more than (\d+)')
+
+# Advanced chat intents, highest priority first
+ADVANCED_INTENTS = (
+    IntentMatcher()
+    .add_intent('rain_count', ['rain more than', 'rainy days'])
+    .add_intent('rain', ['umbrella', 'rain', 'precipitation'])
+    .add_intent('summary', ['summarize', 'summarise', 'summary'])
+    .add_intent('outdoor', ['outdoor', 'activities', 'activity', 'best day'])
+    .add_intent('temperature', ['average', 'highest', 'temperature'])
+    .add_intent('packing', ['pack', 'trip'])
+    .add_intent('compare', ['last week'])
+    .add_modifier('compare', ['compare', 'comparison'])
+)
+
+def classify_advanced_intent(query):
+    """Return the highest priority intent mentioned in a query"""
+    intent, modifiers = ADVANCED_INTENTS.match(query)
+    if intent == 'compare' and 'compare' not in modifiers:
+        return None
+    return intent
+
+def build_chat_weather(city_data):
+    """Build the structured weather view the chat endpoints answer from
     
-    # Parse the weather data to extract information
-    lines = weather_data.split('\n')
-    current_weather = {}
-    forecast_days = []
-    temp_stats = {}
-    
-    # Parse current weather
-    for line in lines:
-        if 'Current Weather in' in line:
-            city_info = line.split('Current Weather in ')[1].split(':')[0]
-        elif 'Temperature:' in line:
-            temp_match = re.search(r'(\d+)°C', line)
-            if temp_match:
-                current_weather['temp'] = int(temp_match.group(1))
-        elif 'Weather:' in line:
-            weather_match = re.search(r'Weather: (.+)', line)
-            if weather_match:
-                current_weather['weather'] = weather_match.group(1)
-        elif 'Humidity:' in line:
-            humidity_match = re.search(r'(\d+)%', line)
-            if humidity_match:
-                current_weather['humidity'] = int(humidity_match.group(1))
-    
-    # Parse forecast
+    city_data is a cached city (see WeatherCache.get_city); the forecast side
+    comes from the precomputed ForecastSeries, so nothing is re-parsed.
+    """
+    current = city_data['current']
+    forecast = city_data['model']
+    days = []
+    for day in forecast.daily:
+        date = datetime.strptime(day.date, '%Y-%m-%d')
+        days.append({
+            'day': f"{date:%a} ({date:%b} {date.day})",
+            'temp': round(day.temp_mean),
+            'weather': day.description,
+            'humidity': round(day.humidity_mean),
+            'rainy': day.is_rainy
+        })
+    return {
+        'city': f"{current['name']}, {current['sys']['country']}",
+        'current': {
+            'temp': round(current['main']['temp']),
+            'feels_like': round(current['main']['feels_like']),
+            'weather': current['weather'][0]['description'],
+            'humidity': current['main']['humidity'],
+            'wind_kmh': round(current['wind']['speed'] * 3.6),
+            'visibility_km': round(current.get('visibility', 0) / 1000),
+            'pressure': current['main']['pressure']
+        },
+        'days': days,
+        'stats': {
+            'highest': round(forecast.temp_max),
+            'lowest': round(forecast.temp_min),
+            'average': round(forecast.temp_mean)
+        } if len(forecast) else {}
+    }
+
+def parse_weather_summary(text):
+    """Parse the dashboard's legacy text summary into the structured weather view (single pass)"""
+    weather = {'city': None, 'current': {}, 'days': [], 'stats': {}}
     in_forecast = False
-    for line in lines:
-        if '5-Day Forecast:' in line:
+    for match in SUMMARY_LINE_RE.finditer(text):
+        group = match.lastgroup
+        if group == 'city':
+            weather['city'] = match.group('city')
+        elif group == 'forecast_header':
             in_forecast = True
-            continue
-        elif in_forecast and line.strip() and ':' in line and '°C' in line:
-            # Parse forecast line like "Mon (Aug 5): 20°C, clear sky, 60% humidity"
-            parts = line.split(': ')
-            if len(parts) == 2:
-                day_info = parts[0]
-                weather_info = parts[1]
-                
-                temp_match = re.search(r'(\d+)°C', weather_info)
-                weather_match = re.search(r', (.+?),', weather_info)
-                humidity_match = re.search(r'(\d+)% humidity', weather_info)
-                
-                if temp_match:
-                    forecast_days.append({
-                        'day': day_info,
-                        'temp': int(temp_match.group(1)),
-                        'weather': weather_match.group(1) if weather_match else 'unknown',
-                        'humidity': int(humidity_match.group(1)) if humidity_match else 0
-                    })
-    
-    # Parse temperature statistics
-    for line in lines:
-        if 'Highest:' in line:
-            temp_match = re.search(r'(\d+)°C', line)
-            if temp_match:
-                temp_stats['highest'] = int(temp_match.group(1))
-        elif 'Lowest:' in line:
-            temp_match = re.search(r'(\d+)°C', line)
-            if temp_match:
-                temp_stats['lowest'] = int(temp_match.group(1))
-        elif 'Average:' in line:
-            temp_match = re.search(r'(\d+)°C', line)
-            if temp_match:
-                temp_stats['average'] = int(temp_match.group(1))
-    
-    # Process specific query types
-    if any(word in query_lower for word in ['umbrella', 'rain', 'precipitation']):
-        rainy_days = [day for day in forecast_days if any(word in day['weather'].lower() for word in ['rain', 'drizzle', 'shower'])]
+        elif group == 'stat_temp':
+            weather['stats'][match.group('stat').lower()] = int(match.group('stat_temp'))
+        elif group == 'day_humidity' and in_forecast:
+            day_weather = match.group('day_weather')
+            weather['days'].append({
+                'day': match.group('day'),
+                'temp': int(match.group('day_temp')),
+                'weather': day_weather,
+                'humidity': int(match.group('day_humidity')),
+                'rainy': bool(RAIN_WORDS_RE.search(day_weather))
+            })
+        elif group in ('temp', 'humidity') and not in_forecast:
+            weather['current'][group] = int(match.group(group))
+        elif group == 'weather' and not in_forecast:
+            weather['current']['weather'] = match.group('weather')
+    return weather
+
+def format_weather_summary(weather):
+    """Render the structured weather view as the text context given to the LLM"""
+    current = weather['current']
+    lines = [f"Current Weather in {weather['city']}:"]
+    if 'temp' in current:
+        feels_like = f" (feels like {current['feels_like']}°C)" if 'feels_like' in current else ''
+        lines.append(f"- Temperature: {current['temp']}°C{feels_like}")
+    if 'weather' in current:
+        lines.append(f"- Weather: {current['weather']}")
+    if 'humidity' in current:
+        lines.append(f"- Humidity: {current['humidity']}%")
+    if 'wind_kmh' in current:
+        lines.append(f"- Wind Speed: {current['wind_kmh']} km/h")
+    if 'visibility_km' in current:
+        lines.append(f"- Visibility: {current['visibility_km']} km")
+    if 'pressure' in current:
+        lines.append(f"- Pressure: {current['pressure']} hPa")
+    
+    lines.append('')
+    lines.append('5-Day Forecast:')
+    for day in weather['days']:
+        lines.append(f"{day['day']}: {day['temp']}°C, {day['weather']}, {day['humidity']}% humidity")
+    
+    stats = weather['stats']
+    if stats:
+        lines.append('')
+        lines.append('Temperature Statistics:')
+        for name in ('highest', 'lowest', 'average'):
+            if name in stats:
+                lines.append(f"- {name.title()}: {stats[name]}°C")
+    return '\n'.join(lines)
+
+@STAGE_SECONDS.time('rule_based')
+def process_advanced_chat_message(query, weather):
+    """Enhanced rule-based processing for complex weather queries
+    
+    weather is the structured view from build_chat_weather (or, for legacy
+    clients, parse_weather_summary).
+    """
+    if not weather:
+        return "I don't have weather data available. Please search for a city first."
+    
+    query_lower = query.lower()
+    current_weather = weather['current']
+    forecast_days = weather['days']
+    temp_stats = weather['stats']
+    intent = classify_advanced_intent(query_lower)
+    
+    if intent == 'rain_count':
+        rainy_count = sum(1 for day in forecast_days if day['rainy'])
+        
+        # Extract number from query (e.g., "more than 3 times")
+        number_match = MORE_THAN_RE.search(query_lower)
+        if number_match:
+            threshold = int(number_match.group(1))
+            if rainy_count > threshold:
+                return f"Yes, it will rain more than {threshold} times this week. I count {rainy_count} rainy days in the forecast."
+            else:
+                return f"No, it won't rain more than {threshold} times this week. I count {rainy_count} rainy days in the forecast."
+        else:
+            return f"There are {rainy_count} rainy days in the forecast this week."
+    
+    elif intent == 'rain':
+        rainy_days = [day for day in forecast_days if day['rainy']]
         if rainy_days:
             days_list = ', '.join([day['day'] for day in rainy_days])
             return f"Yes, you might need an umbrella! I see rain in the forecast for: {days_list}. The weather shows {len(rainy_days)} rainy days this week."
         else:
             return "No, you probably don't need an umbrella this week. The forecast shows clear or partly cloudy conditions with no significant rain expected."
     
-    elif 'summarize' in query_lower or 'summary' in query_lower:
+    elif intent == 'summary':
         if forecast_days:
             summary = f"Here's a 5-day weather summary: "
             for day in forecast_days:
@@ -306,7 +867,7 @@ def process_advanced_chat_message(query, weather_data):
         else:
             return "I can't provide a detailed summary without forecast data. Please search for a city first."
     
-    elif any(word in query_lower for word in ['outdoor', 'activities', 'best day']):
+    elif intent == 'outdoor':
         # Find the day with the best weather (sunny, warm, low humidity)
         best_day = None
         best_score = -1
@@ -314,7 +875,8 @@ def process_advanced_chat_message(query, weather_data):
         for day in forecast_days:
             score = 0
             # Prefer sunny weather
-            if 'clear' in day['weather'].lower() or 'sunny' in day['weather'].lower():
+            weather_desc = day['weather'].lower()
+            if 'clear' in weather_desc or 'sunny' in weather_desc:
                 score += 3
             # Prefer moderate temperatures (15-25°C)
             if 15 <= day['temp'] <= 25:
@@ -332,7 +894,7 @@ def process_advanced_chat_message(query, weather_data):
         else:
             return "I can't determine the best day without detailed forecast data. Please search for a city first."
     
-    elif any(word in query_lower for word in ['average', 'highest', 'temperature']):
+    elif intent == 'temperature':
         if temp_stats:
             response = f"Temperature statistics: "
             if 'highest' in temp_stats:
@@ -345,14 +907,14 @@ def process_advanced_chat_message(query, weather_data):
         else:
             return "I can't provide temperature statistics without forecast data. Please search for a city first."
     
-    elif 'pack' in query_lower or 'trip' in query_lower:
+    elif intent == 'packing':
         if temp_stats and current_weather:
             suggestions = []
             if temp_stats.get('highest', 0) > 25:
                 suggestions.append("light clothing")
             if temp_stats.get('lowest', 0) < 15:
                 suggestions.append("a jacket or sweater")
-            if any('rain' in day['weather'].lower() for day in forecast_days):
+            if any(day['rainy'] for day in forecast_days):
                 suggestions.append("an umbrella or raincoat")
             if current_weather.get('humidity', 0) > 70:
                 suggestions.append("moisture-wicking clothes")
@@ -364,22 +926,7 @@ def process_advanced_chat_message(query, weather_data):
         else:
             return "I can't provide packing suggestions without detailed weather data. Please search for a city first."
     
-    elif 'rain more than' in query_lower or 'rainy days' in query_lower:
-        rainy_days = [day for day in forecast_days if any(word in day['weather'].lower() for word in ['rain', 'drizzle', 'shower'])]
-        rainy_count = len(rainy_days)
-        
-        # Extract number from query (e.g., "more than 3 times")
-        number_match = re.search(r'more than (\d+)', query_lower)
-        if number_match:
-            threshold = int(number_match.group(1))
-            if rainy_count > threshold:
-                return f"Yes, it will rain more than {threshold} times this week. I count {rainy_count} rainy days in the forecast."
-            else:
-                return f"No, it won't rain more than {threshold} times this week. I count {rainy_count} rainy days in the forecast."
-        else:
-            return f"There are {rainy_count} rainy days in the forecast this week."
-    
-    elif 'compare' in query_lower and 'last week' in query_lower:
+    elif intent == 'compare':
         return "I can't compare to last week's weather as I only have current forecast data. This feature would require historical weather data integration."
     
     else:
@@ -389,77 +936,329 @@ def process_advanced_chat_message(query, weather_data):
         else:
             return "I can help with weather information! Try asking about temperature, rain, outdoor activities, or packing suggestions."
 
+def resolve_chat_weather(data):
+    """Find the structured weather view for a /chat request
+    
+    Prefers the server's cached data for data['city']; the client-generated
+    text summary in data['weatherData'] is only parsed for older clients.
+    """
+    city = data.get('city')
+    if city:
+        city_data = weather_cache.get_city(canonical_location(city))
+        if city_data:
+            return build_chat_weather(city_data)
+    summary = data.get('weatherData')
+    if summary:
+        return parse_weather_summary(summary)
+    return None
+
+def start_llm_call(query, weather_summary, cache_ttl, on_chunk=None):
+    """Start a Gemini call on the bounded runner, or return None if it is saturated
+    
+    With on_chunk the reply is streamed and each piece of text is passed to it.
+    The finished answer is cached, including answers that arrive after the
+    caller gave up (future.abandoned) when LLM_CACHE_LATE_RESULTS is set.
+    """
+    prompt = build_prompt(query, weather_summary)
+    future = None
+    
+    def call():
+        started = time.perf_counter()
+        with STAGE_SECONDS.time('llm_call'):
+            if on_chunk is None:
+                text = gemini.generate_content(prompt).text
+            else:
+                chunks = []
+                for chunk in gemini.generate_content(prompt, stream=True):
+                    if chunk.text:
+                        chunks.append(chunk.text)
+                        on_chunk(chunk.text)
+                text = ''.join(chunks)
+        if LLM_CACHE_LATE_RESULTS or not getattr(future, 'abandoned', False):
+            llm_cache.set(query, weather_summary, text, time.perf_counter() - started, cache_ttl)
+        return text
+    
+    future = llm_runner.submit(call)
+    return future
+
+def chat_cache_ttl(data):
+    """How long an LLM answer for this request stays valid: as long as the weather it used"""
+    city = data.get('city')
+    if city:
+        location = canonical_location(city)
+        remaining = min(weather_cache.ttl_remaining(endpoint, location) for endpoint in WEATHER_ENDPOINTS)
+        if remaining > 0:
+            return remaining
+    return LLM_CACHE_DEFAULT_TTL
+
+def begin_chat(data):
+    """Validate a /chat request, then answer it from the cache or start its Gemini call
+    
+    Returns ((body, status), None) when the reply is already known. Otherwise
+    returns (None, pending); wait up to llm_runner.timeout for pending's
+    future and pass pending to finish_chat.
+    """
+    query = data.get('query', '')
+    weather = resolve_chat_weather(data)
+    
+    if not query:
+        return ({
+            'success': False,
+            'response': 'Please provide a query.'
+        }, 400), None
+    
+    if not gemini.configured:
+        logger.warning("Gemini is not configured; rejecting chat request")
+        return ({
+            'success': False,
+            'response': 'Gemini API is not configured. Please check your API key.'
+        }, 500), None
+    
+    logger.debug("Chat query: %.50s", query, extra={'city': data.get('city')})
+    
+    weather_summary = format_weather_summary(weather) if weather else 'No weather data available.'
+    
+    cached_response = llm_cache.get(query, weather_summary)
+    if cached_response is not None:
+        return ({
+            'success': True,
+            'response': cached_response,
+            'cached': True
+        }, 200), None
+    
+    # Generate response using Gemini, within the latency budget
+    future = start_llm_call(query, weather_summary, chat_cache_ttl(data))
+    if future is None:
+        logger.warning("Too many Gemini calls in flight, answering with rules", extra={'fallback': 'busy'})
+        return ({
+            'success': True,
+            'response': process_advanced_chat_message(query, weather),
+            'fallback': 'busy'
+        }, 200), None
+    return None, (query, weather, future)
+
+def finish_chat(pending):
+    """Build the (body, status) for a /chat call once Gemini finished or the budget ran out"""
+    query, weather, future = pending
+    if not future.done():
+        future.abandoned = True
+        llm_runner.record_timeout()
+        logger.warning("Gemini exceeded %ss, answering with rules", llm_runner.timeout, extra={'fallback': 'timeout'})
+        return {
+            'success': True,
+            'response': process_advanced_chat_message(query, weather),
+            'fallback': 'timeout'
+        }, 200
+    
+    gemini_error = future.exception()
+    if gemini_error is not None:
+        # Fallback to enhanced rule-based responses if Gemini fails
+        logger.warning("Gemini error: %s", gemini_error, extra={'fallback': 'error'})
+        return {
+            'success': False,
+            'response': process_advanced_chat_message(query, weather)
+        }, 200
+    
+    logger.debug("Gemini answered the chat query")
+    return {
+        'success': True,
+        'response': future.result()
+    }, 200
+
 @app.route('/chat', methods=['POST'])
 def chat_with_gemini():
-    """Handle chat requests using Gemini LLM"""
+    """Handle chat requests using Gemini LLM
+    
+    Body: {"query": "...", "city": "London"}. The legacy "weatherData" text
+    summary is still accepted when no cached city is given.
+    """
     try:
-        data = request.get_json()
-        query = data.get('query', '')
-        weather_data = data.get('weatherData', '')
+        reply, pending = begin_chat(request.get_json())
+        if pending is not None:
+            wait([pending[2]], timeout=llm_runner.timeout)
+            reply = finish_chat(pending)
+        body, status = reply
+        return jsonify(body), status
         
-        if not query:
-            return jsonify({
-                'success': False,
-                'response': 'Please provide a query.'
-            }), 400
-        
-        if not gemini_model:
-            print("Gemini model is not available")
-            return jsonify({
-                'success': False,
-                'response': 'Gemini API is not configured. Please check your API key.'
-            }), 500
-        
-        print(f"Attempting to use Gemini for query: {query[:50]}...")
-        
-        # Create context for Gemini
-        context = f"""
-        You are a helpful weather assistant. A user is asking about weather information.
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'response': f'Sorry, I encountered an error: {str(e)}'
+        }), 500
+
+def sse_event(event, data):
+    """Encode one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """Stream a chat answer as Server-Sent Events
+    
+    Body is the same as /chat. Events, in order:
+      provisional  {"response"}  instant rule-based answer
+      token        {"text"}      LLM output as it arrives (repeated)
+      error        {"response", "fallback"}  LLM failed; show fallback (the
+                   provisional answer) instead of any partial reply
+      done         {"cached", "ttft_ms", "total_ms"}
+    """
+    data = request.get_json(silent=True) or {}
+    query = data.get('query', '')
+    if not query:
+        return jsonify({
+            'success': False,
+            'response': 'Please provide a query.'
+        }), 400
+    weather = resolve_chat_weather(data)
+    cache_ttl = chat_cache_ttl(data)
+    
+    def generate():
+        started = time.perf_counter()
+        provisional = process_advanced_chat_message(query, weather)
+        yield sse_event('provisional', {'response': provisional})
         
-        Weather Data Summary:
-        {weather_data}
+        if not gemini.configured or not weather:
+            yield sse_event('done', {'cached': False, 'llm': False})
+            return
         
-        User Question: {query}
+        weather_summary = format_weather_summary(weather)
+        cached_response = llm_cache.get(query, weather_summary)
+        if cached_response is not None:
+            yield sse_event('token', {'text': cached_response})
+            yield sse_event('done', {'cached': True, 'llm': True})
+            return
         
-        Please provide a helpful, friendly, and concise response based on the weather data provided. 
-        Focus on being practical and actionable. If the weather data doesn't contain enough information 
-        to answer the question, politely say so.
+        # Gemini runs on the bounded LLM pool and hands chunks over through a queue
+        chunks = queue.Queue()
+        future = start_llm_call(query, weather_summary, cache_ttl, on_chunk=chunks.put)
+        if future is None:
+            yield sse_event('done', {'cached': False, 'llm': False, 'fallback': 'busy'})
+            return
+        finished = object()
+        future.add_done_callback(lambda _: chunks.put(finished))
         
-        Keep your response conversational and under 150 words.
-        """
+        ttft = None
+        while True:
+            try:
+                # The latency budget applies to the first token and to each gap after it
+                text = chunks.get(timeout=llm_runner.timeout)
+            except queue.Empty:
+                future.abandoned = True
+                llm_runner.record_timeout()
+                yield sse_event('error', {
+                    'response': 'The AI assistant is taking too long; showing the quick answer instead.',
+                    'fallback': provisional
+                })
+                return
+            if text is finished:
+                break
+            if ttft is None:
+                ttft = time.perf_counter() - started
+                llm_ttft.record(ttft)
+            yield sse_event('token', {'text': text})
         
-        # Generate response using Gemini
-        try:
-            print("Calling Gemini API...")
-            response = gemini_model.generate_content(context)
-            print("Gemini API call successful")
-            return jsonify({
-                'success': True,
-                'response': response.text
-            })
-        except Exception as gemini_error:
-            # Fallback to enhanced rule-based responses if Gemini fails
-            print(f"Gemini error: {gemini_error}")
-            return jsonify({
-                'success': False,
-                'response': process_advanced_chat_message(query, weather_data)
+        if future.exception() is not None:
+            logger.warning("Gemini streaming error: %s", future.exception(), extra={'fallback': 'error'})
+            yield sse_event('error', {
+                'response': 'The AI assistant is unavailable; showing the quick answer instead.',
+                'fallback': provisional
             })
+            return
         
-    except Exception as e:
-        return jsonify({
-            'success': False,
-            'response': f'Sorry, I encountered an error: {str(e)}'
-        }), 500
+        total = time.perf_counter() - started
+        yield sse_event('done', {
+            'cached': False,
+            'llm': True,
+            'ttft_ms': round(ttft * 1000, 1) if ttft is not None else None,
+            'total_ms': round(total * 1000, 1)
+        })
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
 
 @app.route('/api/cities')
 def get_cities():
-    """Get a list of popular cities for suggestions"""
-    cities = [
-        'London', 'New York', 'Tokyo', 'Paris', 'Sydney', 'Mumbai', 'Beijing',
-        'Berlin', 'Rome', 'Madrid', 'Amsterdam', 'Vienna', 'Prague', 'Budapest',
-        'Warsaw', 'Stockholm', 'Oslo', 'Copenhagen', 'Helsinki', 'Reykjavik'
+    """Get popular cities, or with ?q= the indexed cities matching a name prefix (autocomplete)"""
+    query = request.args.get('q')
+    if query is None:
+        return jsonify(POPULAR_CITIES)
+    limit = max(1, min(request.args.get('limit', 10, type=int), CITY_SUGGESTIONS_MAX))
+    response = jsonify([city.to_dict() for city in city_index.suggest(query, limit)])
+    # The index only changes with a deploy
+    response.cache_control.public = True
+    response.cache_control.max_age = 3600
+    return response
+
+@app.route('/api/llm/stats')
+def get_llm_stats():
+    """Report LLM response cache hit rate, latency saved and streaming time to first token"""
+    stats = llm_cache.stats()
+    stats['time_to_first_token'] = llm_ttft.summary()
+    stats['runner'] = llm_runner.stats()
+    stats['gemini'] = gemini.stats()
+    return jsonify(stats)
+
+@app.route('/api/prewarm/status')
+def get_prewarm_status():
+    """Report the background refresher's hot set, schedule and budget usage"""
+    return jsonify(prewarmer.status())
+
+def collect_component_metrics():
+    """Expose the counters the caches, upstream client, LLM runner and pre-warmer already keep"""
+    cache = weather_cache.stats()
+    yield 'weather_cache_lookups_total', 'counter', 'Weather cache lookups, by result', [
+        ({'result': 'hit'}, cache['lookups']['hits']),
+        ({'result': 'miss'}, cache['lookups']['misses']),
+    ]
+    yield 'weather_cache_entries', 'gauge', 'Entries held in the weather cache', [({}, cache.get('entries'))]
+    responses = response_bodies.stats()
+    yield 'weather_response_cache_lookups_total', 'counter', 'Encoded response body lookups, by result', [
+        ({'result': 'hit'}, responses['hits']),
+        ({'result': 'build'}, responses['builds']),
+    ]
+    yield 'weather_response_cache_bytes', 'gauge', 'Bytes of encoded response bodies held', [({}, responses['bytes'])]
+    yield from upstream_client_metrics(weather_client.stats(), 'sync')
+    llm = llm_cache.stats()
+    yield 'weather_llm_cache_lookups_total', 'counter', 'LLM answer cache lookups, by result', [
+        ({'result': 'exact_hit'}, llm.get('exact_hits')),
+        ({'result': 'near_duplicate_hit'}, llm.get('near_duplicate_hits')),
+        ({'result': 'miss'}, llm.get('misses')),
+    ]
+    runner = llm_runner.stats()
+    yield 'weather_llm_calls_total', 'counter', 'Gemini calls, by outcome', [
+        ({'outcome': outcome}, runner.get(outcome)) for outcome in ('completed', 'failed', 'rejected', 'timed_out')
+    ]
+    yield 'weather_llm_calls_in_flight', 'gauge', 'Gemini calls running now', [({}, runner.get('in_flight'))]
+    budget = prewarmer.status()['budget']
+    yield 'weather_prewarm_quota_used', 'gauge', 'OpenWeather calls the pre-warmer made today', [({}, budget['used_today'])]
+    yield 'weather_prewarm_quota_remaining', 'gauge', 'OpenWeather calls left in the pre-warmer budget today', [
+        ({}, budget['remaining_today'])
     ]
-    return jsonify(cities)
+
+def upstream_client_metrics(stats, client):
+    """Metric families for a WeatherClient or AsyncWeatherClient's stats()"""
+    labels = {'client': client}
+    yield 'weather_upstream_requests_total', 'counter', 'HTTP requests sent to OpenWeather, including retries', [
+        (labels, stats.get('requests'))
+    ]
+    yield 'weather_upstream_errors_total', 'counter', 'OpenWeather requests that failed (timeouts, connection errors, 429/5xx)', [(labels, stats.get('errors'))]
+    yield 'weather_upstream_retries_total', 'counter', 'OpenWeather requests retried', [(labels, stats.get('retries'))]
+    yield 'weather_upstream_short_circuited_total', 'counter', 'Requests refused by the open circuit breaker', [
+        (labels, stats.get('short_circuited'))
+    ]
+
+REGISTRY.register_collector(collect_component_metrics)
+
+@app.route('/metrics')
+def get_metrics():
+    """Expose request, stage timing, cache and upstream metrics in the Prometheus text format"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+def start_background_tasks():
+    """Start the cache pre-warmer (call once per serving process)"""
+    if PREWARM_ENABLED:
+        prewarmer.start()
 
 if __name__ == '__main__':
     # Create templates directory if it doesn't exist
@@ -474,4 +1273,7 @@ if __name__ == '__main__':
     print("\nStarting server...")
     print("Access the dashboard at: http://localhost:5000")
     
+    # With the reloader only the child process serves requests
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_tasks()
     app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
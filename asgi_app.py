@@ -0,0 +1,240 @@
+"""
+ASGI entry point that serves the I/O-bound endpoints natively on asyncio
+
+The weather lookups and /chat await OpenWeather and Gemini without holding a
+thread, so one process can keep thousands of upstream calls in flight. They
+share the cache, response builders and chat logic with app.py; every other
+route is the Flask app, mounted through asgiref's WSGI adapter.
+
+Run with: python run.py --mode asgi   (or: uvicorn asgi_app:application)
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+from urllib.parse import parse_qs
+
+import requests
+from asgiref.wsgi import WsgiToAsgi
+from werkzeug.datastructures import Headers
+
+import app as dashboard
+from metrics import REGISTRY, REQUEST_SECONDS, REQUESTS, STAGE_SECONDS, UPSTREAM_FETCHES
+from weather_cache import AsyncSingleFlight, city_key
+from weather_client import AsyncWeatherClient
+from weather_views import parse_fields
+
+# Upstream connections the event loop may hold open at once
+ASYNC_UPSTREAM_POOL_SIZE = int(os.getenv('ASYNC_UPSTREAM_POOL_SIZE', 1000))
+
+WEATHER_ROUTE_RE = re.compile(r'^/api/weather/(?P<city>[^/]+)(?P<daily>/daily)?$')
+
+
+class DashboardASGI:
+    """Route the async endpoints natively and everything else to the Flask app"""
+
+    def __init__(self, wsgi_app):
+        self.wsgi = WsgiToAsgi(wsgi_app)
+        self.client = None
+        self.flight = AsyncSingleFlight()
+        REGISTRY.register_collector(self.collect_metrics)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] == 'http':
+            route, handler = self.resolve(scope, receive)
+            if handler is not None:
+                await self.instrumented(route, scope['method'], handler, send)
+                return
+        await self.wsgi(scope, receive, send)
+
+    def resolve(self, scope, receive):
+        """Return (route, handler(send)) for a natively served request, or (None, None)
+
+        Routes are named after the Flask views they stand in for, so metrics
+        read the same in both serving modes.
+        """
+        path = scope['path']
+        method = scope['method']
+        match = WEATHER_ROUTE_RE.match(path)
+        if match and method == 'GET':
+            city = match.group('city')
+            if match.group('daily'):
+                return 'get_daily_weather', lambda send: self.weather(scope, send, city, True)
+            return 'get_weather_data', lambda send: self.weather(scope, send, city, False)
+        if path == '/chat' and method == 'POST':
+            return 'chat_with_gemini', lambda send: self.chat(receive, send)
+        if path == '/api/upstream/stats' and method == 'GET':
+            return 'get_upstream_stats', self.upstream_stats
+        return None, None
+
+    async def instrumented(self, route, method, handler, send):
+        """Run a native route, recording the same request metrics as the Flask routes"""
+        status = []
+
+        async def recording_send(message):
+            if message['type'] == 'http.response.start':
+                status.append(message['status'])
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await handler(recording_send)
+        finally:
+            REQUEST_SECONDS.observe(time.perf_counter() - started, route, method)
+            REQUESTS.inc(route, method, str(status[0] if status else 500))
+
+    def collect_metrics(self):
+        """Report the async upstream client's counters next to the sync client's"""
+        if self.client is not None:
+            yield from dashboard.upstream_client_metrics(self.client.stats(), 'async')
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # The client's connection pool belongs to the serving event loop
+                self.client = AsyncWeatherClient(
+                    dashboard.OPENWEATHER_BASE_URL,
+                    dashboard.OPENWEATHER_API_KEY,
+                    pool_size=ASYNC_UPSTREAM_POOL_SIZE,
+                    **dashboard.UPSTREAM_CLIENT_OPTIONS
+                )
+                dashboard.start_background_tasks()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.client.aclose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def weather(self, scope, send, city, daily):
+        """GET /api/weather/<city> and /api/weather/<city>/daily"""
+        query = parse_qs(scope['query_string'].decode('latin-1'))
+        fields = None
+        if not daily:
+            try:
+                fields = parse_fields((query.get('view') or [None])[0], (query.get('fields') or [None])[0])
+            except ValueError as e:
+                await send_json(send, {'success': False, 'error': str(e)}, 400)
+                return
+        location = dashboard.canonical_location(city)
+        refresh = dashboard.is_truthy((query.get('refresh') or [''])[0])
+        entries, errors, cache_hit = await self.fetch_weather(location, refresh)
+        if entries and not errors:
+            dashboard.prewarmer.record_request(location)
+        headers = Headers([(name.decode('latin-1'), value.decode('latin-1')) for name, value in scope['headers']])
+        body, status, response_headers = dashboard.weather_http_response(
+            'daily' if daily else 'weather', location, entries, errors, cache_hit, headers, fields, name=city
+        )
+        await send_response(send, body, status, response_headers)
+
+    async def fetch_weather(self, city, refresh=False):
+        """Async counterpart of app.fetch_weather, with the same (entries, errors, cache_hit) result"""
+        entries = {}
+        errors = {}
+
+        if not refresh:
+            with STAGE_SECONDS.time('cache_lookup'):
+                for endpoint in dashboard.WEATHER_ENDPOINTS:
+                    entry = dashboard.weather_cache.get(endpoint, city)
+                    if entry is not None:
+                        entries[endpoint] = entry
+
+        missing = [endpoint for endpoint in dashboard.WEATHER_ENDPOINTS if endpoint not in entries]
+        if not missing:
+            return entries, errors, True
+
+        deadline = time.monotonic() + dashboard.UPSTREAM_DEADLINE
+        tasks = {
+            endpoint: self.flight.run(
+                (endpoint, city_key(city)), self.load_endpoint, endpoint, city, deadline
+            )
+            for endpoint in missing
+        }
+        # asyncio.wait never cancels, so a caller giving up leaves shared loads running
+        await asyncio.wait(tasks.values(), timeout=max(0, deadline - time.monotonic()))
+        for endpoint, task in tasks.items():
+            if not task.done():
+                errors[endpoint] = 'Timed out waiting for OpenWeather'
+            elif isinstance(task.exception(), requests.exceptions.RequestException):
+                errors[endpoint] = dashboard.describe_upstream_error(task.exception())
+            else:
+                entries[endpoint] = task.result()
+
+        return entries, errors, False
+
+    async def load_endpoint(self, endpoint, city, deadline):
+        """Fetch an endpoint for a city without blocking the loop and store it in the cache"""
+        if dashboard.DEMO_MODE:
+            return dashboard.load_endpoint(endpoint, city)
+        try:
+            with STAGE_SECONDS.time(f'upstream_{endpoint}'):
+                payload, raw = await self.client.fetch(endpoint, dashboard.upstream_location(city), deadline)
+        except Exception:
+            UPSTREAM_FETCHES.inc(endpoint, 'error')
+            raise
+        UPSTREAM_FETCHES.inc(endpoint, 'ok')
+        if endpoint == 'forecast':
+            with STAGE_SECONDS.time('forecast_model'):
+                model = dashboard.build_forecast_model(payload)
+        else:
+            model = None
+        return dashboard.weather_cache.set(endpoint, city, payload, model, raw)
+
+    async def chat(self, receive, send):
+        """POST /chat: the Gemini call runs on the LLM pool while the loop awaits it"""
+        try:
+            data = json.loads(await read_body(receive))
+            reply, pending = dashboard.begin_chat(data)
+            if pending is not None:
+                await asyncio.wait(
+                    [asyncio.wrap_future(pending[2])], timeout=dashboard.llm_runner.timeout
+                )
+                reply = dashboard.finish_chat(pending)
+            body, status = reply
+        except Exception as e:
+            body, status = {
+                'success': False,
+                'response': f'Sorry, I encountered an error: {str(e)}'
+            }, 500
+        await send_json(send, body, status)
+
+    async def upstream_stats(self, send):
+        """GET /api/upstream/stats, including the async client's counters"""
+        stats = dashboard.weather_client.stats()
+        stats['single_flight'] = dashboard.weather_flight.stats()
+        stats['async'] = self.client.stats() if self.client else None
+        if stats['async'] is not None:
+            stats['async']['single_flight'] = self.flight.stats()
+        await send_json(send, stats)
+
+
+async def read_body(receive):
+    """Read a complete HTTP request body"""
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def send_response(send, body, status, headers):
+    """Send a complete response from body bytes and (name, value) header pairs"""
+    raw_headers = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+    if status != 304:
+        raw_headers.append((b'content-length', str(len(body)).encode()))
+    await send({'type': 'http.response.start', 'status': status, 'headers': raw_headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_json(send, body, status=200):
+    """Send a JSON response encoded the way Flask's jsonify does"""
+    await send_response(send, dashboard.encode_json(body), status, [('Content-Type', 'application/json')])
+
+
+application = DashboardASGI(dashboard.app)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark: serial vs concurrent fetch of the current and forecast endpoints
+
+Starts demo_data's stand-in OpenWeather API with a fixed per-call latency and
+compares issuing the two upstream calls one after the other (the old
+behaviour) against app.fetch_weather, which issues them concurrently.
+
+Usage: python3 benchmarks/bench_concurrent_fetch.py [--latency 0.08] [--requests 100]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from demo_data import start_stub_server
+
+
+def percentile(samples, pct):
+    """Return the pct-th percentile of samples"""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(label, fn, count):
+    """Time fn count times and print p50/p99 latency in milliseconds"""
+    samples = []
+    for i in range(count):
+        start = time.perf_counter()
+        fn(f'City{i}')
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"{label:<12} p50={percentile(samples, 50):7.1f} ms  "
+          f"p99={percentile(samples, 99):7.1f} ms  mean={statistics.mean(samples):7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.08, help='stub latency per call (seconds)')
+    parser.add_argument('--requests', type=int, default=100, help='requests per scenario')
+    args = parser.parse_args()
+
+    port = start_stub_server(latency=args.latency)
+
+    os.environ['OPENWEATHER_API_KEY'] = 'benchmark'
+    os.environ['OPENWEATHER_BASE_URL'] = f'http://127.0.0.1:{port}'
+    import app
+
+    def serial(city):
+        app.weather_client.fetch('current', city)
+        app.weather_client.fetch('forecast', city)
+
+    def concurrent(city):
+        app.fetch_weather(city, refresh=True)
+
+    print(f"Stub latency {args.latency * 1000:.0f} ms per call, {args.requests} requests each")
+    measure('serial', serial, args.requests)
+    measure('concurrent', concurrent, args.requests)
+
+
+if __name__ == '__main__':
+    main()
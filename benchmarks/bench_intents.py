@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: legacy substring cascade vs the compiled intent matcher
+
+Classifies a corpus of sample chatbot queries with the old chain of
+`any(word in message ...)` scans and with app.CHAT_INTENTS, and reports
+the time per query for each.
+
+Usage: python3 benchmarks/bench_intents.py [--rounds 2000]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+SAMPLE_QUERIES = [
+    "What's the temperature right now?",
+    "what is the highest temp this week",
+    "lowest temperature in the forecast?",
+    "average temp please",
+    "How humid is it today?",
+    "average humidity",
+    "What's the wind speed?",
+    "How is the weather?",
+    "current conditions",
+    "What's the visibility like?",
+    "Is it going to rain tomorrow?",
+    "any precipitation expected",
+    "Give me a summary",
+    "weather overview for the week",
+    "help",
+    "what can you do",
+    "Do I need sunglasses?",
+    "tell me something interesting about the sky today",
+]
+
+
+def legacy_intent(message):
+    """Classification performed by the original if/any cascade"""
+    if any(word in message for word in ['temperature', 'temp']):
+        if any(word in message for word in ['current', 'now']):
+            return 'temperature/current'
+        elif any(word in message for word in ['highest', 'max']):
+            return 'temperature/highest'
+        elif any(word in message for word in ['lowest', 'min']):
+            return 'temperature/lowest'
+        elif any(word in message for word in ['average', 'avg']):
+            return 'temperature/average'
+        return 'temperature'
+    if 'humidity' in message:
+        if any(word in message for word in ['current', 'now']):
+            return 'humidity/current'
+        elif any(word in message for word in ['average', 'avg']):
+            return 'humidity/average'
+        return 'humidity'
+    if 'wind' in message:
+        return 'wind'
+    if any(word in message for word in ['weather', 'condition']):
+        return 'condition'
+    if 'visibility' in message:
+        return 'visibility'
+    if any(word in message for word in ['rain', 'precipitation']):
+        return 'rain'
+    if any(word in message for word in ['summary', 'overview']):
+        return 'summary'
+    if any(word in message for word in ['help', 'what can you do']):
+        return 'help'
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=2000, help='passes over the corpus')
+    args = parser.parse_args()
+
+    import app
+    corpus = [query.lower() for query in SAMPLE_QUERIES]
+    matcher = app.CHAT_INTENTS
+
+    def run_legacy():
+        for query in corpus:
+            legacy_intent(query)
+
+    def run_compiled():
+        for query in corpus:
+            matcher.match(query)
+
+    # The same matcher with 200 extra intents registered: cost should not grow
+    from chat_intents import IntentMatcher
+    large = IntentMatcher()
+    for name, keywords in (('temperature', ['temperature', 'temp']), ('rain', ['rain'])):
+        large.add_intent(name, keywords)
+    for i in range(200):
+        large.add_intent(f'extra{i}', [f'keyword{i}', f'phrase number {i}'])
+
+    def run_compiled_large():
+        for query in corpus:
+            large.match(query)
+
+    queries = args.rounds * len(corpus)
+    for label, fn in (('legacy', run_legacy), ('compiled', run_compiled),
+                      ('compiled+200', run_compiled_large)):
+        seconds = min(timeit.repeat(fn, number=args.rounds, repeat=3))
+        print(f"{label:<13} {seconds / queries * 1e6:6.2f} us/query")
+
+    print("\nClassification differences (legacy -> compiled):")
+    for query in corpus:
+        intent, modifiers = matcher.match(query)
+        compiled = intent if not modifiers or intent not in ('temperature', 'humidity') else (
+            f"{intent}/{sorted(modifiers)[0]}"
+        )
+        if compiled != legacy_intent(query):
+            print(f"  {query!r}: {legacy_intent(query)} -> {compiled}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: JSON CPU per weather request, re-encoded vs pre-encoded
+
+Measures the CPU time spent turning cached snapshots into a
+/api/weather/<city> body: re-encoding the nested payloads on every request
+(what jsonify did), splicing the stored upstream bytes (a cache miss), and
+serving the body kept per snapshot (a cache hit). Also compares parsing an
+upstream forecast with the standard library and with json_codec's backend.
+
+Usage: python3 benchmarks/bench_json_encode.py [--rounds 2000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+def cpu_per_call(fn, rounds):
+    """Average CPU time of fn() in microseconds"""
+    started = time.process_time()
+    for _ in range(rounds):
+        fn()
+    return (time.process_time() - started) / rounds * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=2000, help='calls per measurement')
+    args = parser.parse_args()
+
+    import app
+    import json_codec
+
+    city = 'Benchmark'
+    entries, errors, _ = app.fetch_weather(city)
+    raw_forecast = entries['forecast']['raw']
+    headers = {}
+
+    def reencode():
+        body, _ = app.build_weather_response(city, entries, errors, True)
+        return app.encode_json(body)
+
+    def splice():
+        return app.encode_snapshot_response('weather', entries, True)
+
+    def cached():
+        return app.weather_http_response('weather', city, entries, errors, True, headers)
+
+    with app.app.app_context():
+        assert json.loads(reencode()) == json.loads(splice()) == json.loads(cached()[0])
+        print(f"Response body: {len(splice()) / 1024:.1f} KiB, JSON backend: {json_codec.BACKEND}\n")
+        print("CPU per request building the body:")
+        for label, fn in (('re-encode (jsonify)', reencode), ('splice raw bytes', splice),
+                          ('cached, with headers', cached)):
+            print(f"  {label:<22} {cpu_per_call(fn, args.rounds):8.1f} us")
+
+    print("\nCPU per upstream forecast parse:")
+    for label, fn in (('json.loads', lambda: json.loads(raw_forecast)),
+                      (f'json_codec ({json_codec.BACKEND})', lambda: json_codec.loads(raw_forecast))):
+        print(f"  {label:<22} {cpu_per_call(fn, args.rounds):8.1f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Load test: the dashboard API under a mixed, Zipf-distributed workload
+
+Runs the Flask app (threaded WSGI server) in a subprocess against demo_data's
+stand-in OpenWeather API and a stub Gemini model with a fixed latency, then
+replays a seeded sequence of /api/weather/<city>, /api/chatbot, /chat and
+/api/cities requests with --concurrency in flight. Cities are drawn from the
+/api/cities list with Zipf weights (rank^-s), so a few cities take most of
+the traffic, as with real users.
+
+Reports throughput and p50/p95/p99 latency per endpoint, then memory per
+cached city: the server's RSS growth and weather cache bytes after looking
+up --memory-cities new cities. Results are written as JSON (with the commit
+they were measured at); --compare prints the change against an earlier file.
+
+Usage: python3 benchmarks/bench_load.py [--requests 5000] [--concurrency 32]
+           [--mix weather=70,chatbot=15,chat=10,cities=5] [--zipf-s 1.1]
+           [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import aiohttp
+
+from bench_concurrent_fetch import percentile
+from bench_serving_modes import ROOT, free_port, launch, start_server
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+CHATBOT_MESSAGES = [
+    'what is the temperature', 'how humid is it', 'is it windy today',
+    'will it rain', 'give me a weather summary', 'what is the highest temperature',
+]
+CHAT_QUERIES = [
+    'Should I bring an umbrella?', 'What should I wear today?',
+    'Is it a good day for a run?', 'Will it be colder tomorrow?',
+]
+
+
+class StubModel:
+    """Stands in for Gemini's GenerativeModel, answering after a fixed delay"""
+
+    def __init__(self, latency, chunks=8):
+        self.latency = latency
+        self.chunks = chunks
+
+    def generate_content(self, prompt, stream=False):
+        text = f'Stub answer to a {len(prompt)}-character prompt.'
+        if not stream:
+            time.sleep(self.latency)
+            return SimpleNamespace(text=text)
+        return self._stream(text)
+
+    def _stream(self, text):
+        step = max(1, len(text) // self.chunks)
+        for start in range(0, len(text), step):
+            time.sleep(self.latency / self.chunks)
+            yield SimpleNamespace(text=text[start:start + step])
+
+
+def serve_app(port, llm_latency):
+    """Run the Flask app with the stub Gemini model (the benchmark's server subprocess)"""
+    sys.path.insert(0, ROOT)
+    from werkzeug.serving import run_simple
+    import app
+
+    # The provider loads its model lazily; handing it one skips the SDK entirely
+    app.gemini._model = StubModel(llm_latency)
+    run_simple('127.0.0.1', port, app.app, threaded=True)
+
+
+def zipf_weights(count, s):
+    """Weight of each rank (1..count) under a Zipf distribution with exponent s"""
+    return [1 / rank ** s for rank in range(1, count + 1)]
+
+
+def parse_mix(text):
+    """Parse 'weather=70,chat=10' into {'weather': 70.0, 'chat': 10.0}"""
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in ('weather', 'chatbot', 'chat', 'cities'):
+            raise argparse.ArgumentTypeError(f'unknown endpoint in mix: {name}')
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def build_workload(cities, total, mix, zipf_s, seed):
+    """Return a reproducible list of (endpoint, method, path, json body) requests"""
+    rng = random.Random(seed)
+    weights = zipf_weights(len(cities), zipf_s)
+    endpoints = rng.choices(list(mix), weights=list(mix.values()), k=total)
+    picked = rng.choices(cities, weights=weights, k=total)
+    workload = []
+    for endpoint, city in zip(endpoints, picked):
+        if endpoint == 'weather':
+            workload.append((endpoint, 'GET', f'/api/weather/{city}', None))
+        elif endpoint == 'chatbot':
+            workload.append((endpoint, 'POST', '/api/chatbot', {'message': rng.choice(CHATBOT_MESSAGES), 'city': city}))
+        elif endpoint == 'chat':
+            workload.append((endpoint, 'POST', '/chat', {'query': rng.choice(CHAT_QUERIES), 'city': city}))
+        else:
+            workload.append((endpoint, 'GET', '/api/cities', None))
+    return workload
+
+
+async def run_load(base_url, workload, concurrency):
+    """Replay workload with at most concurrency requests in flight
+
+    Returns ({endpoint: [latency ms]}, {endpoint: errors}, elapsed seconds).
+    """
+    latencies = {}
+    errors = {}
+    queue = iter(workload)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=60)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as client:
+        async def worker():
+            for endpoint, method, path, body in queue:
+                started = time.perf_counter()
+                try:
+                    async with client.request(method, base_url + path, json=body) as response:
+                        await response.read()
+                        failed = response.status >= 400
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    failed = True
+                latencies.setdefault(endpoint, []).append((time.perf_counter() - started) * 1000)
+                if failed:
+                    errors[endpoint] = errors.get(endpoint, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+def summarize(samples, errors, elapsed):
+    """Throughput and latency percentiles for one set of samples"""
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'throughput_rps': round(len(samples) / elapsed, 1),
+        'mean_ms': round(statistics.mean(samples), 2),
+        'p50_ms': round(percentile(samples, 50), 2),
+        'p95_ms': round(percentile(samples, 95), 2),
+        'p99_ms': round(percentile(samples, 99), 2),
+    }
+
+
+def rss_bytes(pid):
+    """Resident set size of a process (Linux /proc), or None where unavailable"""
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+async def get_json(base_url, path):
+    async with aiohttp.ClientSession() as client:
+        async with client.get(base_url + path) as response:
+            return await response.json()
+
+
+async def measure_memory(base_url, pid, count, concurrency):
+    """Look up count new cities twice; return the server's RSS and cache growth per city
+
+    The first lookup fetches and caches the weather. Responses to fresh
+    fetches are not kept, so the second lookup, a cache hit, is the one that
+    stores the encoded response body.
+    """
+    before_rss = rss_bytes(pid)
+    before = await get_json(base_url, '/api/cache/stats')
+    workload = [('weather', 'GET', f'/api/weather/MemoryCity{i}', None) for i in range(count)]
+    await run_load(base_url, workload, concurrency)
+    await run_load(base_url, workload, concurrency)
+    after_rss = rss_bytes(pid)
+    after = await get_json(base_url, '/api/cache/stats')
+    rss_growth = after_rss - before_rss if before_rss is not None and after_rss is not None else None
+    cache_growth = after['bytes'] - before['bytes'] + after['responses']['bytes'] - before['responses']['bytes']
+    return {
+        'cities': count,
+        'rss_bytes_per_city': round(rss_growth / count) if rss_growth is not None else None,
+        'cache_bytes_per_city': round((after['bytes'] - before['bytes']) / count),
+        'cache_and_response_bytes_per_city': round(cache_growth / count),
+    }
+
+
+def git_commit():
+    """Current commit, marked -dirty when the tree has uncommitted changes"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ('-dirty' if dirty else '')
+
+
+def compare(baseline, results):
+    """Print throughput and latency changes against an earlier results file"""
+    print(f"\nCompared with {baseline.get('commit')} ({baseline.get('timestamp')}):")
+    rows = [('overall', baseline['overall'], results['overall'])]
+    rows += [(name, baseline['endpoints'][name], stats)
+             for name, stats in results['endpoints'].items() if name in baseline.get('endpoints', {})]
+    for name, old, new in rows:
+        changes = []
+        for key in ('throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms'):
+            if old.get(key):
+                changes.append(f"{key.split('_')[0]} {old[key]}→{new[key]} ({(new[key] - old[key]) / old[key]:+.0%})")
+        print(f"  {name:<8} " + '  '.join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=5000, help='requests in the measured run')
+    parser.add_argument('--concurrency', type=int, default=32, help='requests in flight')
+    parser.add_argument('--mix', type=parse_mix, default='weather=70,chatbot=15,chat=10,cities=5',
+                        help='relative weight of each endpoint')
+    parser.add_argument('--zipf-s', type=float, default=1.1, help='Zipf exponent (0 = uniform)')
+    parser.add_argument('--seed', type=int, default=42, help='seed for the request sequence')
+    parser.add_argument('--warmup', action='store_true', help='look every city up once before measuring')
+    parser.add_argument('--upstream-latency', type=float, default=0.05, help='stub OpenWeather latency (seconds)')
+    parser.add_argument('--llm-latency', type=float, default=0.5, help='stub Gemini latency (seconds)')
+    parser.add_argument('--memory-cities', type=int, default=200, help='new cities looked up to measure memory')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/load-<commit>.json)')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    parser.add_argument('--serve-app', type=int, metavar='PORT', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve_app:
+        serve_app(args.serve_app, args.llm_latency)
+        return
+
+    env = dict(os.environ)
+    stub_port = free_port()
+    stub = start_server('stub', stub_port, env, args.upstream_latency)
+    env.update({
+        'OPENWEATHER_API_KEY': 'benchmark',
+        'OPENWEATHER_BASE_URL': f'http://127.0.0.1:{stub_port}',
+        'GEMINI_API_KEY': 'benchmark',
+        'PREWARM_ENABLED': 'false',
+        'LOG_LEVEL': 'WARNING',
+    })
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    server = launch([sys.executable, os.path.abspath(__file__), '--serve-app', str(port),
+                     '--llm-latency', str(args.llm_latency)], port, env, 'app')
+    try:
+        cities = asyncio.run(get_json(base_url, '/api/cities'))
+        workload = build_workload(cities, args.requests, args.mix, args.zipf_s, args.seed)
+        if args.warmup:
+            asyncio.run(run_load(base_url, [('weather', 'GET', f'/api/weather/{city}', None) for city in cities],
+                                 args.concurrency))
+        print(f"{args.requests} requests, {args.concurrency} concurrent, Zipf s={args.zipf_s} over "
+              f"{len(cities)} cities; stub latency {args.upstream_latency * 1000:.0f} ms upstream, "
+              f"{args.llm_latency * 1000:.0f} ms LLM")
+
+        latencies, errors, elapsed = asyncio.run(run_load(base_url, workload, args.concurrency))
+        cache = asyncio.run(get_json(base_url, '/api/cache/stats'))
+        llm = asyncio.run(get_json(base_url, '/api/llm/stats'))
+        memory = asyncio.run(measure_memory(base_url, server.pid, args.memory_cities, args.concurrency))
+    finally:
+        server.terminate()
+        server.wait()
+        stub.terminate()
+        stub.wait()
+
+    every = [sample for samples in latencies.values() for sample in samples]
+    results = {
+        'benchmark': 'load',
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'serve_app')},
+        'overall': summarize(every, sum(errors.values()), elapsed),
+        'endpoints': {name: summarize(samples, errors.get(name, 0), elapsed)
+                      for name, samples in sorted(latencies.items())},
+        'cache_hit_rate': cache.get('hit_rate'),
+        'llm_cache_hit_rate': llm.get('hit_rate'),
+        'memory': memory,
+    }
+
+    for name, stats in [('overall', results['overall'])] + list(results['endpoints'].items()):
+        print(f"{name:<8} {stats['requests']:6d} req {stats['throughput_rps']:8.1f} req/s  "
+              f"p50={stats['p50_ms']:7.1f} ms  p95={stats['p95_ms']:7.1f} ms  p99={stats['p99_ms']:7.1f} ms  "
+              f"errors={stats['errors']}")
+    print(f"cache hit rate {results['cache_hit_rate']}, LLM cache hit rate {results['llm_cache_hit_rate']}")
+    rss = memory['rss_bytes_per_city']
+    print(f"memory per cached city: {rss / 1024:.1f} KiB RSS, " if rss is not None else "memory per cached city: ",
+          end='')
+    print(f"{memory['cache_bytes_per_city'] / 1024:.1f} KiB weather cache, "
+          f"{memory['cache_and_response_bytes_per_city'] / 1024:.1f} KiB with encoded responses")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{results['commit'] or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Load test: threaded WSGI serving vs the asyncio ASGI mode
+
+Starts demo_data's stand-in OpenWeather API with a fixed per-call latency,
+then runs the dashboard in each mode as a subprocess and fires --requests weather lookups
+for distinct cities (every one a cache miss) with --concurrency in flight.
+The WSGI mode is bounded by its upstream thread pool (UPSTREAM_WORKERS);
+the ASGI mode awaits upstream calls on the event loop.
+
+Usage: python3 benchmarks/bench_serving_modes.py [--latency 0.2] [--requests 2000] [--concurrency 500]
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+import aiohttp
+
+from bench_concurrent_fetch import percentile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+WSGI_SERVER = (
+    "import sys; from werkzeug.serving import run_simple; from app import app; "
+    "run_simple('127.0.0.1', int(sys.argv[1]), app, threaded=True)"
+)
+
+
+def free_port():
+    """Return a TCP port that is free right now"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode, port, env, latency=0.0):
+    """Launch the dashboard (or, for mode 'stub', demo_data's stand-in API) and wait until it answers"""
+    if mode == 'stub':
+        command = [sys.executable, 'demo_data.py', '--serve', '--port', str(port), '--latency', str(latency)]
+    elif mode == 'asgi':
+        command = [sys.executable, '-m', 'uvicorn', 'asgi_app:application',
+                   '--port', str(port), '--log-level', 'warning', '--no-access-log']
+    else:
+        command = [sys.executable, '-c', WSGI_SERVER, str(port)]
+    return launch(command, port, env, mode)
+
+
+def launch(command, port, env, name='server'):
+    """Run command from the repository root and wait until it accepts connections on port"""
+    process = subprocess.Popen(command, cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f'{name} server did not start')
+
+
+async def load(port, total, concurrency):
+    """Issue total lookups with at most concurrency in flight; return latencies and errors"""
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=60)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as client:
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                started = time.perf_counter()
+                try:
+                    async with client.get(f'http://127.0.0.1:{port}/api/weather/City{i}') as response:
+                        await response.read()
+                        if response.status != 200:
+                            errors += 1
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    errors += 1
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.2, help='stub latency per call (seconds)')
+    parser.add_argument('--requests', type=int, default=2000, help='lookups per mode')
+    parser.add_argument('--concurrency', type=int, default=500, help='lookups in flight')
+    parser.add_argument('--upstream-workers', type=int, default=16,
+                        help='UPSTREAM_WORKERS for the WSGI mode')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.pop('GEMINI_API_KEY', None)
+    stub_port = free_port()
+    stub = start_server('stub', stub_port, env, args.latency)
+    env.update({
+        'OPENWEATHER_API_KEY': 'benchmark',
+        'OPENWEATHER_BASE_URL': f'http://127.0.0.1:{stub_port}',
+        'PREWARM_ENABLED': 'false',
+        'UPSTREAM_WORKERS': str(args.upstream_workers),
+        'UPSTREAM_POOL_SIZE': str(args.upstream_workers),
+        'CACHE_MAX_ENTRIES': str(args.requests * 4),
+        'CACHE_MAX_BYTES': str(1024 ** 3),
+    })
+
+    print(f"Stub latency {args.latency * 1000:.0f} ms per call, {args.requests} lookups, "
+          f"{args.concurrency} concurrent")
+    try:
+        for mode in ('wsgi', 'asgi'):
+            port = free_port()
+            process = start_server(mode, port, env)
+            try:
+                started = time.perf_counter()
+                latencies, errors = asyncio.run(load(port, args.requests, args.concurrency))
+                elapsed = time.perf_counter() - started
+            finally:
+                process.terminate()
+                process.wait()
+            print(f"{mode:<5} {args.requests / elapsed:8.1f} req/s  "
+                  f"p50={percentile(latencies, 50):8.1f} ms  p99={percentile(latencies, 99):8.1f} ms  "
+                  f"errors={errors}")
+    finally:
+        stub.terminate()
+        stub.wait()
+
+if __name__ == '__main__':
+    main()
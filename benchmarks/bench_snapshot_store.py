@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark: app startup and first read against persistent weather snapshots
+
+Fills a SQLite snapshot store with --sizes entries, then starts a fresh
+Python process for each size that imports the app with WEATHER_STORE
+pointing at the file and reads one city. Startup should stay flat as the
+store grows, because entries are only read when a city is requested. Also
+reports the encoded size of a forecast with and without compression.
+
+Usage: python3 benchmarks/bench_snapshot_store.py [--sizes 0 1000 10000 50000]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from demo_data import get_demo_current_weather, get_demo_forecast
+from weather_cache import WeatherCache
+from weather_store import SQLiteStore
+
+STARTUP_PROBE = """
+import time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+city = app.weather_cache.get_city('City0')
+read = time.perf_counter()
+print(round((imported - started) * 1000, 1), round((read - imported) * 1000, 2), city is not None)
+"""
+
+
+def fill(path, count):
+    """Write count cities (current + forecast) to a snapshot store at path"""
+    store = SQLiteStore(path, max_entries=count * 2 + 1)
+    cache = WeatherCache(store=store, max_entries=16)
+    current = get_demo_current_weather('City')
+    forecast = get_demo_forecast('City')
+    db = store._db()
+    db.execute('BEGIN')
+    for i in range(count):
+        cache.set('current', f'City{i}', current)
+        cache.set('forecast', f'City{i}', forecast)
+    db.execute('COMMIT')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[0, 1000, 10000, 50000],
+                        help='cities stored before each startup')
+    args = parser.parse_args()
+
+    raw = json.dumps(get_demo_forecast('City'), separators=(',', ':')).encode()
+    print(f"demo forecast record: {len(raw)} bytes as JSON, {len(zlib.compress(raw, 6))} bytes compressed\n")
+
+    env = dict(os.environ, PREWARM_ENABLED='false')
+    env.pop('GEMINI_API_KEY', None)
+    print(f"{'cities':>8} {'file MB':>8} {'import ms':>10} {'first read ms':>14}")
+    for count in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'weather.db')
+            fill(path, count)
+            env['WEATHER_STORE'] = f'sqlite:///{path}'
+            env['WEATHER_STORE_MAX_ENTRIES'] = str(count * 2 + 1)
+            output = subprocess.run(
+                [sys.executable, '-c', STARTUP_PROBE], cwd=ROOT, env=env,
+                capture_output=True, text=True, check=True
+            ).stdout.split()
+            imported_ms, read_ms, found = output[-3:]
+            size = sum(os.path.getsize(path + suffix) for suffix in ('', '-wal')
+                       if os.path.exists(path + suffix)) / 1024 / 1024
+            print(f"{count:>8} {size:>8.1f} {imported_ms:>10} {read_ms:>14}  found={found}")
+
+
+if __name__ == '__main__':
+    main()
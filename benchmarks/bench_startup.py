@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark: worker cold start, with an import time breakdown
+
+Imports the app in fresh Python processes (as every gunicorn/uvicorn worker
+does) and reports the median wall time, with and without google.generativeai
+and aiohttp imported up front (the app now loads them on the first chat and
+when the ASGI client is created). One run under `python -X importtime`
+breaks the app's import down by the modules it imports directly.
+
+Usage: python3 benchmarks/bench_startup.py [--runs 5] [--top 12]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+IMPORT_PROBE = """
+import time
+started = time.perf_counter()
+{preload}
+import app
+print((time.perf_counter() - started) * 1000)
+"""
+
+
+def import_ms(env, preload=''):
+    """Wall time of `import app` in a fresh interpreter, in milliseconds"""
+    output = subprocess.run(
+        [sys.executable, '-c', IMPORT_PROBE.format(preload=preload)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def import_breakdown(env):
+    """Return (module, cumulative ms) for each module app imports directly, plus app's total"""
+    stderr = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stderr
+    rows = []
+    total = None
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Direct imports of app are indented one level (two spaces) under it
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        if name.strip() == 'app' and depth == 0:
+            total = int(cumulative) / 1000
+        elif depth == 1:
+            rows.append((name.strip(), int(cumulative) / 1000))
+    return sorted(rows, key=lambda row: -row[1]), total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='fresh processes per measurement')
+    parser.add_argument('--top', type=int, default=12, help='modules listed in the breakdown')
+    args = parser.parse_args()
+
+    # A key makes the app set up its Gemini client, as in production
+    env = dict(os.environ, GEMINI_API_KEY='benchmark', PREWARM_ENABLED='false')
+
+    lazy = [import_ms(env) for _ in range(args.runs)]
+    eager = [import_ms(env, 'import google.generativeai, aiohttp') for _ in range(args.runs)]
+    print(f"import app, SDKs loaded lazily:   {statistics.median(lazy):7.1f} ms (median of {args.runs})")
+    print(f"import app, SDKs imported eagerly: {statistics.median(eager):7.1f} ms")
+
+    rows, total = import_breakdown(env)
+    print(f"\nImport breakdown (-X importtime, app total {total:.1f} ms, cumulative per direct import):")
+    for name, ms in rows[:args.top]:
+        print(f"  {name:<32} {ms:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
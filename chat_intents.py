@@ -0,0 +1,112 @@
+"""
+Keyword-driven intent matching for the rule-based chatbot
+
+Keywords (single words or multi-word phrases) are compiled once into a token
+lookup table, so classifying a message is a single pass over its tokens no
+matter how many intents are registered. A keyword word matches any word it
+starts, so "rain" also catches "rainfall" and "rainy" and "temperature"
+catches "temperatures", but "now" does not match inside "know".
+"""
+
+import re
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(message):
+    """Split a message into lowercase word tokens"""
+    return TOKEN_RE.findall(message.lower())
+
+
+class IntentMatcher:
+    """Map a message to its highest priority intent plus any modifiers it mentions
+
+    Intents are ranked by registration order (earlier wins). Modifiers are
+    qualifiers such as "current" or "highest" that responders can branch on.
+    """
+
+    MAX_CACHED_WORDS = 10000
+
+    def __init__(self):
+        # first token -> [(remaining tokens, kind, name)], longest phrase first
+        self._table = {}
+        self._priority = {}
+        self._prefixes = set()  # every prefix of a first token, to stop scanning a word early
+        self._word_keys = {}  # message word -> table keys it starts with, shortest first
+
+    def add_intent(self, name, keywords):
+        """Register an intent triggered by any of keywords"""
+        self._priority[name] = len(self._priority)
+        self._add(keywords, 'intent', name)
+        return self
+
+    def add_modifier(self, name, keywords):
+        """Register a modifier flagged by any of keywords"""
+        self._add(keywords, 'modifier', name)
+        return self
+
+    def _add(self, keywords, kind, name):
+        for keyword in keywords:
+            tokens = tuple(tokenize(keyword))
+            entries = self._table.setdefault(tokens[0], [])
+            entries.append((tokens[1:], kind, name))
+            entries.sort(key=lambda entry: -len(entry[0]))
+            self._prefixes.update(tokens[0][:end] for end in range(1, len(tokens[0]) + 1))
+        self._word_keys.clear()
+
+    def match(self, message):
+        """Return (intent or None, frozenset of modifiers) for a message"""
+        tokens = tokenize(message)
+        best = None
+        modifiers = set()
+        for i, token in enumerate(tokens):
+            keys = self._word_keys.get(token)
+            if keys is None:
+                keys = self._keys_for(token)
+            for key in keys:
+                for rest, kind, name in self._table[key]:
+                    if rest and not self._follows(tokens, i + 1, rest):
+                        continue
+                    if kind == 'modifier':
+                        modifiers.add(name)
+                    elif best is None or self._priority[name] < self._priority[best]:
+                        best = name
+        return best, frozenset(modifiers)
+
+    def _keys_for(self, word):
+        """Table keys a message word starts with, worked out once per distinct word"""
+        keys = []
+        for end in range(1, len(word) + 1):
+            if word[:end] not in self._prefixes:
+                break
+            if word[:end] in self._table:
+                keys.append(word[:end])
+        if len(self._word_keys) >= self.MAX_CACHED_WORDS:
+            self._word_keys.clear()
+        keys = self._word_keys[word] = tuple(keys)
+        return keys
+
+    @staticmethod
+    def _follows(tokens, start, rest):
+        """Whether the words from start begin with the remaining words of a phrase"""
+        following = tokens[start:start + len(rest)]
+        return len(following) == len(rest) and all(map(str.startswith, following, rest))
+
+
+class ResponderRegistry:
+    """Table of intent name -> response function"""
+
+    def __init__(self, default):
+        self.default = default
+        self._responders = {}
+
+    def register(self, intent):
+        """Decorator registering the responder for an intent"""
+        def decorator(fn):
+            self._responders[intent] = fn
+            return fn
+        return decorator
+
+    def respond(self, intent, *args):
+        """Call the responder for intent (or the default) with args"""
+        return self._responders.get(intent, self.default)(*args)
@@ -0,0 +1,179 @@
+"""
+Bundled city index: canonical IDs, coordinates and name autocomplete
+
+data/cities.tsv lists about 150 cities with their country, coordinates,
+population and other names. However a known city is typed ("london",
+"London ", "London,GB", "Bombay" for Mumbai), it resolves to one City whose
+canonical ID (e.g. "london-gb") keys the caches and whose coordinates are
+what OpenWeather is asked for. The index is built in memory on first use:
+a dict for exact names and a sorted list of name keys that prefix searches
+bisect into.
+"""
+
+import bisect
+import math
+import os
+import re
+import unicodedata
+from functools import lru_cache
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'cities.tsv')
+
+# A "lat,lon" location rather than a name
+COORDINATES_RE = re.compile(r'^\s*(-?\d{1,2}(?:\.\d+)?)\s*,\s*(-?\d{1,3}(?:\.\d+)?)\s*$')
+
+# Country names users write instead of the ISO code
+COUNTRY_ALIASES = {'uk': 'gb', 'usa': 'us'}
+
+_SEPARATORS_RE = re.compile(r'[\W_]+')
+
+
+def normalize_name(text):
+    """Fold case, accents, punctuation and spacing: ' São  Paulo ' -> 'sao paulo'"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    stripped = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(_SEPARATORS_RE.sub(' ', stripped.casefold()).split())
+
+
+class City:
+    """One indexed city"""
+
+    __slots__ = ('id', 'name', 'country', 'lat', 'lon', 'population', 'aliases')
+
+    def __init__(self, name, country, lat, lon, population=0, aliases=()):
+        self.id = f"{normalize_name(name).replace(' ', '-')}-{country.lower()}"
+        self.name = name
+        self.country = country
+        self.lat = lat
+        self.lon = lon
+        self.population = population
+        self.aliases = tuple(aliases)
+
+    @property
+    def label(self):
+        return f'{self.name}, {self.country}'
+
+    @property
+    def coordinates(self):
+        """The "lat,lon" location string sent upstream instead of the name"""
+        return f'{self.lat:.4f},{self.lon:.4f}'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'country': self.country,
+            'label': self.label,
+            'lat': self.lat,
+            'lon': self.lon,
+        }
+
+
+class CityIndex:
+    """Exact resolution and prefix search over a list of cities"""
+
+    def __init__(self, cities):
+        # Most populous first: it wins ambiguous names and leads suggestions
+        self.cities = sorted(cities, key=lambda city: -city.population)
+        self._by_id = {city.id: city for city in self.cities}
+        self._by_name = {}
+        prefix_keys = set()
+        for rank, city in enumerate(self.cities):
+            for name in (city.name,) + city.aliases:
+                key = normalize_name(name)
+                matches = self._by_name.setdefault(key, [])
+                if city not in matches:
+                    matches.append(city)
+                # Every word can start a match, so "york" suggests New York
+                words = key.split()
+                prefix_keys.update((' '.join(words[i:]), rank) for i in range(len(words)))
+        self._prefix_keys = sorted(prefix_keys)
+
+    def __len__(self):
+        return len(self.cities)
+
+    def get(self, city_id):
+        """Return the City with a canonical ID, or None"""
+        return self._by_id.get(city_id)
+
+    def resolve(self, query):
+        """Return the City a name, alias, "Name,CC" or canonical ID refers to, or None
+
+        Names without a country pick the most populous match. Anything the
+        index cannot place for certain (coordinates, unknown names, a state
+        or an unknown country after the name) returns None.
+        """
+        city = self._by_id.get(query.strip().lower())
+        if city is not None:
+            return city
+        parts = query.split(',')
+        if len(parts) > 2:
+            return None
+        matches = self._by_name.get(normalize_name(parts[0]))
+        if not matches:
+            return None
+        if len(parts) == 1:
+            return matches[0]
+        country = normalize_name(parts[1])
+        country = COUNTRY_ALIASES.get(country, country)
+        for city in matches:
+            if city.country.lower() == country:
+                return city
+        return None
+
+    def suggest(self, query, limit=10):
+        """Cities with a name or alias word starting with query, most populous first
+
+        "Name, C" narrows the suggestions to countries whose code starts with C.
+        """
+        name, _, country = query.partition(',')
+        prefix = normalize_name(name)
+        if not prefix:
+            return []
+        country = country.strip().upper()
+        start = bisect.bisect_left(self._prefix_keys, (prefix,))
+        ranks = set()
+        for key, rank in self._prefix_keys[start:]:
+            if not key.startswith(prefix):
+                break
+            ranks.add(rank)
+        matches = (self.cities[rank] for rank in sorted(ranks))
+        return [city for city in matches if city.country.startswith(country)][:limit]
+
+    def nearest(self, lat, lon, max_km=25):
+        """Return the indexed city closest to a point if it is within max_km, else None"""
+        best, best_km = None, max_km
+        for city in self.cities:
+            km = _distance_km(lat, lon, city.lat, city.lon)
+            if km <= best_km:
+                best, best_km = city, km
+        return best
+
+
+def _distance_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points (haversine)"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 6371 * 2 * math.asin(math.sqrt(a))
+
+
+@lru_cache(maxsize=4)
+def load_index(path=DATA_PATH):
+    """Build (once per path) the index of a cities file
+
+    Lines are tab-separated: name, country code, lat, lon, population in
+    thousands and ;-separated other names. Lines starting with # are skipped.
+    """
+    cities = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip() or line.startswith('#'):
+                continue
+            name, country, lat, lon, population, aliases = (line.rstrip('\n').split('\t') + [''] * 6)[:6]
+            cities.append(City(
+                name, country, float(lat), float(lon), int(population or 0) * 1000,
+                [alias for alias in aliases.split(';') if alias]
+            ))
+    return CityIndex(cities)
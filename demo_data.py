@@ -1,112 +1,392 @@
 """
-Demo weather data for testing the application without API key
+Synthetic weather data for demo mode, load tests and offline benchmarks
+
+Every city gets its own climate (coordinates, timezone, temperature range,
+humidity, how often it rains) seeded from its name, so the same city always
+looks the same and different cities differ. Cities in the city index keep
+their real name, country and coordinates, whether asked for by name,
+canonical ID or nearby coordinates. The weather of each 3-hour slot
+depends only on the city and the slot's time, so successive payloads agree
+with each other. Payloads follow the OpenWeather /weather and /forecast
+formats and are cached with their JSON bytes per time bucket (10 minutes for
+current conditions, one forecast slot for forecasts), so serving demo data
+costs a cache lookup rather than rebuilding 40 nested dicts.
+
+`python demo_data.py --serve` runs a stand-in OpenWeather API with
+configurable latency and error injection, so the real upstream path can be
+exercised and benchmarked offline (see --help).
 """
 
+import argparse
+import asyncio
+import hashlib
 import json
-from datetime import datetime, timedelta
+import math
+import os
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from urllib.parse import parse_qs, urlsplit
 
-def get_demo_current_weather(city):
-    """Return demo current weather data"""
+import json_codec
+from city_index import COORDINATES_RE, load_index
+from weather_cache import city_key
+
+# Change to get a different (but still deterministic) world
+DEMO_SEED = int(os.getenv('DEMO_SEED', 0))
+
+CURRENT_BUCKET = 10 * 60   # current conditions change every 10 minutes
+SLOT = 3 * 60 * 60         # forecast slot length
+FORECAST_SLOTS = 40        # 5 days of 3-hour slots
+
+# name -> (id, main, description, icon prefix)
+CONDITIONS = {
+    'clear': (800, 'Clear', 'clear sky', '01'),
+    'few': (801, 'Clouds', 'few clouds', '02'),
+    'scattered': (802, 'Clouds', 'scattered clouds', '03'),
+    'broken': (803, 'Clouds', 'broken clouds', '04'),
+    'mist': (701, 'Mist', 'mist', '50'),
+    'drizzle': (300, 'Drizzle', 'light intensity drizzle', '09'),
+    'rain': (500, 'Rain', 'light rain', '10'),
+    'heavy': (501, 'Rain', 'moderate rain', '10'),
+    'storm': (211, 'Thunderstorm', 'thunderstorm', '11'),
+    'snow': (600, 'Snow', 'light snow', '13'),
+}
+
+COUNTRIES = (
+    'GB', 'US', 'JP', 'FR', 'AU', 'IN', 'CN', 'DE', 'IT', 'ES', 'NL', 'AT', 'CZ',
+    'HU', 'PL', 'SE', 'NO', 'DK', 'FI', 'IS', 'BR', 'CA', 'MX', 'ZA', 'EG', 'AR'
+)
+
+
+class Climate:
+    """Fixed per-city parameters the synthetic weather is generated from"""
+
+    __slots__ = (
+        'seed', 'id', 'name', 'lat', 'lon', 'timezone', 'country', 'temp_mean',
+        'daily_range', 'humidity', 'wetness', 'wind', 'phase'
+    )
+
+    def __init__(self, city):
+        place = locate(city)
+        key = place.id if place else city_key(city)
+        digest = hashlib.sha1(f'{DEMO_SEED}:{key}'.encode('utf-8')).digest()
+        self.seed = int.from_bytes(digest[:8], 'big')
+        rng = random.Random(self.seed)
+        self.id = rng.randrange(100000, 9999999)
+        self.name = city
+        self.lat = round(rng.uniform(-55, 70), 2)
+        self.lon = round(rng.uniform(-180, 180), 2)
+        self.country = rng.choice(COUNTRIES)
+        if place:
+            self.name, self.country = place.name, place.country
+            self.lat, self.lon = place.lat, place.lon
+        self.timezone = round(self.lon / 15) * 3600
+        # Warmer towards the equator, with some spread between neighbours
+        self.temp_mean = 28 - abs(self.lat) * 0.45 + rng.uniform(-4, 4)
+        self.daily_range = rng.uniform(4, 12)
+        self.humidity = rng.uniform(35, 85)
+        self.wetness = rng.uniform(0.05, 0.45)
+        self.wind = rng.uniform(1.5, 7)
+        self.phase = rng.uniform(0, 2 * math.pi)
+
+
+def locate(city):
+    """The indexed city a demo location refers to, by name, canonical ID or coordinates"""
+    match = COORDINATES_RE.match(city)
+    if match:
+        return load_index().nearest(float(match.group(1)), float(match.group(2)))
+    return load_index().resolve(city)
+
+
+@lru_cache(maxsize=4096)
+def climate(city):
+    """Return the (cached) Climate of a city"""
+    return Climate(city)
+
+
+def _sample(clim, ts, bucket):
+    """Weather of a city at ts; the noise is fixed per (city, ts // bucket)"""
+    rng = random.Random(clim.seed ^ (ts // bucket) * 2654435761)
+    local_hours = ((ts + clim.timezone) % 86400) / 3600
+    days = ts / 86400
+    # Daily cycle peaking mid-afternoon, plus fronts passing over a few days
+    diurnal = clim.daily_range / 2 * math.sin((local_hours - 9) / 24 * 2 * math.pi)
+    front = 3 * math.sin(days / 2.3 + clim.phase)
+    temp = clim.temp_mean + diurnal + front + rng.gauss(0, 0.8)
+    wetness = min(0.95, max(0.0, clim.wetness + 0.2 * math.sin(days / 1.7 + clim.phase)))
+
+    draw = rng.random()
+    if draw < wetness:
+        share = draw / wetness
+        if temp < 1:
+            condition = 'snow'
+        elif share < 0.08:
+            condition = 'storm'
+        elif share < 0.35:
+            condition = 'heavy'
+        elif share < 0.75:
+            condition = 'rain'
+        else:
+            condition = 'drizzle'
+        pop = wetness + (1 - wetness) * rng.random() * 0.6
+    else:
+        share = (draw - wetness) / (1 - wetness)
+        condition = ('clear', 'few', 'scattered', 'broken', 'mist')[min(4, int(share ** 1.5 * 5))]
+        pop = wetness * rng.random() * 0.5
+    rainy = condition in ('drizzle', 'rain', 'heavy', 'storm', 'snow')
+
+    humidity = clim.humidity + (20 if rainy else 0) - diurnal * 2 + rng.uniform(-5, 5)
+    wind = clim.wind * (0.5 + rng.random()) * (1.6 if condition == 'storm' else 1)
     return {
-        "coord": {"lon": -0.13, "lat": 51.51},
-        "weather": [
-            {
-                "id": 800,
-                "main": "Clear",
-                "description": "clear sky",
-                "icon": "01d"
-            }
-        ],
-        "base": "stations",
-        "main": {
-            "temp": 22.5,
-            "feels_like": 21.8,
-            "temp_min": 18.2,
-            "temp_max": 26.1,
-            "pressure": 1013,
-            "humidity": 65
-        },
-        "visibility": 10000,
-        "wind": {
-            "speed": 3.6,
-            "deg": 280
-        },
-        "clouds": {"all": 0},
-        "dt": int(datetime.now().timestamp()),
-        "sys": {
-            "type": 2,
-            "id": 2075535,
-            "country": "GB",
-            "sunrise": int((datetime.now() - timedelta(hours=6)).timestamp()),
-            "sunset": int((datetime.now() + timedelta(hours=6)).timestamp())
+        'temp': round(temp, 2),
+        'feels_like': round(temp - wind * 0.3, 2),
+        'humidity': int(min(100, max(10, humidity))),
+        'pressure': int(1013 + 12 * math.sin(days / 2.3 + clim.phase + 1) - (8 if rainy else 0)),
+        'wind': round(wind, 2),
+        'wind_deg': rng.randrange(360),
+        'condition': condition,
+        'clouds': 0 if condition == 'clear' else rng.randrange(60, 100) if rainy else rng.randrange(10, 90),
+        'pop': round(min(1.0, pop), 2),
+        'visibility': 10000 if not rainy and condition != 'mist' else rng.randrange(2000, 8000, 100),
+        'daytime': 6 <= local_hours < 18,
+    }
+
+
+def _weather(sample):
+    condition_id, main, description, icon = CONDITIONS[sample['condition']]
+    return [{
+        'id': condition_id,
+        'main': main,
+        'description': description,
+        'icon': icon + ('d' if sample['daytime'] else 'n'),
+    }]
+
+
+def _sun(clim, ts):
+    """Approximate sunrise and sunset (06:00 and 18:00 local) of the local day containing ts"""
+    midnight = (ts + clim.timezone) // 86400 * 86400 - clim.timezone
+    return midnight + 6 * 3600, midnight + 18 * 3600
+
+
+@lru_cache(maxsize=1024)
+def _current(city, bucket):
+    clim = climate(city)
+    ts = bucket * CURRENT_BUCKET
+    sample = _sample(clim, ts, CURRENT_BUCKET)
+    sunrise, sunset = _sun(clim, ts)
+    payload = {
+        'coord': {'lon': clim.lon, 'lat': clim.lat},
+        'weather': _weather(sample),
+        'base': 'stations',
+        'main': {
+            'temp': sample['temp'],
+            'feels_like': sample['feels_like'],
+            'temp_min': round(sample['temp'] - 1.5, 2),
+            'temp_max': round(sample['temp'] + 1.5, 2),
+            'pressure': sample['pressure'],
+            'humidity': sample['humidity'],
         },
-        "timezone": 0,
-        "id": 2643743,
-        "name": city,
-        "cod": 200
+        'visibility': sample['visibility'],
+        'wind': {'speed': sample['wind'], 'deg': sample['wind_deg']},
+        'clouds': {'all': sample['clouds']},
+        'dt': ts,
+        'sys': {'country': clim.country, 'sunrise': sunrise, 'sunset': sunset},
+        'timezone': clim.timezone,
+        'id': clim.id,
+        'name': clim.name,
+        'cod': 200,
     }
+    return payload, json_codec.dumps(payload)
 
-def get_demo_forecast(city):
-    """Return demo 5-day forecast data"""
-    forecast_list = []
-    base_time = datetime.now()
-    
-    for i in range(40):  # 5 days * 8 intervals per day
-        time = base_time + timedelta(hours=3*i)
-        temp = 20 + (i % 10) - 5  # Varying temperature
-        
-        forecast_list.append({
-            "dt": int(time.timestamp()),
-            "main": {
-                "temp": temp,
-                "feels_like": temp - 1,
-                "temp_min": temp - 3,
-                "temp_max": temp + 3,
-                "pressure": 1013,
-                "sea_level": 1013,
-                "grnd_level": 1010,
-                "humidity": 60 + (i % 20),
-                "temp_kf": 0
-            },
-            "weather": [
-                {
-                    "id": 800 if i % 3 == 0 else 300,
-                    "main": "Clear" if i % 3 == 0 else "Drizzle",
-                    "description": "clear sky" if i % 3 == 0 else "light intensity drizzle",
-                    "icon": "01d" if i % 3 == 0 else "09d"
-                }
-            ],
-            "clouds": {"all": 0 if i % 3 == 0 else 40},
-            "wind": {
-                "speed": 2.5 + (i % 3),
-                "deg": 280 + (i % 40)
+
+@lru_cache(maxsize=1024)
+def _forecast(city, bucket):
+    clim = climate(city)
+    # Like OpenWeather, the list starts at the next slot boundary
+    times = [(bucket + i + 1) * SLOT for i in range(FORECAST_SLOTS)]
+    slots = []
+    for ts, sample in zip(times, [_sample(clim, ts, SLOT) for ts in times]):
+        slots.append({
+            'dt': ts,
+            'main': {
+                'temp': sample['temp'],
+                'feels_like': sample['feels_like'],
+                'temp_min': sample['temp'],
+                'temp_max': sample['temp'],
+                'pressure': sample['pressure'],
+                'sea_level': sample['pressure'],
+                'grnd_level': sample['pressure'] - 3,
+                'humidity': sample['humidity'],
+                'temp_kf': 0,
             },
-            "visibility": 10000,
-            "pop": 0.1 if i % 3 != 0 else 0,
-            "sys": {"pod": "d" if 6 <= time.hour <= 18 else "n"},
-            "dt_txt": time.strftime("%Y-%m-%d %H:%M:%S")
+            'weather': _weather(sample),
+            'clouds': {'all': sample['clouds']},
+            'wind': {'speed': sample['wind'], 'deg': sample['wind_deg']},
+            'visibility': sample['visibility'],
+            'pop': sample['pop'],
+            'sys': {'pod': 'd' if sample['daytime'] else 'n'},
+            'dt_txt': datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),
         })
-    
-    return {
-        "cod": "200",
-        "message": 0,
-        "cnt": 40,
-        "list": forecast_list,
-        "city": {
-            "id": 2643743,
-            "name": city,
-            "coord": {"lat": 51.51, "lon": -0.13},
-            "country": "GB",
-            "population": 1000000,
-            "timezone": 0,
-            "sunrise": int((base_time - timedelta(hours=6)).timestamp()),
-            "sunset": int((base_time + timedelta(hours=6)).timestamp())
-        }
+    sunrise, sunset = _sun(clim, times[0])
+    payload = {
+        'cod': '200',
+        'message': 0,
+        'cnt': FORECAST_SLOTS,
+        'list': slots,
+        'city': {
+            'id': clim.id,
+            'name': clim.name,
+            'coord': {'lat': clim.lat, 'lon': clim.lon},
+            'country': clim.country,
+            'population': 1000000,
+            'timezone': clim.timezone,
+            'sunrise': sunrise,
+            'sunset': sunset,
+        },
     }
+    return payload, json_codec.dumps(payload)
+
+
+def demo_payload(endpoint, city, now=None):
+    """Return (payload, raw JSON bytes) for 'current' or 'forecast', like WeatherClient.fetch
+
+    Payloads are shared between callers until their time bucket ends and
+    must not be modified.
+    """
+    now = int(time.time() if now is None else now)
+    if endpoint == 'current':
+        return _current(city, now // CURRENT_BUCKET)
+    return _forecast(city, now // SLOT)
+
+
+def get_demo_current_weather(city):
+    """Return demo current weather data"""
+    return demo_payload('current', city)[0]
+
+
+def get_demo_forecast(city):
+    """Return demo 5-day forecast data"""
+    return demo_payload('forecast', city)[0]
+
 
 def get_demo_weather_data(city):
     """Return complete demo weather data for a city"""
     return {
         'current': get_demo_current_weather(city),
         'forecast': get_demo_forecast(city)
-    } 
\ No newline at end of file
+    }
+
+
+# OpenWeather API paths the stub answers, by last path segment
+STUB_ENDPOINTS = {
+    'weather': 'current',
+    'forecast': 'forecast',
+}
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 429: 'Too Many Requests',
+               500: 'Internal Server Error', 502: 'Bad Gateway', 503: 'Service Unavailable',
+               504: 'Gateway Timeout'}
+
+
+def stub_response(target, rng, error_rate=0.0, error_status=503):
+    """Return (status, body bytes, extra headers) for a GET of target on the stub API"""
+    url = urlsplit(target)
+    endpoint = STUB_ENDPOINTS.get(url.path.rstrip('/').rsplit('/', 1)[-1])
+    if endpoint is None:
+        return 404, b'{"cod":"404","message":"Internal error"}', []
+    if error_rate and rng.random() < error_rate:
+        headers = [('Retry-After', '1')] if error_status == 429 else []
+        return error_status, b'{"cod":%d,"message":"injected error"}' % error_status, headers
+    query = parse_qs(url.query)
+    if 'q' in query:
+        city = query['q'][0]
+    elif 'lat' in query and 'lon' in query:
+        city = f"{query['lat'][0]},{query['lon'][0]}"
+    else:
+        return 400, b'{"cod":"400","message":"Nothing to geocode"}', []
+    return 200, demo_payload(endpoint, city)[1], []
+
+
+async def serve_stub(host='127.0.0.1', port=8001, latency=0.0, jitter=0.0,
+                     error_rate=0.0, error_status=503, ready=None):
+    """Serve the stand-in OpenWeather API until cancelled
+
+    Every response waits latency +/- jitter seconds. error_rate of them
+    fail with error_status (429 responses carry Retry-After). The bound port
+    is put on the `ready` queue if one is given.
+    """
+    rng = random.Random(DEMO_SEED)
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b'\r\n\r\n')
+                target = head.split(b' ', 2)[1].decode('latin-1')
+                delay = latency + (rng.uniform(-jitter, jitter) if jitter else 0)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                status, body, headers = stub_response(target, rng, error_rate, error_status)
+                lines = [f'HTTP/1.1 {status} {STATUS_TEXT.get(status, "Error")}',
+                         'Content-Type: application/json; charset=utf-8',
+                         f'Content-Length: {len(body)}']
+                lines.extend(f'{name}: {value}' for name, value in headers)
+                writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port, backlog=4096)
+    if ready is not None:
+        ready.put(server.sockets[0].getsockname()[1])
+    async with server:
+        await server.serve_forever()
+
+
+def start_stub_server(**options):
+    """Run serve_stub on a daemon thread with its own event loop; return the bound port"""
+    ready = queue.Queue()
+    options.setdefault('port', 0)
+    thread = threading.Thread(
+        target=lambda: asyncio.run(serve_stub(ready=ready, **options)), daemon=True, name='demo-upstream'
+    )
+    thread.start()
+    return ready.get(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Synthetic OpenWeather data and a stand-in API server')
+    parser.add_argument('cities', nargs='*', help='print demo current and forecast data for these cities')
+    parser.add_argument('--serve', action='store_true', help='run the stand-in OpenWeather API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds before each response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='+/- seconds added to the latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests that fail')
+    parser.add_argument('--error-status', type=int, default=503, help='HTTP status of injected failures')
+    args = parser.parse_args()
+
+    if not args.serve:
+        for city in args.cities or ['London']:
+            print(json.dumps(get_demo_weather_data(city), indent=2))
+        return
+
+    print(f"Stand-in OpenWeather API on http://{args.host}:{args.port} "
+          f"(latency {args.latency * 1000:.0f}±{args.jitter * 1000:.0f} ms, "
+          f"{args.error_rate:.0%} errors as HTTP {args.error_status})")
+    print(f"Point the dashboard at it with OPENWEATHER_BASE_URL=http://{args.host}:{args.port} "
+          f"and any OPENWEATHER_API_KEY")
+    try:
+        asyncio.run(serve_stub(args.host, args.port, args.latency, args.jitter,
+                               args.error_rate, args.error_status))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
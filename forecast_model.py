@@ -0,0 +1,213 @@
+"""
+Compact, precomputed representation of an OpenWeather 5-day forecast
+
+The raw /forecast payload is 40 nested dicts per city. ForecastSeries keeps
+only the fields the dashboard and chatbot use, as parallel typed arrays, and
+computes daily and overall aggregates once when the forecast is ingested so
+chatbot answers are simple attribute reads.
+"""
+
+from array import array
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+# OpenWeather condition code groups that mean precipitation falling
+# (2xx thunderstorm, 3xx drizzle, 5xx rain)
+RAIN_GROUPS = (2, 3, 5)
+
+# Per-slot fields ForecastSeries.column can return
+FORECAST_COLUMNS = (
+    'dt', 'temp', 'feels_like', 'humidity', 'pressure', 'wind', 'visibility', 'pop',
+    'condition', 'description', 'icon'
+)
+
+# Stored in place of a value the slot did not report; column() returns None for it
+MISSING = -1
+
+
+def is_rain_code(code):
+    """Return True if an OpenWeather condition code means rain, drizzle or storms"""
+    return code // 100 in RAIN_GROUPS
+
+
+class DailySummary:
+    """Aggregates for one local calendar day of the forecast"""
+
+    __slots__ = (
+        'date', 'dt', 'temp_min', 'temp_max', 'temp_mean', 'humidity_mean',
+        'wind_max', 'pop_max', 'pop_total', 'condition', 'description', 'icon',
+        'rainy_slots', 'slots'
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields[name])
+
+    @property
+    def is_rainy(self):
+        return self.rainy_slots > 0
+
+    def to_dict(self):
+        """Return the summary as a JSON-friendly dict"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class ForecastSeries:
+    """Column-oriented forecast with precomputed aggregates"""
+
+    __slots__ = (
+        'city', 'country', 'tz_offset', 'timestamps', 'temp', 'feels_like', 'humidity',
+        'pressure', 'wind', 'visibility', 'pop', 'condition', 'text_index', 'texts', 'daily',
+        'temp_min', 'temp_max', 'temp_mean', 'humidity_mean', 'rainy_slots'
+    )
+
+    def __init__(self, city, country, tz_offset):
+        self.city = city
+        self.country = country
+        self.tz_offset = tz_offset
+        self.timestamps = array('q')
+        self.temp = array('f')
+        self.feels_like = array('f')
+        self.humidity = array('B')
+        self.pressure = array('i')
+        self.wind = array('f')
+        self.visibility = array('i')
+        self.pop = array('f')
+        self.condition = array('H')
+        # (description, icon) pairs are interned; text_index points into texts
+        self.text_index = array('B')
+        self.texts = []
+        self.daily = ()
+        self.temp_min = self.temp_max = self.temp_mean = None
+        self.humidity_mean = None
+        self.rainy_slots = 0
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def description(self, i):
+        """Return the weather description for slot i"""
+        return self.texts[self.text_index[i]][0]
+
+    def icon(self, i):
+        """Return the OpenWeather icon code for slot i"""
+        return self.texts[self.text_index[i]][1]
+
+    def local_datetime(self, i):
+        """Return slot i as a naive datetime in the city's local time"""
+        return datetime.fromtimestamp(self.timestamps[i] + self.tz_offset, timezone.utc).replace(tzinfo=None)
+
+    def column(self, name):
+        """Return one per-slot field (see FORECAST_COLUMNS) as a JSON-friendly list"""
+        if name == 'dt':
+            return list(self.timestamps)
+        if name in ('temp', 'feels_like', 'wind', 'pop'):
+            # float32 columns; round so values read like the source data
+            return [round(value, 2) for value in getattr(self, name)]
+        if name in ('humidity', 'condition'):
+            return list(getattr(self, name))
+        if name in ('pressure', 'visibility'):
+            return [None if value == MISSING else value for value in getattr(self, name)]
+        if name == 'description':
+            return [self.texts[i][0] for i in self.text_index]
+        if name == 'icon':
+            return [self.texts[i][1] for i in self.text_index]
+        raise KeyError(name)
+
+    @property
+    def rainy_days(self):
+        return [day for day in self.daily if day.is_rainy]
+
+    def stats_dict(self):
+        """Return the whole-forecast aggregates as a JSON-friendly dict"""
+        return {
+            'temp_min': self.temp_min,
+            'temp_max': self.temp_max,
+            'temp_mean': self.temp_mean,
+            'humidity_mean': self.humidity_mean,
+            'rainy_slots': self.rainy_slots,
+        }
+
+    def to_daily_dict(self):
+        """Return the daily aggregates served by /api/weather/<city>/daily"""
+        return {
+            'city': self.city,
+            'country': self.country,
+            'timezone': self.tz_offset,
+            'days': [day.to_dict() for day in self.daily],
+            'stats': self.stats_dict(),
+        }
+
+
+def build_forecast_model(forecast):
+    """Build a ForecastSeries from a raw OpenWeather /forecast payload"""
+    city = forecast.get('city') or {}
+    series = ForecastSeries(city.get('name'), city.get('country'), city.get('timezone') or 0)
+    text_ids = {}
+
+    for item in forecast.get('list', []):
+        weather = (item.get('weather') or [{}])[0]
+        text = (weather.get('description', 'unknown'), weather.get('icon', ''))
+        if text not in text_ids:
+            text_ids[text] = len(series.texts)
+            series.texts.append(text)
+
+        series.timestamps.append(item['dt'])
+        series.temp.append(item['main']['temp'])
+        series.feels_like.append(item['main'].get('feels_like', item['main']['temp']))
+        series.humidity.append(item['main']['humidity'])
+        series.pressure.append(item['main'].get('pressure', MISSING))
+        series.wind.append((item.get('wind') or {}).get('speed', 0.0))
+        series.visibility.append(item.get('visibility', MISSING))
+        series.pop.append(item.get('pop', 0.0))
+        series.condition.append(weather.get('id', 0))
+        series.text_index.append(text_ids[text])
+
+    if series.timestamps:
+        # Columns are float32; round aggregates so they read like the source data
+        series.temp_min = round(min(series.temp), 2)
+        series.temp_max = round(max(series.temp), 2)
+        series.temp_mean = round(sum(series.temp) / len(series.temp), 2)
+        series.humidity_mean = round(sum(series.humidity) / len(series.humidity), 2)
+        series.rainy_slots = sum(1 for code in series.condition if is_rain_code(code))
+        series.daily = tuple(_daily_summaries(series))
+    return series
+
+
+def _daily_summaries(series):
+    """Group slots by local calendar day and aggregate each group"""
+    offset = timedelta(seconds=series.tz_offset)
+    start = 0
+    count = len(series)
+    while start < count:
+        day = (datetime.fromtimestamp(series.timestamps[start], timezone.utc) + offset).date()
+        end = start + 1
+        while end < count and (
+            datetime.fromtimestamp(series.timestamps[end], timezone.utc) + offset
+        ).date() == day:
+            end += 1
+
+        temps = series.temp[start:end]
+        conditions = Counter(series.condition[start:end])
+        # Dominant condition: most frequent code, first occurrence wins ties
+        dominant = max(range(start, end), key=lambda i: (conditions[series.condition[i]], -i))
+        description, icon = series.texts[series.text_index[dominant]]
+        pops = series.pop[start:end]
+
+        yield DailySummary(
+            date=day.isoformat(),
+            dt=series.timestamps[start],
+            temp_min=round(min(temps), 2),
+            temp_max=round(max(temps), 2),
+            temp_mean=round(sum(temps) / len(temps), 2),
+            humidity_mean=round(sum(series.humidity[start:end]) / (end - start), 2),
+            wind_max=round(max(series.wind[start:end]), 2),
+            pop_max=round(max(pops), 2),
+            pop_total=round(sum(pops), 2),
+            condition=series.condition[dominant],
+            description=description,
+            icon=icon,
+            rainy_slots=sum(1 for code in series.condition[start:end] if is_rain_code(code)),
+            slots=end - start,
+        )
+        start = end
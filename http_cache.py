@@ -0,0 +1,152 @@
+"""
+HTTP caching for responses built from cached weather snapshots
+
+A weather response is a pure function of the snapshots it was built from, so
+their timestamps make natural validators: the ETag and Last-Modified change
+exactly when a new snapshot is fetched, and max-age is the time the oldest
+snapshot has left in the server cache. Encoded and compressed bodies are
+kept per snapshot, so repeat requests skip both JSON encoding and compression.
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+import time
+
+from werkzeug.http import http_date, parse_accept_header, parse_date, parse_etags, unquote_etag
+
+from weather_cache import TTLCache
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Content codings in order of preference when the client accepts several equally
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def snapshot_validators(entries, ttls, variant=(), now=None):
+    """Return (etag, last_modified, max_age) for a response built from cache entries
+
+    variant identifies the representation (e.g. route, projection and city)
+    and goes into the ETag, so one URL's validator never matches another's.
+    """
+    now = time.time() if now is None else now
+    timestamps = [entries[endpoint]['timestamp'] for endpoint in sorted(entries)]
+    digest = hashlib.sha1(repr((tuple(variant), timestamps)).encode()).hexdigest()[:16]
+    # Weak: the body also says whether it was served from cache
+    etag = f'W/"{digest}"'
+    max_age = min(
+        max(0, int(ttls[endpoint] - (now - entry['timestamp'])))
+        for endpoint, entry in entries.items()
+    )
+    return etag, max(timestamps), max_age
+
+
+def is_not_modified(headers, etag, modified):
+    """Whether a conditional GET can be answered with 304 (If-None-Match takes precedence)"""
+    if_none_match = headers.get('If-None-Match')
+    if if_none_match:
+        return parse_etags(if_none_match).contains_weak(unquote_etag(etag)[0])
+    since = parse_date(headers.get('If-Modified-Since'))
+    return since is not None and int(modified) <= since.timestamp()
+
+
+def choose_encoding(accept_encoding):
+    """Pick the best supported content coding the client accepts, or None for identity"""
+    accept = parse_accept_header(accept_encoding)
+    best = max(ENCODINGS, key=accept.quality)
+    return best if accept.quality(best) > 0 else None
+
+
+def cache_headers(etag, modified, max_age):
+    """Validator and freshness headers for a cacheable response"""
+    return [
+        ('ETag', etag),
+        ('Last-Modified', http_date(modified)),
+        ('Cache-Control', f'public, max-age={max_age}'),
+        ('Vary', 'Accept-Encoding'),
+    ]
+
+
+class ResponseBodyCache:
+    """Encoded and compressed response bodies kept until their snapshot expires
+
+    Keys identify a snapshot (e.g. route, city and ETag). The body is built
+    once and each content coding of it compressed once; later requests are
+    served the stored bytes.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=16 * 1024 * 1024, gzip_level=6, brotli_quality=5):
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._cache = TTLCache(max_entries=max_entries, max_bytes=max_bytes)
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.compressions = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def compress(self, body, encoding):
+        """Compress body with the given content coding"""
+        if encoding == 'br':
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def get(self, key, encoding, build, ttl):
+        """Return the body for key in a content coding (None for identity)
+
+        On a miss the identity body comes from build() and is compressed as
+        needed. Nothing is kept when ttl is 0.
+        """
+        body = self._cache.get((key, encoding))
+        if body is not None:
+            return body
+        if encoding is None:
+            body = build()
+            with self._lock:
+                self.builds += 1
+        else:
+            raw = self.get(key, None, build, ttl)
+            body = self.compress(raw, encoding)
+            with self._lock:
+                self.compressions += 1
+                self.bytes_in += len(raw)
+                self.bytes_out += len(body)
+        if ttl > 0:
+            self._cache.set((key, encoding), body, ttl, len(body))
+        return body
+
+    def stats(self):
+        """Return hit/build counters and the achieved compression ratio"""
+        cache = self._cache.stats()
+        with self._lock:
+            return {
+                'encodings': list(ENCODINGS),
+                'entries': cache['entries'],
+                'bytes': cache['bytes'],
+                'hits': cache['hits'],
+                'builds': self.builds,
+                'compressions': self.compressions,
+                'compression_ratio': round(self.bytes_out / self.bytes_in, 3) if self.bytes_in else None,
+            }
+
+
+_fingerprints = {}
+
+
+def file_fingerprint(path):
+    """Short content hash of a file, recomputed only when its mtime changes; None if missing"""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    cached = _fingerprints.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(path, 'rb') as f:
+        digest = hashlib.sha1(f.read()).hexdigest()[:12]
+    _fingerprints[path] = (mtime, digest)
+    return digest
@@ -0,0 +1,279 @@
+"""
+Gemini client, prompt construction and response caching for the weather chatbot
+"""
+
+import hashlib
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from chat_intents import tokenize
+from weather_cache import TTLCache
+
+# Bump whenever GEMINI_PROMPT changes so cached answers from the old prompt are not reused
+PROMPT_VERSION = 1
+
+GEMINI_PROMPT = """
+        You are a helpful weather assistant. A user is asking about weather information.
+
+        Weather Data Summary:
+        {weather_summary}
+
+        User Question: {query}
+
+        Please provide a helpful, friendly, and concise response based on the weather data provided.
+        Focus on being practical and actionable. If the weather data doesn't contain enough information
+        to answer the question, politely say so.
+
+        Keep your response conversational and under 150 words.
+        """
+
+# Words ignored when matching near-duplicate questions. Question words are
+# not among them: "will it rain" and "when will it rain" ask different things.
+STOPWORDS = frozenset("""
+    a an the is are am be was were will would should could can do does did i me my we you
+    it its this that these those there here please
+    tell give show about for of to in on at with and or any s
+""".split())
+
+# Contracted question words, matched as the word they start with
+QUESTION_WORDS = {'whats': 'what', 'hows': 'how'}
+
+
+def build_prompt(query, weather_summary):
+    """Build the Gemini prompt for a query against a weather summary"""
+    return GEMINI_PROMPT.format(weather_summary=weather_summary, query=query)
+
+
+def normalize_query(query):
+    """Canonical form of a query: lowercase words separated by single spaces"""
+    return ' '.join(tokenize(query))
+
+
+def query_signature(query):
+    """Content words of a query in their original order, used for near-duplicate matching
+
+    Order is kept because it carries meaning: "warmer on Monday than Tuesday"
+    and "warmer on Tuesday than Monday" are different questions. Question
+    words are kept for the same reason.
+    """
+    return ' '.join(QUESTION_WORDS.get(token, token) for token in tokenize(query) if token not in STOPWORDS)
+
+
+def snapshot_hash(weather_summary):
+    """Short stable hash identifying the weather data a prompt was built from"""
+    return hashlib.sha1(weather_summary.encode('utf-8')).hexdigest()[:16]
+
+
+class GeminiProvider:
+    """Gemini model created on first use, so importing the app stays cheap
+
+    Importing google.generativeai takes most of a second, which every worker
+    start would otherwise pay even if nobody chats. The first call to model()
+    imports and configures it (once, whichever thread gets there first).
+    """
+
+    def __init__(self, api_key, model_name='gemini-1.5-pro'):
+        self.api_key = api_key
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+        self.init_seconds = None
+
+    @property
+    def configured(self):
+        """Whether an API key was supplied (the model may not be loaded yet)"""
+        return bool(self.api_key)
+
+    def model(self):
+        """Return the GenerativeModel, importing and configuring the client on first use"""
+        model = self._model
+        if model is None:
+            with self._lock:
+                if self._model is None:
+                    started = time.perf_counter()
+                    import google.generativeai as genai
+                    genai.configure(api_key=self.api_key)
+                    self._model = genai.GenerativeModel(self.model_name)
+                    self.init_seconds = time.perf_counter() - started
+                model = self._model
+        return model
+
+    def generate_content(self, *args, **kwargs):
+        """GenerativeModel.generate_content on the lazily created model"""
+        return self.model().generate_content(*args, **kwargs)
+
+    def stats(self):
+        """Return whether the client has been loaded and how long that took"""
+        return {
+            'configured': self.configured,
+            'model': self.model_name,
+            'loaded': self._model is not None,
+            'load_ms': round(self.init_seconds * 1000, 1) if self.init_seconds is not None else None,
+        }
+
+
+class LLMResponseCache:
+    """LRU cache of LLM answers keyed on (query, weather snapshot, prompt version)
+
+    Entries expire with the weather data they were generated from. With
+    near_duplicates enabled, questions that differ only in punctuation or
+    filler words share an answer.
+    """
+
+    def __init__(self, max_entries=512, max_bytes=4 * 1024 * 1024, near_duplicates=True):
+        self.near_duplicates = near_duplicates
+        self._cache = TTLCache(max_entries=max_entries, max_bytes=max_bytes)
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+    def _keys(self, query, weather_summary):
+        snapshot = snapshot_hash(weather_summary)
+        exact = ('exact', normalize_query(query), snapshot, PROMPT_VERSION)
+        near = ('near', query_signature(query), snapshot, PROMPT_VERSION)
+        return exact, near
+
+    def get(self, query, weather_summary):
+        """Return a cached answer for the query, or None"""
+        exact, near = self._keys(query, weather_summary)
+        entry = self._cache.get(exact)
+        kind = 'exact'
+        if entry is None and self.near_duplicates and near[1]:
+            entry = self._cache.get(near)
+            kind = 'near'
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            if kind == 'exact':
+                self.exact_hits += 1
+            else:
+                self.near_hits += 1
+            self.saved_seconds += entry[1]
+        return entry[0]
+
+    def set(self, query, weather_summary, response, latency, ttl):
+        """Cache an answer that took latency seconds to generate, for ttl seconds"""
+        if ttl <= 0:
+            return
+        exact, near = self._keys(query, weather_summary)
+        entry = (response, latency)
+        size = len(response)
+        self._cache.set(exact, entry, ttl, size)
+        if self.near_duplicates and near[1]:
+            self._cache.set(near, entry, ttl, size)
+
+    def stats(self):
+        """Return hit rates and the generation time saved by cache hits"""
+        with self._lock:
+            lookups = self.exact_hits + self.near_hits + self.misses
+            hits = self.exact_hits + self.near_hits
+            stats = {
+                'exact_hits': self.exact_hits,
+                'near_duplicate_hits': self.near_hits,
+                'misses': self.misses,
+                'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+                'saved_latency_seconds': round(self.saved_seconds, 3),
+                'prompt_version': PROMPT_VERSION,
+            }
+        cache = self._cache.stats()
+        stats['entries'] = cache['entries']
+        stats['evictions'] = cache['evictions']
+        return stats
+
+
+class LatencyTracker:
+    """Rolling window of latency samples with percentile summaries"""
+
+    def __init__(self, window=1000):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, seconds):
+        """Add a latency sample in seconds"""
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+
+    def summary(self):
+        """Return count and p50/p95/p99 of the window in milliseconds"""
+        with self._lock:
+            ordered = sorted(self._samples)
+            count = self.count
+        if not ordered:
+            return {'count': count}
+
+        def percentile(pct):
+            return round(ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))] * 1000, 1)
+
+        return {
+            'count': count,
+            'p50_ms': percentile(50),
+            'p95_ms': percentile(95),
+            'p99_ms': percentile(99),
+        }
+
+
+class LLMRunner:
+    """Run LLM calls on a bounded worker pool so slow calls can't pile up
+
+    submit() never blocks: when max_concurrent calls are already outstanding
+    it returns None and the caller should answer without the LLM. Calls that
+    overrun the caller's deadline keep their slot until they actually finish.
+    """
+
+    def __init__(self, max_concurrent=4, timeout=8.0):
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix='llm')
+        self._lock = threading.Lock()
+        self.max_concurrent = max_concurrent
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def submit(self, fn, *args):
+        """Start fn(*args) on a worker, or return None if every slot is busy"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            return None
+        with self._lock:
+            self.in_flight += 1
+        future = self._executor.submit(fn, *args)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future):
+        with self._lock:
+            self.in_flight -= 1
+            if future.exception() is None:
+                self.completed += 1
+            else:
+                self.failed += 1
+        self._slots.release()
+
+    def record_timeout(self):
+        """Count a call whose caller stopped waiting for it"""
+        with self._lock:
+            self.timed_out += 1
+
+    def stats(self):
+        """Return concurrency and outcome counters"""
+        with self._lock:
+            return {
+                'timeout_seconds': self.timeout,
+                'max_concurrent': self.max_concurrent,
+                'in_flight': self.in_flight,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out,
+            }
@@ -0,0 +1,46 @@
+"""
+Leveled, optionally JSON-structured logging for the dashboard
+
+LOG_LEVEL sets the threshold (DEBUG, INFO, WARNING, ...). Per-request detail
+is logged at DEBUG, so at the default INFO level the hot path only pays for
+a level check. LOG_FORMAT=json writes one JSON object per line, including
+any `extra` fields passed to the logger, for log collectors.
+"""
+
+import json
+import logging
+import os
+
+# Attributes every LogRecord has; anything else was passed in `extra`
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects"""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S%z'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update((key, value) for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES)
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level=None, fmt=None):
+    """Send log records to stderr at LOG_LEVEL in LOG_FORMAT (text or json)
+
+    Does nothing if the root logger already has handlers (e.g. set up by
+    the server hosting the app).
+    """
+    level = (level or os.getenv('LOG_LEVEL', 'INFO')).upper()
+    handler = logging.StreamHandler()
+    if (fmt or os.getenv('LOG_FORMAT', 'text')).lower() == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    logging.basicConfig(level=level, handlers=[handler])
@@ -0,0 +1,196 @@
+"""
+Counters and latency histograms exposed in the Prometheus text format
+
+Recording takes a lock and a couple of additions, cheap enough for every
+request. Numbers other components already keep (cache hits, upstream
+requests, LLM cache and runner outcomes) are read from their stats() by
+collectors when /metrics is scraped instead of being counted twice. Like the
+caches, metrics belong to one worker process.
+"""
+
+import bisect
+import threading
+import time
+from functools import wraps
+
+# Latency buckets in seconds, from cache lookups up to slow LLM calls
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(names, values, extra=''):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count per combination of label values"""
+
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        """Add amount to the series for labelvalues (given in labelnames order)"""
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def lines(self):
+        with self._lock:
+            values = list(self._values.items())
+        return [f'{self.name}{_labels(self.labelnames, labels)} {_number(value)}' for labels, value in values]
+
+
+class _Timer:
+    """Observes elapsed time into a histogram, as a context manager or decorator"""
+
+    __slots__ = ('histogram', 'labelvalues', 'started')
+
+    def __init__(self, histogram, labelvalues):
+        self.histogram = histogram
+        self.labelvalues = labelvalues
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labelvalues)
+
+    def __call__(self, fn):
+        @wraps(fn)
+        def timed(*args, **kwargs):
+            with _Timer(self.histogram, self.labelvalues):
+                return fn(*args, **kwargs)
+        return timed
+
+
+class Histogram:
+    """Distribution of observed values (usually seconds) per combination of label values"""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labelvalues -> [per-bucket counts (last is +Inf), sum, count]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        """Record one value for labelvalues (given in labelnames order)"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *labelvalues):
+        """Time a block (`with`) or every call of a function (decorator)"""
+        return _Timer(self, labelvalues)
+
+    def lines(self):
+        with self._lock:
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        lines = []
+        for labels, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = 'le="%s"' % _number(bound)
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(self.labelnames, labels)} {count}')
+        return lines
+
+
+class Registry:
+    """Metrics and scrape-time collectors rendered together by render()"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, documentation, labelnames=()):
+        """Create and register a Counter"""
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """Create and register a Histogram"""
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collect):
+        """Add a function called at scrape time
+
+        It returns (name, type, documentation, samples) tuples, where samples
+        is a list of (labels dict, value); failing collectors are skipped.
+        """
+        self._collectors.append(collect)
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format"""
+        out = []
+        for metric in self._metrics:
+            out.append(f'# HELP {metric.name} {metric.documentation}')
+            out.append(f'# TYPE {metric.name} {metric.type}')
+            out.extend(metric.lines())
+        # Collectors may each report samples of one family (e.g. per client)
+        families = {}
+        for collect in self._collectors:
+            try:
+                collected = list(collect())
+            except Exception:
+                continue
+            for name, kind, documentation, samples in collected:
+                families.setdefault(name, (kind, documentation, []))[2].extend(samples)
+        for name, (kind, documentation, samples) in families.items():
+            out.append(f'# HELP {name} {documentation}')
+            out.append(f'# TYPE {name} {kind}')
+            for labels, value in samples:
+                if value is not None:
+                    out.append(f'{name}{_labels(labels.keys(), labels.values())} {_number(value)}')
+        return '\n'.join(out) + '\n'
+
+
+REGISTRY = Registry()
+
+# Instrumentation shared by the Flask app, the ASGI app and the upstream clients
+REQUEST_SECONDS = REGISTRY.histogram(
+    'weather_http_request_duration_seconds', 'Time to produce a response, by route', ('route', 'method')
+)
+REQUESTS = REGISTRY.counter(
+    'weather_http_requests_total', 'Responses sent, by route and status', ('route', 'method', 'status')
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    'weather_stage_duration_seconds', 'Time spent in each stage of handling a request', ('stage',)
+)
+UPSTREAM_FETCHES = REGISTRY.counter(
+    'weather_upstream_fetches_total', 'OpenWeather endpoint fetches (after retries), by outcome',
+    ('endpoint', 'outcome')
+)
@@ -0,0 +1,189 @@
+"""
+Background refresher that keeps popular cities warm in the weather cache
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+
+class Prewarmer:
+    """Refresh a hot set of cities ahead of TTL expiry within a daily call budget
+
+    The hot set is the seed list plus the most frequently requested cities.
+    Each (city, endpoint) pair is refreshed once `refresh_margin` of its TTL has
+    passed, with jitter so refreshes don't line up. When the hot set would need
+    more calls than the daily budget allows, every interval is stretched evenly.
+    A daily budget of 0 disables pre-warming.
+    """
+
+    MAX_TRACKED_CITIES = 10000
+
+    def __init__(self, refresh_fn, ttl_remaining_fn, seed_cities, ttls,
+                 daily_budget=500, hot_set_size=30, refresh_margin=0.8,
+                 jitter=0.1, tick=5):
+        self.refresh_fn = refresh_fn
+        self.ttl_remaining_fn = ttl_remaining_fn
+        self.seed_cities = list(seed_cities)
+        self.ttls = dict(ttls)
+        self.daily_budget = daily_budget
+        self.hot_set_size = hot_set_size
+        self.refresh_margin = refresh_margin
+        self.jitter = jitter
+        self.tick = tick
+
+        self._requests = Counter()
+        self._next_due = {}  # (city, endpoint) -> monotonic time
+        self._last_refresh = {}  # (city, endpoint) -> wall clock time
+        self._last_error = None
+        self._budget_day = None
+        self._budget_used = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record_request(self, city):
+        """Count a user request so frequently searched cities join the hot set"""
+        with self._lock:
+            self._requests[city] += 1
+            if len(self._requests) > self.MAX_TRACKED_CITIES:
+                # Keep the frequency table bounded by forgetting the long tail
+                self._requests = Counter(dict(self._requests.most_common(self.MAX_TRACKED_CITIES // 2)))
+
+    def hot_set(self):
+        """Return the cities currently kept warm"""
+        with self._lock:
+            cities = list(self.seed_cities)
+            seen = {city.casefold() for city in cities}
+            for city, _ in self._requests.most_common():
+                if len(cities) >= self.hot_set_size:
+                    break
+                if city.casefold() not in seen:
+                    seen.add(city.casefold())
+                    cities.append(city)
+            return cities
+
+    def interval(self, endpoint, hot_set_size):
+        """Seconds between refreshes of one endpoint, stretched to fit the daily budget
+
+        Returns None when there is no budget, as nothing is ever refreshed.
+        """
+        if not self.daily_budget:
+            return None
+        wanted = {name: ttl * self.refresh_margin for name, ttl in self.ttls.items()}
+        calls_per_day = sum(hot_set_size * 86400 / seconds for seconds in wanted.values())
+        return wanted[endpoint] * max(1.0, calls_per_day / self.daily_budget)
+
+    def start(self):
+        """Start the refresher thread (idempotent)"""
+        if not self.daily_budget:
+            logger.warning('Pre-warming disabled: the daily budget is 0')
+            return
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='prewarm', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the refresher thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.tick * 2)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._stop.wait(self.tick * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    def run_once(self):
+        """Refresh every (city, endpoint) pair that is due, within the budget"""
+        if not self.daily_budget:
+            return
+        cities = self.hot_set()
+        now = time.monotonic()
+        for city in cities:
+            for endpoint in self.ttls:
+                key = (city, endpoint)
+                interval = self.interval(endpoint, len(cities))
+                due = self._next_due.get(key)
+                if due is None:
+                    # Spread first refreshes over the interval instead of firing at once
+                    self._next_due[key] = now + random.uniform(0, min(interval, 60))
+                    continue
+                if due > now:
+                    continue
+
+                # Skip pairs that user traffic already refreshed recently
+                remaining = self.ttl_remaining_fn(endpoint, city)
+                fresh_for = remaining - self.ttls[endpoint] * (1 - self.refresh_margin)
+                if fresh_for > 0:
+                    self._next_due[key] = now + fresh_for
+                    continue
+
+                if not self._spend_budget():
+                    return
+                try:
+                    self.refresh_fn(endpoint, city)
+                    self._last_refresh[key] = time.time()
+                except Exception as e:
+                    self._last_error = {
+                        'city': city,
+                        'endpoint': endpoint,
+                        'error': str(e),
+                        'at': datetime.now(timezone.utc).isoformat(),
+                    }
+                    logger.warning('Pre-warming %s %s failed: %s', endpoint, city, e,
+                                   extra={'city': city, 'endpoint': endpoint})
+                self._next_due[key] = now + interval * random.uniform(1 - self.jitter, 1)
+
+    def _spend_budget(self):
+        """Reserve one upstream call from today's budget, returning False when exhausted"""
+        with self._lock:
+            today = datetime.now(timezone.utc).date()
+            if today != self._budget_day:
+                self._budget_day = today
+                self._budget_used = 0
+            if self._budget_used >= self.daily_budget:
+                return False
+            self._budget_used += 1
+            return True
+
+    def status(self):
+        """Return the hot set schedule, last error and budget usage"""
+        now = time.monotonic()
+        cities = self.hot_set()
+        schedule = {}
+        for city in cities:
+            schedule[city] = {}
+            for endpoint in self.ttls:
+                due = self._next_due.get((city, endpoint))
+                refreshed = self._last_refresh.get((city, endpoint))
+                schedule[city][endpoint] = {
+                    'next_refresh_in': round(max(0.0, due - now), 1) if due is not None else None,
+                    'last_refreshed': (
+                        datetime.fromtimestamp(refreshed, timezone.utc).isoformat() if refreshed else None
+                    ),
+                }
+        with self._lock:
+            used = self._budget_used if self._budget_day == datetime.now(timezone.utc).date() else 0
+        intervals = {endpoint: self.interval(endpoint, len(cities)) for endpoint in self.ttls}
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'hot_set': cities,
+            'intervals': {
+                endpoint: round(seconds) if seconds is not None else None for endpoint, seconds in intervals.items()
+            },
+            'budget': {
+                'daily': self.daily_budget,
+                'used_today': used,
+                'remaining_today': max(0, self.daily_budget - used),
+            },
+            'last_error': self._last_error,
+            'schedule': schedule,
+        }
@@ -1,14 +1,48 @@
 #!/usr/bin/env python3
 """
 Weather Dashboard Runner
+
+Modes:
+  dev   Flask development server with the debugger and reloader (single process)
+  prod  Gunicorn with multiple worker processes, each running a thread pool
+  asgi  Uvicorn serving asgi_app (async weather and chat endpoints)
+
+Caches, counters and the pre-warmer live in each worker process; see the
+Production Mode section of the README.
 """
 
+import argparse
 import os
 import sys
-from app import app
+from dotenv import load_dotenv
 
-def main():
-    """Start the weather dashboard application"""
+# Load environment variables before reading defaults from them
+load_dotenv()
+
+def parse_args():
+    """Parse the serving mode, bind address and worker settings"""
+    parser = argparse.ArgumentParser(description='Run the weather dashboard')
+    parser.add_argument('--mode', choices=['dev', 'prod', 'asgi'], default=os.getenv('RUN_MODE', 'dev'),
+                        help='dev: Flask debug server; prod: gunicorn workers; '
+                             'asgi: uvicorn with async weather and chat endpoints')
+    parser.add_argument('--host', default=os.getenv('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('PORT', 8080)))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('WEB_CONCURRENCY', 2)),
+                        help='worker processes (prod and asgi modes)')
+    parser.add_argument('--threads', type=int, default=int(os.getenv('WEB_THREADS', 8)),
+                        help='request threads per worker (prod mode)')
+    parser.add_argument('--keepalive', type=int, default=int(os.getenv('WEB_KEEPALIVE', 5)),
+                        help='seconds to hold idle keep-alive connections open')
+    parser.add_argument('--timeout', type=int, default=int(os.getenv('WEB_TIMEOUT', 60)),
+                        help='seconds before a silent worker is killed and restarted (prod mode)')
+    parser.add_argument('--graceful-timeout', type=int, default=int(os.getenv('WEB_GRACEFUL_TIMEOUT', 30)),
+                        help='seconds workers get to finish in-flight requests on reload or shutdown')
+    parser.add_argument('--max-requests', type=int, default=int(os.getenv('WEB_MAX_REQUESTS', 0)),
+                        help='recycle a worker after this many requests (0 disables)')
+    return parser.parse_args()
+
+def print_banner(args):
+    """Print the startup banner (once, from the launching process)"""
     print("🌤️ Weather Dashboard with Python Chatbot")
     print("=" * 50)
     
@@ -24,17 +58,96 @@ def main():
     else:
         print("✅ Real weather data mode enabled")
     
-    print("\n🚀 Starting Flask application...")
-    print("📱 Open your browser to: http://localhost:8080")
+    if args.mode == 'prod':
+        print(f"\n🚀 Starting gunicorn: {args.workers} workers x {args.threads} threads...")
+    elif args.mode == 'asgi':
+        print(f"\n🚀 Starting ASGI server (uvicorn): {args.workers} workers...")
+    else:
+        print("\n🚀 Starting Flask application...")
+    print(f"📱 Open your browser to: http://localhost:{args.port}")
     print("💬 Chatbot is ready to answer weather questions!")
     print("\n" + "=" * 50)
+
+def run_gunicorn(args):
+    """Serve the Flask app with gunicorn's threaded workers
+    
+    The app is imported in each worker rather than in this process, so
+    `kill -HUP <master pid>` gracefully replaces the workers with ones running
+    freshly loaded code and configuration.
+    """
+    from gunicorn.app.base import BaseApplication
+    
+    class DashboardApplication(BaseApplication):
+        def load_config(self):
+            settings = {
+                'bind': f'{args.host}:{args.port}',
+                'workers': args.workers,
+                'worker_class': 'gthread',
+                'threads': args.threads,
+                'keepalive': args.keepalive,
+                'timeout': args.timeout,
+                'graceful_timeout': args.graceful_timeout,
+                'max_requests': args.max_requests,
+                'max_requests_jitter': args.max_requests // 10,
+                'preload_app': False,
+                'post_worker_init': post_worker_init,
+            }
+            for key, value in settings.items():
+                self.cfg.set(key, value)
+    
+        def load(self):
+            from app import app
+            return app
+    
+    DashboardApplication().run()
+
+def post_worker_init(worker):
+    """Start per-worker background tasks once the worker has loaded the app"""
+    from app import start_background_tasks
+    start_background_tasks()
+
+def main():
+    """Start the weather dashboard application"""
+    args = parse_args()
+    
+    # With the reloader this script runs twice; only the parent prints the banner
+    if os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
+        print_banner(args)
+    
+    # Worker processes read this to split per-process budgets (e.g. pre-warming)
+    os.environ['WEB_CONCURRENCY'] = str(args.workers if args.mode != 'dev' else 1)
+    
+    # Each worker pre-warms with an equal share of the budget; a share of 0 would silently disable it
+    budget = int(os.getenv('PREWARM_DAILY_BUDGET', 500))
+    workers = int(os.environ['WEB_CONCURRENCY'])
+    if 0 < budget < workers:
+        sys.exit(f'PREWARM_DAILY_BUDGET ({budget}) is less than the number of workers ({workers}); '
+                 'raise it, or set it to 0 to disable pre-warming')
+    
+    if args.mode == 'prod':
+        run_gunicorn(args)
+        return
+    
+    if args.mode == 'asgi':
+        # Background tasks start from the ASGI lifespan handler of each worker
+        import uvicorn
+        uvicorn.run('asgi_app:application', host=args.host, port=args.port,
+                    workers=args.workers, timeout_keep_alive=args.keepalive,
+                    timeout_graceful_shutdown=args.graceful_timeout)
+        return
+    
+    from app import app, start_background_tasks
+    
+    # With the reloader only the child process serves requests
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_tasks()
     
     # Start the Flask app
     app.run(
-        host='0.0.0.0',
-        port=8080,
+        host=args.host,
+        port=args.port,
         debug=True
     )
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()
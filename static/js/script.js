@@ -1,11 +1,13 @@
 // Weather data storage
 let currentWeatherData = null;
-let forecastData = null;
+let dailyForecast = null;   // Per-day aggregates computed by the server
+let forecastStats = null;   // Whole-forecast min/max/mean
 let currentCity = 'London';
 
 // DOM Elements
 const cityInput = document.getElementById('cityInput');
 const searchBtn = document.getElementById('searchBtn');
+const citySuggestions = document.getElementById('citySuggestions');
 const chatbotToggle = document.getElementById('chatbotToggle');
 const chatbot = document.getElementById('chatbot');
 const closeChatbot = document.getElementById('closeChatbot');
@@ -33,6 +35,10 @@ searchBtn.addEventListener('click', handleSearch);
 cityInput.addEventListener('keypress', (e) => {
     if (e.key === 'Enter') handleSearch();
 });
+cityInput.addEventListener('input', () => {
+    clearTimeout(suggestTimer);
+    suggestTimer = setTimeout(suggestCities, 150);
+});
 
 chatbotToggle.addEventListener('click', toggleChatbot);
 closeChatbot.addEventListener('click', toggleChatbot);
@@ -55,14 +61,37 @@ async function handleSearch() {
     }
 }
 
+// City name autocomplete from the server's city index
+let suggestTimer = null;
+
+async function suggestCities() {
+    const query = cityInput.value.trim();
+    if (query.length < 2) {
+        citySuggestions.innerHTML = '';
+        return;
+    }
+    try {
+        const response = await fetch(`/api/cities?q=${encodeURIComponent(query)}&limit=8`);
+        const cities = await response.json();
+        citySuggestions.innerHTML = '';
+        cities.forEach(city => {
+            const option = document.createElement('option');
+            option.value = city.label;
+            citySuggestions.appendChild(option);
+        });
+    } catch (error) {
+        console.error('Error fetching city suggestions:', error);
+    }
+}
+
 // Fetch weather data from Python backend
 async function getWeatherData(city) {
     try {
         // Show loading state
         showLoading(true);
         
-        // Fetch weather data from Python backend
-        const response = await fetch(`/api/weather/${encodeURIComponent(city)}`);
+        // Fetch current conditions and daily aggregates from Python backend
+        const response = await fetch(`/api/weather/${encodeURIComponent(city)}/daily`);
         const data = await response.json();
         
         if (!data.success) {
@@ -70,7 +99,8 @@ async function getWeatherData(city) {
         }
         
         currentWeatherData = data.current;
-        forecastData = data.forecast;
+        dailyForecast = data.days;
+        forecastStats = data.stats;
         currentCity = city;
         
         // Update UI
@@ -110,29 +140,24 @@ function updateCurrentWeather() {
 
 // Update forecast display
 function updateForecast() {
-    if (!forecastData) return;
-    
     forecastContainer.innerHTML = '';
     
-    // Group forecast by day and get daily data
-    const dailyData = groupForecastByDay(forecastData.list);
+    // The forecast can be missing when only current conditions could be fetched
+    if (!dailyForecast) return;
     
-    dailyData.forEach(day => {
+    dailyForecast.forEach(day => {
         const card = document.createElement('div');
         card.className = 'forecast-card';
         
-        const date = new Date(day.dt * 1000);
-        const dayName = date.toLocaleDateString('en-US', { weekday: 'short' });
-        const temp = Math.round(day.main.temp);
-        const iconCode = day.weather[0].icon;
+        const dayName = localDate(day.date).toLocaleDateString('en-US', { weekday: 'short' });
         
         card.innerHTML = `
             <h4>${dayName}</h4>
             <div class="weather-icon">
-                <i class="${getWeatherIconClass(iconCode)}"></i>
+                <i class="${getWeatherIconClass(day.icon)}"></i>
             </div>
-            <div class="temp">${temp}°C</div>
-            <p>${day.weather[0].description}</p>
+            <div class="temp">${Math.round(day.temp_max)}° / ${Math.round(day.temp_min)}°C</div>
+            <p>${day.description}</p>
         `;
         
         forecastContainer.appendChild(card);
@@ -141,36 +166,18 @@ function updateForecast() {
 
 // Update statistics
 function updateStatistics() {
-    if (!forecastData) return;
+    if (!forecastStats) return;
     
-    const temps = forecastData.list.map(item => item.main.temp);
-    const humidities = forecastData.list.map(item => item.main.humidity);
-    
-    const maxTempValue = Math.round(Math.max(...temps));
-    const minTempValue = Math.round(Math.min(...temps));
-    const avgTempValue = Math.round(temps.reduce((a, b) => a + b, 0) / temps.length);
-    const avgHumidityValue = Math.round(humidities.reduce((a, b) => a + b, 0) / humidities.length);
-    
-    maxTemp.textContent = maxTempValue;
-    minTemp.textContent = minTempValue;
-    avgTemp.textContent = avgTempValue;
-    avgHumidity.textContent = avgHumidityValue;
+    maxTemp.textContent = Math.round(forecastStats.temp_max);
+    minTemp.textContent = Math.round(forecastStats.temp_min);
+    avgTemp.textContent = Math.round(forecastStats.temp_mean);
+    avgHumidity.textContent = Math.round(forecastStats.humidity_mean);
 }
 
-// Group forecast data by day
-function groupForecastByDay(forecastList) {
-    const dailyData = {};
-    
-    forecastList.forEach(item => {
-        const date = new Date(item.dt * 1000);
-        const day = date.toDateString();
-        
-        if (!dailyData[day]) {
-            dailyData[day] = item;
-        }
-    });
-    
-    return Object.values(dailyData);
+// Parse a server-side local date ("YYYY-MM-DD") without shifting it into the browser's timezone
+function localDate(isoDate) {
+    const [year, month, day] = isoDate.split('-').map(Number);
+    return new Date(year, month - 1, day);
 }
 
 // Get weather icon class based on OpenWeather icon code
@@ -210,6 +217,7 @@ function addBotMessage(message) {
     messageDiv.innerHTML = `<p>${message}</p>`;
     chatMessages.appendChild(messageDiv);
     chatMessages.scrollTop = chatMessages.scrollHeight;
+    return messageDiv;
 }
 
 function addUserMessage(message) {
@@ -234,22 +242,38 @@ async function handleChatMessage() {
     chatMessages.appendChild(typingDiv);
     chatMessages.scrollTop = chatMessages.scrollHeight;
     
+    // Replace the typing indicator with a reply that is updated as text streams in
+    let replyDiv = null;
+    let quickAnswer = null;   // Rule-based answer to fall back on if the stream breaks
+    const renderReply = (text, provisional) => {
+        if (provisional) {
+            quickAnswer = text;
+        }
+        if (!replyDiv) {
+            chatMessages.removeChild(typingDiv);
+            replyDiv = addBotMessage('');
+        }
+        replyDiv.querySelector('p').textContent = text;
+        replyDiv.classList.toggle('provisional', provisional);
+        chatMessages.scrollTop = chatMessages.scrollHeight;
+    };
+    
     try {
         // Use Gemini for intelligent responses
-        const response = await chatWithGemini(message);
-        
-        // Remove typing indicator
-        chatMessages.removeChild(typingDiv);
-        
-        // Add bot response
-        addBotMessage(response);
+        await chatWithGemini(message, renderReply);
         
     } catch (error) {
-        // Remove typing indicator
-        chatMessages.removeChild(typingDiv);
-        
         console.error('Error sending message to chatbot:', error);
         
+        // Replace any partial AI reply with the quick answer
+        if (replyDiv && quickAnswer) {
+            renderReply(quickAnswer, false);
+            return;
+        }
+        
+        // Remove the typing indicator or partial reply
+        chatMessages.removeChild(replyDiv || typingDiv);
+        
         // Try fallback to original chatbot
         try {
             const fallbackResponse = await fetch('/api/chatbot', {
@@ -286,73 +310,68 @@ function showLoading(show) {
     });
 }
 
-// Generate weather summary for Gemini
-function generateWeatherSummary() {
-    if (!currentWeatherData || !forecastData) {
-        return 'No weather data available.';
-    }
-    
-    const current = currentWeatherData;
-    const forecast = forecastData;
-    
-    // Current weather summary
-    let summary = `Current Weather in ${current.name}, ${current.sys.country}:\n`;
-    summary += `- Temperature: ${Math.round(current.main.temp)}°C (feels like ${Math.round(current.main.feels_like)}°C)\n`;
-    summary += `- Weather: ${current.weather[0].description}\n`;
-    summary += `- Humidity: ${current.main.humidity}%\n`;
-    summary += `- Wind Speed: ${Math.round(current.wind.speed * 3.6)} km/h\n`;
-    summary += `- Visibility: ${Math.round(current.visibility / 1000)} km\n`;
-    summary += `- Pressure: ${current.main.pressure} hPa\n\n`;
-    
-    // 5-day forecast summary
-    summary += `5-Day Forecast:\n`;
-    const dailyData = groupForecastByDay(forecast.list);
-    
-    dailyData.forEach((day, index) => {
-        const date = new Date(day.dt * 1000);
-        const dayName = date.toLocaleDateString('en-US', { weekday: 'short' });
-        const dateStr = date.toLocaleDateString('en-US', { month: 'short', day: 'numeric' });
-        
-        summary += `${dayName} (${dateStr}): ${Math.round(day.main.temp)}°C, ${day.weather[0].description}, ${day.main.humidity}% humidity\n`;
-    });
-    
-    // Temperature statistics
-    const temps = forecast.list.map(item => item.main.temp);
-    const maxTemp = Math.round(Math.max(...temps));
-    const minTemp = Math.round(Math.min(...temps));
-    const avgTemp = Math.round(temps.reduce((a, b) => a + b, 0) / temps.length);
-    
-    summary += `\nTemperature Statistics:\n`;
-    summary += `- Highest: ${maxTemp}°C\n`;
-    summary += `- Lowest: ${minTemp}°C\n`;
-    summary += `- Average: ${avgTemp}°C\n`;
-    
-    return summary;
-}
-
-// Chat with Gemini LLM
-async function chatWithGemini(query) {
+// Chat with Gemini LLM, streaming the reply over Server-Sent Events
+// onUpdate(text, provisional) is called with the instant rule-based answer,
+// then with the AI reply as it grows token by token.
+async function chatWithGemini(query, onUpdate) {
     try {
-        const weatherSummary = generateWeatherSummary();
-        
-        const response = await fetch('/chat', {
+        // The server answers from its own parsed copy of the city's weather
+        const response = await fetch('/chat/stream', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
             body: JSON.stringify({
                 query: query,
-                weatherData: weatherSummary
+                city: currentCity
             })
         });
         
-        const data = await response.json();
+        if (!response.ok || !response.body) {
+            throw new Error(`Chat request failed with status ${response.status}`);
+        }
+        
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let provisional = '';
+        let reply = '';
+        
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            
+            // Events are separated by a blank line
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const event = parseServerSentEvent(buffer.slice(0, boundary));
+                buffer = buffer.slice(boundary + 2);
+                
+                if (event.type === 'provisional') {
+                    provisional = event.data.response;
+                    onUpdate(provisional, true);
+                } else if (event.type === 'token') {
+                    reply += event.data.text;
+                    onUpdate(reply, false);
+                } else if (event.type === 'error') {
+                    // Discard any partial AI reply and show the quick answer the server falls back to
+                    const fallback = event.data.fallback || provisional;
+                    if (!fallback) {
+                        throw new Error(event.data.response);
+                    }
+                    console.warn(event.data.response);
+                    onUpdate(fallback, false);
+                    return fallback;
+                }
+            }
+        }
         
-        if (data.success) {
-            return data.response;
-        } else {
-            throw new Error(data.response || 'Unknown error');
+        // Without an AI reply the rule-based answer becomes the final one
+        if (!reply && provisional) {
+            onUpdate(provisional, false);
         }
+        return reply || provisional;
         
     } catch (error) {
         console.error('Error chatting with Gemini:', error);
@@ -360,6 +379,21 @@ async function chatWithGemini(query) {
     }
 }
 
+// Parse one "event: ...\ndata: ..." block
+function parseServerSentEvent(block) {
+    const event = { type: 'message', data: null };
+    const dataLines = [];
+    block.split('\n').forEach(line => {
+        if (line.startsWith('event:')) {
+            event.type = line.slice(6).trim();
+        } else if (line.startsWith('data:')) {
+            dataLines.push(line.slice(5).trim());
+        }
+    });
+    event.data = dataLines.length ? JSON.parse(dataLines.join('\n')) : {};
+    return event;
+}
+
 // Error handling
 function showError(message) {
     addBotMessage(`Error: ${message}`);
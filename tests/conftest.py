@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# Demo data, no background refresh and no Gemini key, whatever the shell has set
+os.environ['OPENWEATHER_API_KEY'] = 'YOUR_OPENWEATHER_API_KEY'
+os.environ['PREWARM_ENABLED'] = 'false'
+os.environ['WEATHER_STORE'] = 'memory'
+os.environ.pop('GEMINI_API_KEY', None)
+
+
+@pytest.fixture
+def client():
+    import app
+    app.weather_cache.clear()
+    return app.app.test_client()
@@ -0,0 +1,27 @@
+def test_batch_rejects_cities_given_as_a_string(client):
+    response = client.post('/api/weather/batch', json={'cities': 'London'})
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+    assert '"cities" must be a list' in response.get_json()['error']
+
+
+def test_batch_rejects_non_string_cities(client):
+    response = client.post('/api/weather/batch', json={'cities': ['London', 42]})
+    assert response.status_code == 400
+
+
+def test_batch_rejects_array_body(client):
+    response = client.post('/api/weather/batch', json=['London', 'Paris'])
+    assert response.status_code == 400
+    assert 'JSON object' in response.get_json()['error']
+
+
+def test_batch_rejects_locations_given_as_an_object(client):
+    response = client.post('/api/weather/batch', json={'locations': {'lat': 1, 'lon': 2}})
+    assert response.status_code == 400
+
+
+def test_batch_looks_up_each_city_once(client):
+    response = client.post('/api/weather/batch', json={'cities': ['London', 'london', 'Paris']})
+    assert response.status_code == 200
+    assert list(response.get_json()['results']) == ['London', 'Paris']
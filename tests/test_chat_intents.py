@@ -0,0 +1,180 @@
+import pytest
+
+import app
+from chat_intents import IntentMatcher, ResponderRegistry, tokenize
+
+# Example questions from the original README and chatbot, plus inflected forms
+MESSAGES = [
+    "Do I need an umbrella this week?",
+    "Summarize the next 5 days' weather.",
+    "What day is best for outdoor activities?",
+    "Give me the average and highest temperatures this week.",
+    "Based on this week's weather, what should I pack for a trip?",
+    "What's the temperature right now?",
+    "What's the wind speed?",
+    "what is the highest temp this week",
+    "lowest temperature in the forecast?",
+    "average temp please",
+    "average humidity",
+    "current humidity",
+    "How is the weather?",
+    "current conditions",
+    "What's the visibility like?",
+    "Is it going to rain tomorrow?",
+    "any precipitation expected",
+    "Give me a summary",
+    "help",
+    "what can you do",
+    "Do I need sunglasses?",
+    "Will there be rainfall tomorrow?",
+    "Is it raining?",
+    "Is it rainy today?",
+    "What are the temperatures this week?",
+    "Show me the forecasts",
+    "Is it windy?",
+    "Will I be packing for the outdoors?",
+    "compare this week with last week",
+]
+
+# Deliberate changes from the substring checks, with the reason
+BASIC_CHANGES = {
+    # "humid" is a humidity keyword now
+    "How humid is it today?": (None, 'humidity'),
+    # Specific topics outrank the generic "weather" keyword
+    "Will the weather bring rain?": ('condition', 'rain'),
+    # "now" no longer matches inside "know"
+    "Do you know the temperature?": ('temperature/current', 'temperature'),
+}
+ADVANCED_CHANGES = {
+    # "rain more than" is no longer shadowed by the plain rain intent
+    "Will it rain more than 3 times this week?": ('rain', 'rain_count'),
+}
+
+
+def legacy_basic_intent(message):
+    """The substring cascade process_chat_message used originally"""
+    if any(word in message for word in ['temperature', 'temp']):
+        for modifier, words in (('current', ['current', 'now']), ('highest', ['highest', 'max']),
+                                ('lowest', ['lowest', 'min']), ('average', ['average', 'avg'])):
+            if any(word in message for word in words):
+                return f'temperature/{modifier}'
+        return 'temperature'
+    if 'humidity' in message:
+        for modifier, words in (('current', ['current', 'now']), ('average', ['average', 'avg'])):
+            if any(word in message for word in words):
+                return f'humidity/{modifier}'
+        return 'humidity'
+    if 'wind' in message:
+        return 'wind'
+    if any(word in message for word in ['weather', 'condition']):
+        return 'condition'
+    if 'visibility' in message:
+        return 'visibility'
+    if any(word in message for word in ['rain', 'precipitation']):
+        return 'rain'
+    if any(word in message for word in ['summary', 'overview']):
+        return 'summary'
+    if any(word in message for word in ['help', 'what can you do']):
+        return 'help'
+    return None
+
+
+def legacy_advanced_intent(query):
+    """The substring cascade the advanced chatbot used originally"""
+    if any(word in query for word in ['umbrella', 'rain', 'precipitation']):
+        return 'rain'
+    if 'summarize' in query or 'summary' in query:
+        return 'summary'
+    if any(word in query for word in ['outdoor', 'activities', 'best day']):
+        return 'outdoor'
+    if any(word in query for word in ['average', 'highest', 'temperature']):
+        return 'temperature'
+    if 'pack' in query or 'trip' in query:
+        return 'packing'
+    if 'rain more than' in query or 'rainy days' in query:
+        return 'rain_count'
+    if 'compare' in query and 'last week' in query:
+        return 'compare'
+    return None
+
+
+def basic_intent(message):
+    intent, modifiers = app.CHAT_INTENTS.match(message)
+    for modifier in ('current', 'highest', 'lowest', 'average'):
+        if intent in ('temperature', 'humidity') and modifier in modifiers:
+            return f'{intent}/{modifier}'
+    return intent
+
+
+@pytest.mark.parametrize('message', MESSAGES + list(BASIC_CHANGES))
+def test_basic_matcher_agrees_with_substring_checks(message):
+    message = message.lower()
+    expected = legacy_basic_intent(message)
+    for original, (old, new) in BASIC_CHANGES.items():
+        if original.lower() == message:
+            assert expected == old
+            expected = new
+    assert basic_intent(message) == expected
+
+
+@pytest.mark.parametrize('message', MESSAGES + list(ADVANCED_CHANGES))
+def test_advanced_matcher_agrees_with_substring_checks(message):
+    message = message.lower()
+    expected = legacy_advanced_intent(message)
+    for original, (old, new) in ADVANCED_CHANGES.items():
+        if original.lower() == message:
+            assert expected == old
+            expected = new
+    assert app.classify_advanced_intent(message) == expected
+
+
+@pytest.fixture
+def matcher():
+    return (
+        IntentMatcher()
+        .add_intent('rain_count', ['rain more than'])
+        .add_intent('rain', ['rain', 'umbrella'])
+        .add_intent('condition', ['weather'])
+        .add_modifier('current', ['now'])
+    )
+
+
+def test_tokenize_lowercases_and_drops_punctuation():
+    assert tokenize("What's the Temp, NOW?") == ['what', 's', 'the', 'temp', 'now']
+
+
+def test_highest_priority_intent_wins(matcher):
+    assert matcher.match('weather with an umbrella') == ('rain', frozenset())
+    assert matcher.match('will it rain more than twice') == ('rain_count', frozenset())
+    assert matcher.match('what is the weather now') == ('condition', frozenset({'current'}))
+    assert matcher.match('hello there') == (None, frozenset())
+
+
+def test_phrases_need_every_word_in_order(matcher):
+    assert matcher.match('more rain than usual')[0] == 'rain'
+    assert matcher.match('rain more')[0] == 'rain'
+
+
+def test_keywords_match_word_starts_only(matcher):
+    assert matcher.match('rainfall')[0] == 'rain'
+    assert matcher.match('umbrellas')[0] == 'rain'
+    assert matcher.match('terrain')[0] is None
+    assert matcher.match('i know')[1] == frozenset()
+
+
+def test_keywords_added_later_are_matched(matcher):
+    assert matcher.match('hail')[0] is None
+    matcher.add_intent('hail', ['hail'])
+    assert matcher.match('hailstorm')[0] == 'hail'
+
+
+def test_responder_registry_falls_back_to_default():
+    registry = ResponderRegistry(lambda name: f'default for {name}')
+
+    @registry.register('rain')
+    def respond_rain(name):
+        return f'rain for {name}'
+
+    assert registry.respond('rain', 'London') == 'rain for London'
+    assert registry.respond(None, 'London') == 'default for London'
+    assert registry.respond('hail', 'London') == 'default for London'
@@ -0,0 +1,66 @@
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import app
+from llm import GeminiProvider
+
+
+class FailingModel:
+    """Streams a few chunks, then fails like a dropped Gemini connection"""
+
+    def generate_content(self, prompt, stream=False):
+        yield SimpleNamespace(text='It will be ')
+        yield SimpleNamespace(text='sunny and ')
+        raise RuntimeError('connection reset')
+
+
+class StallingModel:
+    """Streams one chunk, then goes quiet for longer than the latency budget"""
+
+    def generate_content(self, prompt, stream=False):
+        yield SimpleNamespace(text='Take a ')
+        time.sleep(0.5)
+        yield SimpleNamespace(text='jacket.')
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    provider = GeminiProvider('test-key')
+    monkeypatch.setattr(app, 'gemini', provider)
+    app.llm_cache._cache.clear()
+    return provider
+
+
+def read_events(response):
+    events = []
+    for block in response.get_data(as_text=True).strip().split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+
+def test_error_after_tokens_falls_back_to_provisional_answer(client, gemini):
+    gemini._model = FailingModel()
+    assert client.get('/api/weather/London').status_code == 200
+
+    response = client.post('/chat/stream', json={'query': 'Will it be sunny?', 'city': 'London'})
+    events = read_events(response)
+
+    assert [name for name, _ in events] == ['provisional', 'token', 'token', 'error']
+    provisional = events[0][1]['response']
+    assert events[-1][1]['fallback'] == provisional
+
+
+def test_timeout_after_tokens_falls_back_to_provisional_answer(client, gemini, monkeypatch):
+    gemini._model = StallingModel()
+    monkeypatch.setattr(app.llm_runner, 'timeout', 0.1)
+    assert client.get('/api/weather/London').status_code == 200
+
+    response = client.post('/chat/stream', json={'query': 'What should I wear?', 'city': 'London'})
+    events = read_events(response)
+
+    assert [name for name, _ in events] == ['provisional', 'token', 'error']
+    assert events[-1][1]['fallback'] == events[0][1]['response']
@@ -0,0 +1,26 @@
+import pytest
+
+from http_cache import snapshot_validators
+
+VIEWS = ['/api/weather/London', '/api/weather/London/daily',
+         '/api/weather/London?view=slim', '/api/weather/London?fields=temp,pop']
+
+
+def test_variant_changes_etag():
+    entries = {'current': {'timestamp': 1000.0}, 'forecast': {'timestamp': 900.0}}
+    ttls = {'current': 600, 'forecast': 3600}
+    etag, modified, max_age = snapshot_validators(entries, ttls, ('weather', None, 'london-gb'), now=1100.0)
+    assert modified == 1000.0
+    assert max_age == 500
+    assert etag != snapshot_validators(entries, ttls, ('daily', None, 'london-gb'), now=1100.0)[0]
+    assert etag != snapshot_validators(entries, ttls, ('weather', None, 'paris-fr'), now=1100.0)[0]
+    assert etag == snapshot_validators(entries, ttls, ('weather', None, 'london-gb'), now=1200.0)[0]
+
+
+@pytest.mark.parametrize('path', VIEWS)
+def test_etag_only_validates_its_own_view(client, path):
+    etag = client.get(path).headers['ETag']
+    assert client.get(path, headers={'If-None-Match': etag}).status_code == 304
+    for other in VIEWS:
+        if other != path:
+            assert client.get(other, headers={'If-None-Match': etag}).status_code == 200
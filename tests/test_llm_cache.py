@@ -0,0 +1,34 @@
+from llm import LLMResponseCache, query_signature
+
+SUMMARY = 'Current: 12°C, light rain'
+
+
+def test_reversed_comparison_does_not_reuse_answer():
+    cache = LLMResponseCache()
+    cache.set('Is it warmer on Monday than Tuesday?', SUMMARY, 'Monday is warmer.', 1.0, 600)
+    assert cache.get('Is it warmer on Tuesday than Monday?', SUMMARY) is None
+
+
+def test_reversed_comparisons_have_different_signatures():
+    assert query_signature('Is it warmer on Monday than Tuesday?') != \
+        query_signature('Is it warmer on Tuesday than Monday?')
+
+
+def test_filler_words_and_punctuation_still_match():
+    cache = LLMResponseCache()
+    cache.set('Do I need an umbrella?', SUMMARY, 'Yes, take one.', 1.0, 600)
+    assert cache.get('need umbrella', SUMMARY) == 'Yes, take one.'
+    assert cache.stats()['near_duplicate_hits'] == 1
+
+
+def test_question_word_changes_the_question():
+    cache = LLMResponseCache()
+    cache.set('Will it rain?', SUMMARY, 'Yes, it will.', 1.0, 600)
+    assert cache.get('When will it rain?', SUMMARY) is None
+    assert query_signature('How cold will it be?') != query_signature('Will it be cold?')
+    assert query_signature('Which day is warmest?') != query_signature('Is the day warmest?')
+
+
+def test_contracted_question_words_match():
+    assert query_signature("What's the temperature?") == query_signature('What is the temperature?')
+    assert query_signature("How's the wind?") == query_signature('How is the wind?')
@@ -0,0 +1,95 @@
+import pytest
+
+from prewarm import Prewarmer
+
+TTLS = {'current': 600, 'forecast': 3600}
+
+
+def make_prewarmer(daily_budget, refreshed=None):
+    return Prewarmer(
+        lambda endpoint, city: refreshed.append((endpoint, city)),
+        lambda endpoint, city: 0,
+        seed_cities=['london-gb'], ttls=TTLS, daily_budget=daily_budget
+    )
+
+
+def test_zero_budget_disables_prewarming():
+    refreshed = []
+    prewarmer = make_prewarmer(0, refreshed)
+    prewarmer.start()
+    prewarmer.run_once()
+    prewarmer.run_once()
+
+    status = prewarmer.status()
+    assert refreshed == []
+    assert not status['running']
+    assert status['intervals'] == {'current': None, 'forecast': None}
+    assert status['budget']['remaining_today'] == 0
+
+
+def test_budget_stretches_intervals():
+    status = make_prewarmer(10).status()
+    # 1 city needs 180 + 30 calls a day at 80% of the TTLs; 10 calls stretch that 21x
+    assert status['intervals'] == {'current': 10080, 'forecast': 60480}
+
+
+def test_zero_budget_status_and_metrics(client, monkeypatch):
+    import app
+    monkeypatch.setattr(app, 'prewarmer', make_prewarmer(0))
+    response = client.get('/api/prewarm/status')
+    assert response.status_code == 200
+    assert response.get_json()['intervals']['current'] is None
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'weather_prewarm_quota_remaining 0' in body
+
+
+def test_runner_rejects_budget_below_worker_count(monkeypatch):
+    pytest.importorskip('dotenv')
+    import run
+    monkeypatch.setenv('PREWARM_DAILY_BUDGET', '3')
+    monkeypatch.setenv('WEB_CONCURRENCY', '4')
+    monkeypatch.setattr('sys.argv', ['run.py', '--mode', 'prod'])
+    with pytest.raises(SystemExit) as exc:
+        run.main()
+    assert 'PREWARM_DAILY_BUDGET (3)' in str(exc.value)
+
+
+@pytest.fixture
+def demand(monkeypatch):
+    import app
+    prewarmer = make_prewarmer(10)
+    prewarmer.seed_cities = []
+    monkeypatch.setattr(app, 'prewarmer', prewarmer)
+    return prewarmer
+
+
+def test_failed_lookups_are_not_demand(client, demand, monkeypatch):
+    import app
+    monkeypatch.setattr(app, 'fetch_weather', lambda location, refresh=False: ({}, {'current': 'Not found'}, False))
+    client.get('/api/weather/Lodnon')
+    client.get('/api/weather/Lodnon/daily')
+    assert demand.hot_set() == []
+
+
+def test_successful_lookups_are_demand(client, demand):
+    client.get('/api/weather/London')
+    client.get('/api/weather/Paris/daily')
+    assert demand.hot_set() == ['london-gb', 'paris-fr']
+
+
+def test_asgi_failed_lookups_are_not_demand(demand):
+    import asyncio
+    import app
+    import asgi_app
+
+    async def fetch_weather(location, refresh=False):
+        return {}, {'current': 'Not found'}, False
+
+    async def send(message):
+        pass
+
+    server = asgi_app.DashboardASGI(app.app)
+    server.fetch_weather = fetch_weather
+    scope = {'query_string': b'', 'headers': []}
+    asyncio.run(server.weather(scope, send, 'Lodnon', False))
+    assert demand.hot_set() == []
@@ -0,0 +1,162 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import weather_cache
+from weather_cache import AsyncSingleFlight, SingleFlight, TTLCache, WeatherCache
+from weather_store import SQLiteStore
+
+
+def test_lookups_count_memo_hits(tmp_path):
+    cache = WeatherCache(store=SQLiteStore(str(tmp_path / 'weather.db')))
+    cache.set('current', 'London', {'name': 'London'})
+    assert cache.get('current', 'London')['data'] == {'name': 'London'}
+    assert cache.get('current', 'london')['data'] == {'name': 'London'}
+    assert cache.get('current', 'Paris') is None
+
+    stats = cache.stats()
+    # Both hits came from the memo; only the Paris miss reached the store
+    assert stats['lookups'] == {'hits': 2, 'misses': 1, 'hit_rate': 0.6667}
+    assert stats['hits'] == 0
+
+
+def test_metrics_report_cache_lookups(client):
+    client.get('/api/weather/London')
+    client.get('/api/weather/London')
+    body = client.get('/metrics').get_data(as_text=True)
+    hits = next(line for line in body.splitlines() if line.startswith('weather_cache_lookups_total{result="hit"}'))
+    assert float(hits.split()[-1]) >= 1
+
+
+class Clock:
+    """Stands in for the time module so expiry can be tested without sleeping"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(weather_cache, 'time', clock)
+    return clock
+
+
+def test_ttl_cache_evicts_least_recently_used_by_count():
+    cache = TTLCache(max_entries=2)
+    cache.set('a', 1, 60, size=1)
+    cache.set('b', 2, 60, size=1)
+    assert cache.get('a') == 1
+    cache.set('c', 3, 60, size=1)
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+    assert cache.stats()['evictions'] == 1
+
+
+def test_ttl_cache_evicts_by_bytes():
+    cache = TTLCache(max_entries=10, max_bytes=100)
+    cache.set('a', 'x', 60, size=40)
+    cache.set('b', 'y', 60, size=40)
+    cache.set('c', 'z', 60, size=40)
+    assert cache.get('a') is None
+    assert cache.stats()['bytes'] == 80
+
+
+def test_ttl_cache_skips_entries_larger_than_the_cache():
+    cache = TTLCache(max_entries=10, max_bytes=100)
+    cache.set('a', 'x', 60, size=40)
+    cache.set('huge', 'y', 60, size=101)
+    assert cache.get('huge') is None
+    assert cache.get('a') == 'x'
+    assert cache.stats()['evictions'] == 0
+
+
+def test_ttl_cache_expires_entries(clock):
+    cache = TTLCache()
+    cache.set('a', 1, 10, size=1)
+    clock.now += 9
+    assert cache.ttl_remaining('a') == 1
+    assert cache.get('a') == 1
+    clock.now += 1
+    assert cache.get('a') is None
+    stats = cache.stats()
+    assert (stats['entries'], stats['expirations'], stats['hits'], stats['misses']) == (0, 1, 1, 1)
+
+
+def test_single_flight_shares_an_in_flight_load():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def load(city):
+        calls.append(city)
+        started.set()
+        release.wait(5)
+        return f'weather for {city}'
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        leader = flight.submit('london', executor, load, 'london')
+        started.wait(5)
+        follower = flight.submit('london', executor, load, 'london')
+        other = flight.submit('paris', executor, load, 'paris')
+        assert follower is leader and other is not leader
+        release.set()
+        assert follower.result(5) == 'weather for london'
+        other.result(5)
+
+    assert sorted(calls) == ['london', 'paris']
+    assert flight.stats() == {'in_flight': 0, 'leaders': 2, 'coalesced': 1}
+
+
+def test_single_flight_forgets_a_failed_load():
+    flight = SingleFlight()
+
+    def fail():
+        raise RuntimeError('upstream down')
+
+    # Leaving the executor waits for the worker, which runs the done callbacks
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        first = flight.submit('london', executor, fail)
+    with pytest.raises(RuntimeError):
+        first.result()
+    assert flight.stats()['in_flight'] == 0
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        second = flight.submit('london', executor, lambda: 'ok')
+    assert second is not first
+    assert second.result() == 'ok'
+
+
+def test_async_single_flight_coalesces_and_forgets():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def load(city):
+        calls.append(city)
+        await asyncio.sleep(0.01)
+        if city == 'nowhere':
+            raise RuntimeError('not found')
+        return f'weather for {city}'
+
+    async def scenario():
+        first = flight.run('london', load, 'london')
+        second = flight.run('london', load, 'london')
+        assert second is first
+        assert await first == 'weather for london'
+        with pytest.raises(RuntimeError):
+            await flight.run('nowhere', load, 'nowhere')
+        assert flight.stats()['in_flight'] == 0
+        # Completed and failed keys start a new load
+        assert await flight.run('london', load, 'london') == 'weather for london'
+
+    asyncio.run(scenario())
+    assert calls == ['london', 'nowhere', 'london']
+    assert flight.stats() == {'in_flight': 0, 'leaders': 3, 'coalesced': 1}
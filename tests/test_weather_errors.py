@@ -0,0 +1,25 @@
+import pytest
+
+
+@pytest.fixture
+def unavailable(monkeypatch):
+    import app
+    looked_up = []
+
+    def fetch_weather(location, refresh=False):
+        looked_up.append(location)
+        return {}, {'current': 'Could not reach OpenWeather'}, False
+
+    monkeypatch.setattr(app, 'fetch_weather', fetch_weather)
+    return looked_up
+
+
+@pytest.mark.parametrize('path', ['/api/weather/london', '/api/weather/london/daily'])
+def test_error_names_the_requested_city(client, unavailable, path):
+    response = client.get(path)
+    assert response.status_code == 400
+    error = response.get_json()['error']
+    assert 'for london.' in error
+    assert 'london-gb' not in error
+    # The canonical ID is still what gets fetched
+    assert unavailable == ['london-gb']
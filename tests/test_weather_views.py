@@ -0,0 +1,12 @@
+def test_fields_apply_to_current_and_forecast(client):
+    body = client.get('/api/weather/London?fields=feels_like,pressure,visibility').get_json()
+    assert body['success']
+    current, forecast = body['current'], body['forecast']
+    for name in ('feels_like', 'pressure', 'visibility'):
+        assert current[name] is not None
+        assert len(forecast[name]) == 40
+
+
+def test_unknown_field_is_rejected(client):
+    response = client.get('/api/weather/London?fields=temp,altitude')
+    assert response.status_code == 400
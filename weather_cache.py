@@ -0,0 +1,368 @@
+"""
+In-process TTL + LRU cache for upstream OpenWeather responses
+"""
+
+import asyncio
+import json
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import json_codec
+
+# How long each upstream endpoint stays fresh (seconds)
+DEFAULT_TTLS = {
+    'current': 10 * 60,
+    'forecast': 60 * 60,
+}
+
+
+def city_key(city):
+    """Normalize a user supplied city name into a cache key"""
+    return ' '.join(city.split()).casefold()
+
+
+def estimate_size(value):
+    """Approximate the memory footprint of a JSON-like value in bytes"""
+    return len(json.dumps(value, separators=(',', ':')))
+
+
+class TTLCache:
+    """Bounded cache with per-entry TTL and LRU eviction by count and bytes"""
+
+    # Holds live objects private to this process (see weather_store for shared stores)
+    shared = False
+
+    def __init__(self, max_entries=256, max_bytes=16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, expires_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[1] <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def ttl_remaining(self, key):
+        """Seconds until key expires, or 0 if it is not cached"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return 0
+            return max(0.0, entry[1] - time.monotonic())
+
+    def set(self, key, value, ttl, size=None):
+        """Store value under key for ttl seconds, evicting LRU entries as needed"""
+        if size is None:
+            size = estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                # Never cache something that would flush the whole cache
+                return
+            self._entries[key] = (value, time.monotonic() + ttl, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key):
+        """Drop key from the cache, returning True if it was present"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                return True
+            return False
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self):
+        """Return counters describing cache usage"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+class WeatherCache:
+    """Per-endpoint cache of OpenWeather payloads keyed by city
+
+    By default entries live in a private TTLCache. With a shared or
+    persistent store (see weather_store) entries are stored as bytes: a
+    "<timestamp> <encoding>" header line, then the JSON payload, zlib
+    compressed when `compress` is set. Each process memoizes what it
+    decoded, including models built by `models[endpoint](payload)`. Entries
+    keep the upstream JSON bytes as `raw`, so responses can embed them without
+    re-encoding and stores can write them as they are. A read
+    re-checks the store at most every `revalidate_after` seconds and parses
+    only the header unless the entry changed, so repeated reads cost a dict
+    lookup. Nothing is loaded up front; entries are decoded on first use.
+    Hits and misses are counted here, so memo hits count as hits whatever
+    the store.
+    """
+
+    def __init__(self, ttls=None, max_entries=256, max_bytes=16 * 1024 * 1024,
+                 store=None, models=None, revalidate_after=1.0, compress=True):
+        self.ttls = dict(DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        self.store = store if store is not None else TTLCache(max_entries=max_entries, max_bytes=max_bytes)
+        self.models = dict(models or {})
+        self.revalidate_after = revalidate_after
+        self.compress = compress
+        # Entries decoded from the store: key -> [entry, header, checked_at]
+        self._memo = TTLCache(max_entries=max_entries, max_bytes=max_bytes) if self.store.shared else None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(endpoint, city):
+        return f"{endpoint}:{city_key(city)}"
+
+    def get(self, endpoint, city):
+        """Return the cached entry for an endpoint and city, or None"""
+        entry = self._lookup(self._key(endpoint, city), endpoint)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return entry
+
+    def _lookup(self, key, endpoint):
+        if not self.store.shared:
+            return self.store.get(key)
+
+        memo = self._memo.get(key)
+        now = time.monotonic()
+        if memo is not None and now - memo[2] < self.revalidate_after:
+            return memo[0]
+        record = self.store.get(key)
+        if record is None:
+            if memo is not None:
+                self._memo.delete(key)
+            return None
+        header, _, body = record.partition(b'\n')
+        if memo is not None and memo[1] == header:
+            memo[2] = now
+            return memo[0]
+        try:
+            stamp, encoding = header.split(b' ')
+            if encoding == b'zlib':
+                body = zlib.decompress(body)
+            elif encoding != b'json':
+                raise ValueError(f'unknown encoding {encoding!r}')
+            payload = json_codec.loads(body)
+            timestamp = float(stamp)
+        except (ValueError, zlib.error):
+            # Written by an incompatible version; treat as a miss so it gets refetched
+            self.store.delete(key)
+            return None
+        model_builder = self.models.get(endpoint)
+        entry = {
+            'data': payload,
+            'raw': body,
+            'model': model_builder(payload) if model_builder else None,
+            'timestamp': timestamp,
+        }
+        # Expire the memo with the stored entry, which was written at `timestamp`
+        ttl = self.ttls[endpoint] - (time.time() - timestamp)
+        self._memo.set(key, [entry, header, now], ttl, 2 * len(body))
+        return entry
+
+    def set(self, endpoint, city, payload, model=None, raw=None):
+        """Cache an upstream payload (and any model derived from it) for an endpoint and city
+
+        raw is the payload's JSON as received from upstream; it is encoded
+        from the payload when not given.
+        """
+        body = raw if raw is not None else json_codec.dumps(payload)
+        entry = {
+            'data': payload,
+            'raw': body,
+            'model': model,
+            'timestamp': time.time(),
+        }
+        key = self._key(endpoint, city)
+        ttl = self.ttls[endpoint]
+        # The decoded payload takes roughly as much memory again as its JSON
+        size = 2 * len(body)
+        if not self.store.shared:
+            self.store.set(key, entry, ttl, size)
+            return entry
+
+        if self.compress:
+            header = b'%r zlib' % entry['timestamp']
+            body = zlib.compress(body, 6)
+        else:
+            header = b'%r json' % entry['timestamp']
+        record = header + b'\n' + body
+        self.store.set(key, record, ttl, len(record))
+        self._memo.set(key, [entry, header, time.monotonic()], ttl, size)
+        return entry
+
+    def ttl_remaining(self, endpoint, city):
+        """Seconds until the cached endpoint for a city expires (0 if not cached)"""
+        return self.store.ttl_remaining(self._key(endpoint, city))
+
+    def get_city(self, city):
+        """Return current and forecast data for a city if both are cached"""
+        current = self.get('current', city)
+        forecast = self.get('forecast', city)
+        if current is None or forecast is None:
+            return None
+        return {
+            'current': current['data'],
+            'forecast': forecast['data'],
+            'model': forecast['model'],
+            'timestamp': min(current['timestamp'], forecast['timestamp']),
+        }
+
+    def invalidate(self, city):
+        """Drop every cached endpoint for a city"""
+        removed = False
+        for endpoint in self.ttls:
+            key = self._key(endpoint, city)
+            if self._memo is not None:
+                self._memo.delete(key)
+            removed = self.store.delete(key) or removed
+        return removed
+
+    def clear(self):
+        """Drop every cached city"""
+        if self._memo is not None:
+            self._memo.clear()
+        self.store.clear()
+
+    def stats(self):
+        """Return store counters, lookups served from memo or store, and the configured TTLs"""
+        stats = self.store.stats()
+        with self._lock:
+            lookups = self.hits + self.misses
+            stats['lookups'] = {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+        if self._memo is not None:
+            stats['memo'] = self._memo.stats()
+        stats['ttls'] = dict(self.ttls)
+        return stats
+
+
+class SingleFlight:
+    """Coalesce concurrent loads of the same key into a single in-flight call
+
+    Callers asking for a key that is already being loaded get the same Future
+    as the first caller instead of starting another upstream request.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+
+    def submit(self, key, executor, fn, *args):
+        """Return a Future for fn(*args), shared with any in-flight call for key"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.followers += 1
+                return future
+            future = executor.submit(fn, *args)
+            self._calls[key] = future
+            self.leaders += 1
+        future.add_done_callback(lambda _: self._forget(key, future))
+        return future
+
+    def _forget(self, key, future):
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+    def stats(self):
+        """Return how many loads were started versus shared"""
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'leaders': self.leaders,
+                'coalesced': self.followers,
+            }
+
+
+class AsyncSingleFlight:
+    """asyncio counterpart of SingleFlight for the ASGI serving mode
+
+    Coroutines awaiting a key that is already loading share the first caller's
+    task. All callers run on one event loop, so no lock is needed.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+        self.leaders = 0
+        self.followers = 0
+
+    def run(self, key, fn, *args):
+        """Return a task for the coroutine fn(*args), shared with any in-flight load of key"""
+        task = self._tasks.get(key)
+        if task is not None:
+            self.followers += 1
+            return task
+        task = asyncio.ensure_future(fn(*args))
+        self._tasks[key] = task
+        self.leaders += 1
+        task.add_done_callback(lambda _: self._forget(key, task))
+        return task
+
+    def _forget(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            # Waiters that timed out never look at the result; don't log its error as unhandled
+            task.exception()
+
+    def stats(self):
+        """Return how many loads were started versus shared"""
+        return {
+            'in_flight': len(self._tasks),
+            'leaders': self.leaders,
+            'coalesced': self.followers,
+        }
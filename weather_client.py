@@ -0,0 +1,321 @@
+"""
+Pooled HTTP clients for the OpenWeather API with timeouts, retries and a circuit breaker
+"""
+
+import asyncio
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import json_codec
+from city_index import COORDINATES_RE
+from metrics import STAGE_SECONDS
+
+# Imported by AsyncWeatherClient: only the ASGI serving mode needs it, and it is slow to import
+aiohttp = None
+
+# OpenWeather path for each endpoint the dashboard uses
+ENDPOINT_PATHS = {
+    'current': 'weather',
+    'forecast': 'forecast',
+}
+
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+
+def location_params(city):
+    """Build the OpenWeather location query for a city name or "lat,lon" string"""
+    match = COORDINATES_RE.match(city)
+    if match:
+        return {'lat': match.group(1), 'lon': match.group(2)}
+    return {'q': city}
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of calling upstream while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Fail fast after repeated upstream failures, probing again after a cool-down"""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Return True if a call may go upstream right now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probing = False
+            # Half open: let a single probe through
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        """Close the circuit after a successful call"""
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        """Count a failed call, opening the circuit once the threshold is reached"""
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.times_opened += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        """Return the breaker state"""
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'times_opened': self.times_opened,
+            }
+
+
+class _UpstreamClient:
+    """Configuration, retry policy and counters shared by the sync and async clients"""
+
+    def __init__(self, base_url, api_key, pool_size=16, connect_timeout=3.05,
+                 read_timeout=10, max_retries=2, backoff_base=0.25, backoff_max=4,
+                 breaker=None):
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+
+        self._lock = threading.Lock()
+        self._counters = {
+            'requests': 0,
+            'retries': 0,
+            'errors': 0,
+            'short_circuited': 0,
+        }
+
+    def _endpoint_params(self, city):
+        params = location_params(city)
+        params.update({
+            'appid': self.api_key,
+            'units': 'metric'
+        })
+        return params
+
+    def _read_timeout(self, deadline):
+        if deadline is None:
+            return self.read_timeout
+        return max(0.1, min(self.read_timeout, deadline - time.monotonic()))
+
+    def _backoff(self, attempt, error):
+        """Full-jitter exponential backoff, honouring Retry-After on 429s"""
+        response = getattr(error, 'response', None)
+        if response is not None and response.headers.get('Retry-After', '').isdigit():
+            return min(self.backoff_max, int(response.headers['Retry-After']))
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _has_time(self, deadline, delay):
+        return deadline is None or time.monotonic() + delay < deadline
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def connection_stats(self):
+        """Return connection pool counters, where the HTTP library exposes them"""
+        return {}
+
+    def stats(self):
+        """Return request, retry, pool and breaker counters for monitoring"""
+        with self._lock:
+            stats = dict(self._counters)
+        stats.update(self.connection_stats())
+        stats['circuit_breaker'] = self.breaker.stats()
+        return stats
+
+
+class WeatherClient(_UpstreamClient):
+    """Thin OpenWeather client sharing one keep-alive connection pool"""
+
+    def __init__(self, base_url, api_key, **options):
+        super().__init__(base_url, api_key, **options)
+        # Retries are handled here (with jitter and deadline awareness), not by urllib3
+        self._adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size, max_retries=0)
+        self.session = requests.Session()
+        self.session.mount('http://', self._adapter)
+        self.session.mount('https://', self._adapter)
+
+    def fetch(self, endpoint, city, deadline=None):
+        """Fetch an endpoint ('current' or 'forecast') for a city; return (payload, raw JSON bytes)"""
+        return _parse(self.get(ENDPOINT_PATHS[endpoint], self._endpoint_params(city), deadline))
+
+    def get(self, path, params, deadline=None):
+        """GET an API path, retrying transient failures until the deadline; return the body bytes"""
+        url = f"{self.base_url}/{path}"
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self._count('short_circuited')
+                raise CircuitOpenError('OpenWeather circuit breaker is open')
+
+            timeout = (self.connect_timeout, self._read_timeout(deadline))
+            self._count('requests')
+            try:
+                response = self.session.get(url, params=params, timeout=timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self.breaker.record_failure()
+                error = e
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    # Client errors such as an unknown city say nothing about upstream health
+                    self.breaker.record_success()
+                    response.raise_for_status()
+                    return response.content
+                self.breaker.record_failure()
+                error = requests.exceptions.HTTPError(
+                    f'{response.status_code} from OpenWeather', response=response
+                )
+
+            self._count('errors')
+            delay = self._backoff(attempt, error)
+            if attempt >= self.max_retries or not self._has_time(deadline, delay):
+                raise error
+            attempt += 1
+            self._count('retries')
+            time.sleep(delay)
+
+    def connection_stats(self):
+        """Return how many HTTP requests reused an already open connection"""
+        opened = 0
+        served = 0
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+                served += pool.num_requests
+        return {
+            'connections_opened': opened,
+            'requests_sent': served,
+            'connections_reused': max(0, served - opened),
+        }
+
+
+class AsyncWeatherClient(_UpstreamClient):
+    """asyncio OpenWeather client used by the ASGI serving mode
+
+    Same retry, deadline and circuit breaker behaviour as WeatherClient (pass
+    the same breaker to share upstream health between the two), but calls
+    await the network instead of holding a thread, so pool_size can be in the
+    thousands. Failures are raised as the equivalent requests exceptions so
+    callers handle both clients alike. Create it inside the event loop that
+    will use it.
+    """
+
+    def __init__(self, base_url, api_key, **options):
+        global aiohttp
+        if aiohttp is None:
+            try:
+                import aiohttp
+            except ImportError:
+                raise RuntimeError('The ASGI serving mode requires aiohttp (pip install aiohttp)') from None
+        super().__init__(base_url, api_key, **options)
+        self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.pool_size))
+
+    async def fetch(self, endpoint, city, deadline=None):
+        """Fetch an endpoint ('current' or 'forecast') for a city; return (payload, raw JSON bytes)"""
+        return _parse(await self.get(ENDPOINT_PATHS[endpoint], self._endpoint_params(city), deadline))
+
+    async def get(self, path, params, deadline=None):
+        """GET an API path, retrying transient failures until the deadline; return the body bytes"""
+        url = f"{self.base_url}/{path}"
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self._count('short_circuited')
+                raise CircuitOpenError('OpenWeather circuit breaker is open')
+
+            timeout = aiohttp.ClientTimeout(
+                sock_connect=self.connect_timeout, sock_read=self._read_timeout(deadline)
+            )
+            self._count('requests')
+            try:
+                async with self.session.get(url, params=params, timeout=timeout) as response:
+                    if response.status not in RETRY_STATUSES:
+                        # Client errors such as an unknown city say nothing about upstream health
+                        self.breaker.record_success()
+                        if response.status >= 400:
+                            raise requests.exceptions.HTTPError(
+                                f'{response.status} from OpenWeather', response=_requests_response(response)
+                            )
+                        return await response.read()
+                    self.breaker.record_failure()
+                    error = requests.exceptions.HTTPError(
+                        f'{response.status} from OpenWeather', response=_requests_response(response)
+                    )
+            except asyncio.TimeoutError as e:
+                self.breaker.record_failure()
+                error = requests.exceptions.Timeout(str(e))
+            except aiohttp.ClientError as e:
+                self.breaker.record_failure()
+                error = requests.exceptions.ConnectionError(str(e))
+
+            self._count('errors')
+            delay = self._backoff(attempt, error)
+            if attempt >= self.max_retries or not self._has_time(deadline, delay):
+                raise error
+            attempt += 1
+            self._count('retries')
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        """Close pooled connections"""
+        await self.session.close()
+
+
+def _parse(raw):
+    """Return (payload, raw) for a JSON response body, raising a requests error if it is not JSON"""
+    try:
+        with STAGE_SECONDS.time('json_parse'):
+            return json_codec.loads(raw), raw
+    except ValueError as e:
+        raise requests.exceptions.InvalidJSONError(f'OpenWeather returned invalid JSON: {e}') from None
+
+
+def _requests_response(response):
+    """Copy the status and headers of an aiohttp response onto a requests.Response"""
+    converted = requests.Response()
+    converted.status_code = response.status
+    converted.headers = requests.structures.CaseInsensitiveDict(response.headers)
+    converted.url = str(response.url)
+    return converted
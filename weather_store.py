@@ -0,0 +1,262 @@
+"""
+Storage backends for the weather cache
+
+A store maps string keys to values with a TTL. The in-process TTLCache keeps
+Python objects; the shared backends keep bytes that every worker process on
+the host (SQLiteStore) or in the deployment (RedisStore) can read, so a city
+fetched by one worker is served by all of them. SQLiteStore also persists
+across restarts: entries keep their original expiry and are read on demand,
+so startup does not depend on how much is stored. WeatherCache puts a
+per-process memo of decoded entries in front of shared stores.
+
+Every backend provides get, set(key, value, ttl, size=None), ttl_remaining,
+delete, clear and stats, plus a `shared` flag.
+"""
+
+import fnmatch
+import os
+import sqlite3
+import threading
+import time
+
+from weather_cache import TTLCache
+
+try:
+    import redis
+except ImportError:  # only needed for redis:// stores
+    redis = None
+
+
+class SQLiteStore:
+    """Store backed by a SQLite file, shared by the worker processes of one host
+
+    The database runs in WAL mode, so readers never wait for a writer. Each
+    thread gets its own connection. Expiry uses wall-clock time, because
+    monotonic clocks are not comparable between processes.
+    """
+
+    shared = True
+    PRUNE_EVERY = 256
+
+    def __init__(self, path, max_entries=10000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        db = self._db()
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute(
+            'CREATE TABLE IF NOT EXISTS weather ('
+            ' key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)'
+        )
+        db.execute('CREATE INDEX IF NOT EXISTS weather_expires_at ON weather (expires_at)')
+
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            # Autocommit: every statement is its own short transaction
+            db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            db.execute('PRAGMA synchronous=NORMAL')
+            self._local.db = db
+        return db
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key):
+        """Return the stored bytes for key, or None if missing or expired"""
+        row = self._db().execute(
+            'SELECT value FROM weather WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        self._count(row is not None)
+        return row[0] if row else None
+
+    def ttl_remaining(self, key):
+        """Seconds until key expires, or 0 if it is not stored"""
+        row = self._db().execute('SELECT expires_at FROM weather WHERE key = ?', (key,)).fetchone()
+        return max(0.0, row[0] - time.time()) if row else 0
+
+    def set(self, key, value, ttl, size=None):
+        """Store bytes under key for ttl seconds"""
+        db = self._db()
+        db.execute(
+            'INSERT OR REPLACE INTO weather (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, value, time.time() + ttl)
+        )
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.PRUNE_EVERY == 0
+        if prune:
+            self.prune()
+
+    def prune(self):
+        """Delete expired rows, then the soonest-expiring rows beyond max_entries"""
+        db = self._db()
+        db.execute('DELETE FROM weather WHERE expires_at <= ?', (time.time(),))
+        db.execute(
+            'DELETE FROM weather WHERE key IN ('
+            ' SELECT key FROM weather ORDER BY expires_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,)
+        )
+
+    def delete(self, key):
+        """Drop key, returning True if it was stored"""
+        return self._db().execute('DELETE FROM weather WHERE key = ?', (key,)).rowcount > 0
+
+    def clear(self):
+        """Drop every entry"""
+        self._db().execute('DELETE FROM weather')
+
+    def stats(self):
+        """Return row counts and this process's hit/miss counters"""
+        entries = self._db().execute('SELECT COUNT(*) FROM weather').fetchone()[0]
+        with self._lock:
+            return {
+                'backend': 'sqlite',
+                'path': self.path,
+                'entries': entries,
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+class RedisStore:
+    """Store backed by Redis (or anything speaking the same client API), shared by every host"""
+
+    shared = True
+
+    def __init__(self, client, prefix='weather:'):
+        self.client = client
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the stored bytes for key, or None"""
+        value = self.client.get(self.prefix + key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def ttl_remaining(self, key):
+        """Seconds until key expires, or 0 if it is not stored"""
+        millis = self.client.pttl(self.prefix + key)
+        return millis / 1000 if millis and millis > 0 else 0
+
+    def set(self, key, value, ttl, size=None):
+        """Store bytes under key for ttl seconds"""
+        self.client.set(self.prefix + key, value, px=max(1, int(ttl * 1000)))
+
+    def delete(self, key):
+        """Drop key, returning True if it was stored"""
+        return self.client.delete(self.prefix + key) > 0
+
+    def clear(self):
+        """Drop every key under this store's prefix"""
+        for name in list(self.client.scan_iter(match=self.prefix + '*')):
+            self.client.delete(name)
+
+    def stats(self):
+        """Return this process's hit/miss counters"""
+        with self._lock:
+            return {
+                'backend': 'redis',
+                'prefix': self.prefix,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+class LocalRedis:
+    """In-process stand-in for the subset of the redis-py client RedisStore uses
+
+    Lets the Redis code path run without a server (WEATHER_STORE=redis+local://)
+    for development and testing. It is not shared between processes.
+    """
+
+    def __init__(self):
+        self._data = {}  # name -> (value, expires_at or None)
+        self._lock = threading.Lock()
+
+    def _live(self, name):
+        item = self._data.get(name)
+        if item is not None and item[1] is not None and item[1] <= time.monotonic():
+            del self._data[name]
+            return None
+        return item
+
+    def get(self, name):
+        with self._lock:
+            item = self._live(name)
+            return item[0] if item else None
+
+    def set(self, name, value, px=None):
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        with self._lock:
+            self._data[name] = (value, time.monotonic() + px / 1000 if px else None)
+        return True
+
+    def pttl(self, name):
+        """Milliseconds to expiry; -1 without an expiry, -2 if missing (as Redis does)"""
+        with self._lock:
+            item = self._live(name)
+            if item is None:
+                return -2
+            if item[1] is None:
+                return -1
+            return int((item[1] - time.monotonic()) * 1000)
+
+    def delete(self, *names):
+        deleted = 0
+        with self._lock:
+            for name in names:
+                if self._live(name) is not None:
+                    del self._data[name]
+                    deleted += 1
+        return deleted
+
+    def scan_iter(self, match='*'):
+        with self._lock:
+            names = [name for name in self._data if self._live(name)]
+        return iter([name for name in names if fnmatch.fnmatchcase(name, match)])
+
+
+def create_store(url=None, max_entries=256, max_bytes=16 * 1024 * 1024, max_stored=10000):
+    """Build a store from a WEATHER_STORE style URL
+
+    max_entries and max_bytes bound the memory store; max_stored bounds the
+    rows kept in a SQLite file.
+
+    memory (default)       per-process TTLCache
+    sqlite:///path/to.db   SQLite file shared by the workers on this host, kept across restarts
+    redis://host:6379/0    Redis server (requires the redis package)
+    redis+local://         RedisStore over the in-process LocalRedis stand-in
+    """
+    url = (url or 'memory').strip()
+    if url == 'memory':
+        return TTLCache(max_entries=max_entries, max_bytes=max_bytes)
+    if url.startswith('sqlite:///'):
+        path = url[len('sqlite:///'):]
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        return SQLiteStore(path, max_entries=max_stored)
+    if url.startswith('redis+local://'):
+        return RedisStore(LocalRedis())
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        if redis is None:
+            raise RuntimeError('WEATHER_STORE=redis://... requires the redis package (pip install redis)')
+        return RedisStore(redis.Redis.from_url(url))
+    raise ValueError(f'Unknown WEATHER_STORE: {url!r}')
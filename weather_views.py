@@ -0,0 +1,83 @@
+"""
+Projected ("slim") views of a weather snapshot for bandwidth-constrained clients
+
+`?view=slim` or `?fields=temp,icon,...` on /api/weather/<city> replaces the
+raw OpenWeather payloads with the requested fields only: an object for the
+current conditions and parallel arrays (one entry per 3-hour slot) for the
+forecast, built from the ForecastSeries columns instead of 40 nested dicts.
+"""
+
+from forecast_model import FORECAST_COLUMNS
+
+# Where each field lives in an OpenWeather /weather payload
+CURRENT_FIELDS = {
+    'dt': ('dt',),
+    'temp': ('main', 'temp'),
+    'feels_like': ('main', 'feels_like'),
+    'humidity': ('main', 'humidity'),
+    'pressure': ('main', 'pressure'),
+    'wind': ('wind', 'speed'),
+    'visibility': ('visibility',),
+    'condition': ('weather', 0, 'id'),
+    'description': ('weather', 0, 'description'),
+    'icon': ('weather', 0, 'icon'),
+}
+
+# Fields the dashboard itself displays
+SLIM_FIELDS = ('dt', 'temp', 'humidity', 'wind', 'description', 'icon')
+
+# Every field that can be requested, in the order responses list them
+ALL_FIELDS = tuple(CURRENT_FIELDS) + tuple(name for name in FORECAST_COLUMNS if name not in CURRENT_FIELDS)
+
+
+def parse_fields(view=None, fields=None):
+    """Return the requested fields as a canonical tuple, or None for the full view
+
+    Raises ValueError for an unknown view or field name.
+    """
+    if fields:
+        requested = {name.strip() for name in fields.split(',') if name.strip()}
+        unknown = sorted(requested - set(ALL_FIELDS))
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(ALL_FIELDS)}")
+        if requested:
+            return tuple(name for name in ALL_FIELDS if name in requested)
+    if view in (None, '', 'full'):
+        return None
+    if view == 'slim':
+        return SLIM_FIELDS
+    raise ValueError(f"Unknown view: {view}. Use 'full' or 'slim'")
+
+
+def _lookup(payload, path):
+    for step in path:
+        try:
+            payload = payload[step]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return payload
+
+
+def project_current(current, fields):
+    """Project a /weather payload onto the requested fields, plus the place name"""
+    view = {
+        'name': current.get('name'),
+        'country': _lookup(current, ('sys', 'country')),
+    }
+    for name in fields:
+        if name in CURRENT_FIELDS:
+            view[name] = _lookup(current, CURRENT_FIELDS[name])
+    return view
+
+
+def project_forecast(series, fields):
+    """Project a ForecastSeries onto the requested fields as parallel arrays"""
+    view = {
+        'city': series.city,
+        'country': series.country,
+        'timezone': series.tz_offset,
+    }
+    for name in fields:
+        if name in FORECAST_COLUMNS:
+            view[name] = series.column(name)
+    return view